@@ -1,17 +1,45 @@
+import os
+import json
+import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager, nullcontext
 from pydantic import BaseModel
 from typing import Literal
 from fastapi import FastAPI, Query, HTTPException
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 
-from src.scrapers import (
+# Loaded before the src imports, so that settings read when a module is imported come from .env as well
+load_dotenv()
+
+from src.scrapers import (  # noqa: E402
     google_play_market as google_play_market_scraper,
     app_store as app_store_scraper,
 )
-from src.data_analysis.metrics import calculate_metrics
-from src.data_analysis.plots import generate_plots
-from src.data_analysis.sentiment_analysis import analyze_reviews_sentiment
-from src.llm.llm_pipeline import generate_summary
+from src.scrapers.http import aclose_http_client  # noqa: E402
+from src.data_analysis.plots import MEDIA_TYPES, PlotFormat  # noqa: E402
+from src.data_analysis.sentiment_batcher import shutdown_sentiment_batcher  # noqa: E402
+from src.data_analysis.sentiment_cache import get_sentiment_cache  # noqa: E402
+from src.jobs import AnalysisJobRequest, get_job_queue, shutdown_job_queue  # noqa: E402
+from src.llm.batching import SummaryMode  # noqa: E402
+from src.llm.summary_updates import SummaryTarget  # noqa: E402
+from src.pipeline.analysis import (  # noqa: E402
+    WARMUP_PARTS, SentimentPrefetch, WarmupPart, build_analysis_dag, build_response, warmup_analysis,
+)
+from src.pipeline.fan_out import (  # noqa: E402
+    Shard,
+    afetch_app_description as afetch_fan_out_description,
+    fetch_shards,
+    merge_shards,
+    summary_target as fan_out_summary_target,
+)
+from src.pipeline.instrumentation import observe_stage, render_metrics  # noqa: E402
+from src.pipeline.profiler import SamplingProfiler  # noqa: E402
+from src.pipeline.progress import progress_reporter  # noqa: E402
+from src.pipeline.stages import get_stages, shutdown_stages  # noqa: E402
+from src.storage.analysis_store import StoredAnalysis, get_analysis_store  # noqa: E402
+from src.storage.sync import fetch_reviews_incrementally  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,9 +47,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_stages()
+    # Heavy dependencies are loaded on first use, STARTUP_WARMUP lists the parts loaded before serving instead
+    warmup_parts = [part.strip() for part in os.getenv("STARTUP_WARMUP", "sentiment").split(",") if part.strip()]
+    if warmup_parts:
+        await warmup_analysis(WARMUP_PARTS if warmup_parts == ["all"] else warmup_parts)
+    yield
+    shutdown_job_queue()
+    await aclose_http_client()
+    shutdown_stages()
+    shutdown_sentiment_batcher()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/health")
@@ -30,11 +71,139 @@ async def healthcheck():
     return {"status": "healthy"}
 
 
+@app.post("/warmup")
+async def warmup(parts: list[WarmupPart] = Query(default=list(WARMUP_PARTS))):
+    """Load the sentiment model, pandas, matplotlib and the LLM stack ahead of the first request."""
+    return {"timings": await warmup_analysis(parts)}
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    # The LLM cache is built on LangChain, which is only imported once it's needed
+    from src.llm.cache import get_llm_cache
+
+    llm_cache = get_llm_cache()
+    return {
+        "sentiment": get_sentiment_cache().stats,
+        "llm": llm_cache.stats if llm_cache is not None else None,
+    }
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    """Stage durations, items processed, cache hits, pending calls and memory in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 class ReviewResponse(BaseModel):
+    analysis_id: str | None = None
     llm_summary: str | None = None
     metrics: dict | None = None
     plots: dict | None = None
     raw_data: dict| None = None
+    summary_update: dict | None = None
+    timings: dict | None = None
+    profile: dict | None = None
+
+
+def _get_stored_analysis(analysis_id: str) -> StoredAnalysis:
+    analysis = get_analysis_store().get(analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found or expired")
+    return analysis
+
+
+@app.get("/analyses/{analysis_id}/plot")
+async def get_analysis_plot(analysis_id: str) -> Response:
+    """Serve the plot image of an analysis created with response_mode=reference."""
+    analysis = _get_stored_analysis(analysis_id)
+    if analysis.plot is None:
+        raise HTTPException(status_code=404, detail="Analysis has no plot")
+    return Response(content=analysis.plot, media_type=MEDIA_TYPES[analysis.plot_format])
+
+
+@app.get("/analyses/{analysis_id}/reviews")
+async def get_analysis_reviews(analysis_id: str) -> StreamingResponse:
+    """Stream the reviews of an analysis created with response_mode=reference as NDJSON."""
+    analysis = _get_stored_analysis(analysis_id)
+    return StreamingResponse(
+        (review.to_review().model_dump_json() + "\n" for review in analysis.reviews),
+        media_type="application/x-ndjson",
+    )
+
+
+def _app_fetchers(reviews_source: str, app_name: str, app_id: int | str, country: str, num_reviews: int):
+    """Coroutine functions fetching the reviews and the app description of one app, for `build_analysis_dag`."""
+    stages = get_stages()
+    scraper = app_store_scraper if reviews_source == "app_store" else google_play_market_scraper
+
+    async def fetch_reviews():
+        prefetch = SentimentPrefetch()
+        reviews = await stages["scrape"].run(
+            fetch_reviews_incrementally, scraper, reviews_source, app_name, app_id, country, num_reviews,
+            on_page=prefetch,
+        )
+        await prefetch.wait()
+        if not reviews:
+            logger.warning(f"No reviews found for app '{app_name}' (ID: {app_id})")
+            raise HTTPException(status_code=404, detail="No reviews found")
+
+        logger.info(f"Successfully fetched {len(reviews)} reviews")
+        return reviews
+
+    async def fetch_description():
+        if reviews_source == "google_play_market":
+            return await stages["scrape"].run(scraper.afetch_app_description, app_id, country)
+        return None
+
+    return fetch_reviews, fetch_description
+
+
+@app.post("/jobs/", status_code=202)
+async def submit_job(request: AnalysisJobRequest) -> dict:
+    """
+    Queue an analysis to run in the background, for review counts that take too long for one request.
+    Poll /jobs/{job_id} for its progress and fetch /jobs/{job_id}/result once it succeeded.
+    """
+    job = get_job_queue().submit(request)
+    logger.info(f"Queued job {job.id} for app '{request.app_name}' ({request.num_reviews} reviews)")
+    return {
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+
+def _get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str) -> dict:
+    """Status of a job and the progress of its stages (reviews fetched, sentiments scored, LLM batches done)."""
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/result", response_model=ReviewResponse)
+async def get_job_result(job_id: str) -> ReviewResponse:
+    """Result of a finished job. Plots and raw reviews are served from the /analyses/ endpoints."""
+    job = _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error.status_code, detail=job.error.detail)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    results = {"summary": job.result.summary, "metrics": job.result.metrics, "summary_update": job.result.summary_update}
+    return ReviewResponse(**build_response(
+        results,
+        include_plots=job.request.include_plots,
+        include_raw_data=job.request.include_raw_data,
+        response_mode="reference",
+        analysis_id=job.analysis_id,
+    ))
 
 
 @app.get("/app-reviews/", response_model=ReviewResponse)
@@ -48,8 +217,24 @@ async def get_app_reviews(
     include_metrics: bool = True,
     include_plots: bool = True,
     include_raw_data: bool = True,
+    summary_mode: SummaryMode | None = None,
+    plot_format: PlotFormat = "png",
+    plot_dpi: int | None = Query(default=None, ge=50, le=300),
+    response_mode: Literal["inline", "reference"] = "inline",
+    rebuild_summary: bool = False,
+    include_timings: bool = False,
+    profile: bool = False,
 ) -> ReviewResponse:
-    """Fetch and analyze app reviews with specified return data types."""
+    """
+    Fetch and analyze app reviews with specified return data types.
+
+    With response_mode=reference, plots and raw reviews are not embedded in the response.
+    They are served from /analyses/{analysis_id}/plot and /analyses/{analysis_id}/reviews instead.
+    The stored summary of the app is refined with the reviews that are new since it was made, unless
+    a threshold calls for a full rebuild or rebuild_summary is set.
+    With include_timings, the response has the seconds spent in every stage. With profile, it has
+    the sampled stacks of the request in collapsed format, to render as a flame graph.
+    """
     logger.info(
         f"Fetching reviews for app '{app_name}' (ID: {app_id}) from {reviews_source}",
         extra={
@@ -61,46 +246,239 @@ async def get_app_reviews(
         }
     )
 
+    fetch_reviews, fetch_description = _app_fetchers(reviews_source, app_name, app_id, country, num_reviews)
+    dag = build_analysis_dag(
+        fetch_reviews,
+        fetch_description,
+        app_name,
+        include_llm_summary=include_llm_summary,
+        include_metrics=include_metrics,
+        include_plots=include_plots,
+        summary_mode=summary_mode,
+        plot_format=plot_format,
+        plot_dpi=plot_dpi,
+        plot_bytes=response_mode == "reference",
+        summary_target=SummaryTarget(reviews_source, app_id, country, num_reviews, rebuild=rebuild_summary),
+    )
+
     try:
-        scraper = app_store_scraper if reviews_source == "app_store" else google_play_market_scraper
-        reviews = scraper.fetch_app_reviews(app_name, app_id, country, num_reviews)
+        with SamplingProfiler() if profile else nullcontext() as profiler:
+            results = await dag.run()
 
-        if reviews_source == "google_play_market" and include_llm_summary:
-            app_description = scraper.fetch_app_description(app_id, country)
-        else:
-            app_description = None
-        if not reviews:
-            logger.warning(f"No reviews found for app '{app_name}' (ID: {app_id})")
-            raise HTTPException(status_code=404, detail="No reviews found")
+            serialization_start = time.perf_counter()
+            response = ReviewResponse(**build_response(
+                results, include_metrics, include_plots, include_raw_data, response_mode, plot_format
+            ))
 
-        logger.info(f"Successfully fetched {len(reviews)} reviews")
+            serialization_time = time.perf_counter() - serialization_start
+            observe_stage("serialization", serialization_time)
 
-        response = ReviewResponse()
-        reviews = analyze_reviews_sentiment(reviews)
-        logger.debug("Sentiment analysis completed")
+        if include_timings:
+            response.timings = {name: timing["duration"] for name, timing in dag.timings.items()}
+            response.timings["serialization"] = round(serialization_time, 4)
+        if profile:
+            response.profile = {**profiler.summary(), "collapsed": profiler.collapsed()}
 
-        if include_llm_summary:
-            response.llm_summary = generate_summary(reviews, app_name, app_description)
-            logger.debug("LLM overview generation completed") 
+        logger.info("Successfully processed all requested data")
+        return response
 
-        if include_metrics or include_plots:
-            metrics = calculate_metrics(reviews)
-            logger.debug("Metrics calculation completed")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing reviews: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if include_metrics:
-            response.metrics = metrics
 
-        if include_plots:
-            response.plots = generate_plots(metrics, app_name=app_name)
-            logger.debug("Plots generation completed")
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        if include_raw_data:
-            response.raw_data = {"reviews": [review.model_dump() for review in reviews]}
-            logger.debug("Raw data prepared")
 
+@app.get("/app-reviews/stream/")
+async def stream_app_reviews(
+    app_name: str,
+    app_id: int | str,
+    country: str = "us",
+    num_reviews: int = Query(default=100, ge=1, le=1000),
+    reviews_source: Literal["app_store", "google_play_market"] = "app_store",
+    include_llm_summary: bool = True,
+    include_metrics: bool = True,
+    include_plots: bool = True,
+    include_raw_data: bool = False,
+    summary_mode: SummaryMode | None = None,
+    plot_format: PlotFormat = "png",
+    plot_dpi: int | None = Query(default=None, ge=50, le=300),
+    rebuild_summary: bool = False,
+) -> StreamingResponse:
+    """
+    Fetch and analyze app reviews like /app-reviews/, streaming the results as Server-Sent Events.
+
+    Every stage sends an event as soon as it is done: "reviews" and "sentiment" with the number of reviews,
+    "metrics" and "plots" with their results. The summary is streamed as "summary_chunk" events while the
+    LLM writes it, followed by "summary" with the full text. "progress" events report pages fetched,
+    reviews labeled and LLM batches done. The stream ends with a "result" event holding the whole
+    response, or an "error" event.
+    """
+    logger.info(f"Streaming analysis of app '{app_name}' (ID: {app_id}) from {reviews_source}")
+    fetch_reviews, fetch_description = _app_fetchers(reviews_source, app_name, app_id, country, num_reviews)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[tuple[str, dict] | None] = asyncio.Queue()
+
+        # Progress is also reported from the stage worker threads
+        def emit(event: str, data: dict) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+        def on_stage_done(name, result):
+            if name in ("reviews", "sentiment"):
+                emit(name, {"count": len(result)})
+            elif name == "summary":
+                emit(name, {"text": result})
+            elif name == "plots" or (name == "metrics" and include_metrics):
+                emit(name, result)
+
+        def on_progress(stage, done, total):
+            emit("progress", {"stage": stage, "done": done, "total": total})
+
+        dag = build_analysis_dag(
+            fetch_reviews,
+            fetch_description,
+            app_name,
+            include_llm_summary=include_llm_summary,
+            include_metrics=include_metrics,
+            include_plots=include_plots,
+            summary_mode=summary_mode,
+            plot_format=plot_format,
+            plot_dpi=plot_dpi,
+            on_summary_chunk=lambda text: emit("summary_chunk", {"text": text}),
+            summary_target=SummaryTarget(reviews_source, app_id, country, num_reviews, rebuild=rebuild_summary),
+        )
+        with progress_reporter(on_progress):
+            task = asyncio.ensure_future(dag.run(on_stage_done=on_stage_done))
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, None))
+
+        try:
+            while (item := await queue.get()) is not None:
+                yield _sse(*item)
+            results = task.result()
+        except HTTPException as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+            return
+        except Exception as e:
+            logger.error(f"Error processing reviews: {str(e)}", exc_info=True)
+            yield _sse("error", {"status_code": 500, "detail": str(e)})
+            return
+        finally:
+            # The client went away, stop the analysis
+            if not task.done():
+                task.cancel()
+
+        response = ReviewResponse(**build_response(results, include_metrics, include_raw_data=include_raw_data))
         logger.info("Successfully processed all requested data")
-        return response
+        yield "event: result\ndata: " + response.model_dump_json() + "\n\n"
 
-    except Exception as e:
-        logger.error(f"Error processing reviews: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/app-reviews/fan-out/")
+async def get_app_reviews_fan_out(
+    app_name: str,
+    app_store_id: int | None = None,
+    google_play_id: str | None = None,
+    countries: list[str] = Query(default=["us"], min_length=1, max_length=20),
+    num_reviews: int = Query(default=100, ge=1, le=1000),
+    include_llm_summary: bool = True,
+    include_metrics: bool = True,
+    include_plots: bool = True,
+    include_raw_data: bool = False,
+    summary_mode: SummaryMode | None = None,
+    plot_format: PlotFormat = "png",
+    plot_dpi: int | None = Query(default=None, ge=50, le=300),
+    rebuild_summary: bool = False,
+) -> StreamingResponse:
+    """
+    Fetch reviews of an app from several countries and both stores, and analyze them together.
+
+    Every store and country is fetched concurrently (`num_reviews` each). The reviews are deduplicated and
+    go through one combined sentiment, metrics and summary pass. The response is an NDJSON stream with a
+    "shard" event per fetched store and country, a "merged" event, and a final "result" or "error" event.
+    """
+    shards = [
+        Shard(source, app_id, country.lower())
+        for source, app_id in (("app_store", app_store_id), ("google_play_market", google_play_id))
+        if app_id is not None
+        for country in dict.fromkeys(countries)
+    ]
+    if not shards:
+        raise HTTPException(status_code=422, detail="Provide app_store_id, google_play_id or both")
+
+    logger.info(f"Fetching reviews for app '{app_name}' from {len(shards)} stores and countries")
+    stages = get_stages()
+
+    async def events():
+        batches = []
+        async for result in fetch_shards(shards, app_name, num_reviews):
+            batches.append(result.reviews)
+            event = {
+                "event": "shard",
+                "source": result.shard.source,
+                "country": result.shard.country,
+                "reviews": len(result.reviews),
+                "completed": len(batches),
+                "total": len(shards),
+            }
+            if result.error is not None:
+                event["error"] = str(result.error)
+            yield json.dumps(event) + "\n"
+
+        reviews = merge_shards(batches)
+        yield json.dumps({
+            "event": "merged",
+            "reviews": len(reviews),
+            "duplicates": sum(map(len, batches)) - len(reviews),
+        }) + "\n"
+
+        async def fetch_reviews():
+            if not reviews:
+                raise HTTPException(status_code=404, detail="No reviews found")
+            return reviews
+
+        async def fetch_description():
+            if google_play_id is not None:
+                # The app may not be listed in every country, so the next one is tried
+                google_play_countries = [shard.country for shard in shards if shard.source == "google_play_market"]
+                return await stages["scrape"].run(afetch_fan_out_description, google_play_id, google_play_countries)
+            return None
+
+        dag = build_analysis_dag(
+            fetch_reviews,
+            fetch_description,
+            app_name,
+            include_llm_summary=include_llm_summary,
+            include_metrics=include_metrics,
+            include_plots=include_plots,
+            summary_mode=summary_mode,
+            plot_format=plot_format,
+            plot_dpi=plot_dpi,
+            summary_target=fan_out_summary_target(shards, num_reviews, rebuild=rebuild_summary),
+        )
+
+        try:
+            results = await dag.run()
+        except HTTPException as e:
+            yield json.dumps({"event": "error", "status_code": e.status_code, "detail": e.detail}) + "\n"
+            return
+        except Exception as e:
+            logger.error(f"Error processing reviews: {str(e)}", exc_info=True)
+            yield json.dumps({"event": "error", "status_code": 500, "detail": str(e)}) + "\n"
+            return
+
+        response = ReviewResponse(**build_response(results, include_metrics, include_raw_data=include_raw_data))
+        logger.info("Successfully processed all requested data")
+        yield '{"event": "result", "data": ' + response.model_dump_json() + "}\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
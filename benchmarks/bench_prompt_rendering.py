@@ -0,0 +1,86 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import generate_reviews  # noqa: E402
+from src.llm.batching import serialize_review  # noqa: E402
+from src.llm.jinja_config import ENV  # noqa: E402
+from src.llm.prompts import get_overview_prompt  # noqa: E402
+
+# A review quoting template syntax, which the recursive renderer used to render as a template
+TEMPLATE_LIKE_REVIEW = "1/5 | Negative | The widget greets me with {{ name }} instead of my name"
+
+
+def legacy_render(template: str, max_depth: int = 5, **kwargs) -> str:
+    """The renderer before precompilation: compile on every call, re-render while the output looks like a template."""
+    result = template
+    for _ in range(max_depth):
+        result = ENV.from_string(result).render(**kwargs)
+        if "{{" not in result and "{%" not in result:
+            break
+    return result
+
+
+def prompt_inputs(batch_size: int, seed: int) -> dict:
+    reviews = [serialize_review(review) for review in generate_reviews(batch_size, seed=seed)]
+    return {"reviews": reviews, "summary": "**Overview**:\nUsers like the app.", "app_name": "Benchmark", "app_description": ""}
+
+
+def time_renders(render, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark of rendering the summary prompt of one LLM batch")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[50, 500], help="reviews per batch")
+    parser.add_argument("--repeats", type=int, default=200, help="renders per batch size and renderer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    prompt = get_overview_prompt()
+    templates = [message.prompt.template for message in prompt.messages]
+
+    for batch_size in args.batch_sizes:
+        inputs = prompt_inputs(batch_size, args.seed)
+        template_like = {**inputs, "reviews": inputs["reviews"][:-1] + [TEMPLATE_LIKE_REVIEW]}
+        renderers = {
+            "precompiled": lambda: prompt.format_messages(**inputs),
+            "legacy": lambda: [legacy_render(template, **inputs) for template in templates],
+            "legacy, review with {{": lambda: [legacy_render(template, **template_like) for template in templates],
+        }
+
+        print(f"{batch_size} reviews per batch")
+        for name, render in renderers.items():
+            try:
+                render()
+            except Exception as e:
+                print(f"  {name:<24} fails: {type(e).__name__}: {e}")
+                continue
+            timings = time_renders(render, args.repeats)
+            p50 = float(np.percentile(timings, 50))
+            print(
+                f"  {name:<24} p50 {p50 * 1000:8.3f} ms  p95 {float(np.percentile(timings, 95)) * 1000:8.3f} ms"
+                f"  {1 / p50:10,.0f} renders/s  {batch_size / p50:12,.0f} reviews/s"
+            )
+
+        rendered = "".join(message.content for message in prompt.format_messages(**template_like))
+        legacy_rendered = "".join(legacy_render(template, **template_like) for template in templates)
+        print(
+            f"  review with {{{{ kept verbatim: precompiled {TEMPLATE_LIKE_REVIEW in rendered},"
+            f" legacy {TEMPLATE_LIKE_REVIEW in legacy_rendered}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import time
+import random
+import asyncio
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+SUMMARY = """<overview>
+Users like the app for its clean interface and the offline mode, but the last update brought crashes and
+login failures for a noticeable share of them. Subscription billing is the most common complaint.
+</overview>
+<major_themes>
+1. Stability after the latest update
+2. Subscription and billing issues
+3. Praise for the interface and support
+</major_themes>
+<recommendations>
+- Fix the crash on startup reported since the last update
+- Review the subscription charging flow
+</recommendations>"""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Anthropic chat model that answers every prompt with the same summary.
+
+    Every call waits `latency` seconds, give or take `jitter` as a fraction of it, so that the summary
+    stage can be timed without the network. Calls and prompt sizes are counted.
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.2
+    seed: int = 0
+    calls: int = 0
+    prompt_chars: int = 0
+
+    def _delay(self, messages: list[BaseMessage]) -> float:
+        self.calls += 1
+        self.prompt_chars += sum(len(message.content) for message in messages)
+        rng = random.Random(self.seed + self.calls)
+        return max(self.latency * (1 + rng.uniform(-self.jitter, self.jitter)), 0.0)
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=SUMMARY))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=SUMMARY))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
@@ -0,0 +1,144 @@
+import json
+import random
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.models import Review, ReviewBatch
+
+COUNTRIES = ["us", "gb", "de", "fr", "in", "br", "ca", "au", "jp", "es", "it", "mx"]
+COUNTRY_WEIGHTS = [30, 10, 9, 7, 9, 6, 5, 4, 5, 5, 5, 5]
+RATING_WEIGHTS = [14, 6, 8, 17, 55]
+
+OPENERS = {
+    "negative": ["Terrible experience.", "Really disappointed.", "Used to love it, not anymore.", "Waste of time.", "Frustrating."],
+    "neutral": ["It's okay.", "Decent app overall.", "Mixed feelings about this one.", "Does the job.", "Not bad."],
+    "positive": ["Love this app!", "Great app.", "Best app of its kind.", "Works really well.", "Really impressed."],
+}
+FEATURES = [
+    "search", "login", "sync", "dark mode", "notifications", "checkout", "map", "offline mode", "widget", "chat",
+    "calendar", "export", "backup", "camera upload", "playlist", "recommendations", "profile page", "settings",
+]
+DEVICES = ["my Pixel 7", "an iPhone 13", "my iPad", "a Galaxy S22", "my old Moto G", "an iPhone 15 Pro", "my tablet"]
+DETAILS = {
+    "negative": [
+        "the {feature} crashes every time I open it on {device}",
+        "the {feature} stopped working after version {version}",
+        "I was charged twice for the subscription and support never answered in {days} days",
+        "the app drains my battery in {hours} hours",
+        "there are way too many ads around the {feature}",
+        "the {feature} lost all my data",
+        "it takes {seconds} seconds just to load the {feature}",
+    ],
+    "neutral": [
+        "the {feature} is hidden behind the subscription",
+        "the new {feature} takes time to get used to",
+        "it is a bit slow on {device}",
+        "the {feature} could be more configurable",
+        "version {version} fixed some bugs but the {feature} is still clunky",
+    ],
+    "positive": [
+        "the {feature} is fast and smooth since version {version}",
+        "customer support fixed my {feature} issue in {hours} hours",
+        "the {feature} is a lifesaver when travelling",
+        "the {feature} works perfectly on {device}",
+        "I have used it every day for {days} days",
+    ],
+}
+CLOSERS = ["", "", "Please fix this.", "Would recommend.", "Five stars from me.", "Hope the developers read this."]
+SHORT_REVIEWS = ["Great app", "great app!", "Good", "Love it", "Bad", "Nice", "Awesome!!", "Doesn't work"]
+
+
+def _detail(rng: random.Random, template: str) -> str:
+    return template.format(
+        feature=rng.choice(FEATURES),
+        device=rng.choice(DEVICES),
+        version=f"{rng.randint(3, 9)}.{rng.randint(0, 30)}",
+        days=rng.randint(2, 400),
+        hours=rng.randint(2, 48),
+        seconds=rng.randint(5, 90),
+    )
+
+
+def _tone(rating: int) -> str:
+    return "negative" if rating <= 2 else "neutral" if rating == 3 else "positive"
+
+
+def generate_reviews(num_reviews: int, seed: int = 0, source: str = "app_store") -> ReviewBatch:
+    """
+    Generate a deterministic batch of synthetic reviews.
+
+    Ratings, countries and text lengths follow the rough shape of real store reviews: mostly five stars,
+    a long tail of countries, many short near-identical reviews and longer ones that mention up to three
+    features, devices or versions.
+    Reviews are ordered newest first, like the stores return them.
+
+    Args:
+        num_reviews: Number of reviews to generate
+        seed: Random seed, the same seed gives the same reviews (default: 0)
+        source: Reviews source of the batch (default: "app_store")
+
+    Returns:
+        ReviewBatch: Reviews without sentiment labels
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    reviews = ReviewBatch()
+
+    for i in range(num_reviews):
+        rating = rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0]
+        tone = _tone(rating)
+        if rng.random() < 0.3:
+            text = rng.choice(SHORT_REVIEWS)
+        else:
+            details = [_detail(rng, template) for template in rng.sample(DETAILS[tone], k=rng.randint(1, 3))]
+            text = " ".join([rng.choice(OPENERS[tone]), ", and ".join(details) + ".", rng.choice(CLOSERS)]).strip()
+
+        reviews.append(
+            review_id=f"{source}-{seed}-{i}",
+            source=source,
+            user_name=f"user{rng.randrange(num_reviews * 10)}",
+            country=rng.choices(COUNTRIES, weights=COUNTRY_WEIGHTS)[0],
+            rating=rating,
+            review_text=text,
+            date=now - timedelta(minutes=i * 7 + rng.randrange(7)),
+        )
+
+    return reviews
+
+
+def load_reviews(file_path: Path | str) -> ReviewBatch:
+    """Load recorded reviews from NDJSON, as served by /analyses/{id}/reviews. Sentiment labels are dropped."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        reviews = [Review.model_validate_json(line) for line in file if line.strip()]
+    batch = ReviewBatch.from_reviews(reviews)
+    batch.sentiment = [None] * len(batch)
+    return batch
+
+
+def save_reviews(reviews: ReviewBatch, file_path: Path | str) -> None:
+    """Save reviews as NDJSON, readable by `load_reviews`."""
+    with open(file_path, "w", encoding="utf-8") as file:
+        for review in reviews.dump():
+            file.write(json.dumps(review, default=str) + "\n")
+
+
+class FixtureScraper:
+    """
+    Stand-in for a scraper module that serves a fixture page by page.
+
+    Pass it to `fetch_reviews_incrementally` in place of `src.scrapers.app_store` to exercise the
+    paging, progress reporting and review store code without the network.
+    """
+
+    def __init__(self, reviews: ReviewBatch, page_size: int = 200, page_latency: float = 0.0):
+        self.reviews = reviews
+        self.page_size = page_size
+        self.page_latency = page_latency
+
+    async def iter_review_pages(self, app_name: str, app_id: int | str, country: str, num_reviews: int) -> AsyncIterator[ReviewBatch]:
+        for start in range(0, min(num_reviews, len(self.reviews)), self.page_size):
+            if self.page_latency:
+                await asyncio.sleep(self.page_latency)
+            yield self.reviews[start:min(start + self.page_size, num_reviews)]
@@ -0,0 +1,119 @@
+"""
+Compare the list-of-models review path with ReviewBatch.
+
+The hot path builds reviews from raw scraper rows, attaches sentiment labels and computes metrics.
+The edge step validates and dumps the reviews for the API response. Run from the repository root:
+
+    python -m benchmarks.review_batch --num-reviews 100000
+"""
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.models import Review, ReviewBatch, Sentiment
+from src.data_analysis.metrics import calculate_metrics
+
+
+def make_rows(num_reviews: int, seed: int = 0) -> list[dict]:
+    """Generate raw rows shaped like google_play_scraper results."""
+    rng = random.Random(seed)
+    words = "great app love crash slow update login ads works broken fast useful".split()
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "reviewId": f"review-{i}",
+            "userName": f"user-{i}",
+            "score": rng.randint(1, 5),
+            "content": " ".join(rng.choices(words, k=rng.randint(3, 60))),
+            "at": start + timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        }
+        for i in range(num_reviews)
+    ]
+
+
+def models_hot_path(rows: list[dict], labels: list[str]) -> list[Review]:
+    reviews = [
+        Review(
+            review_id=row["reviewId"],
+            source="google_play_market",
+            user_name=row["userName"],
+            country="us",
+            rating=row["score"],
+            review_text=row["content"],
+            date=row["at"],
+        )
+        for row in rows
+    ]
+    for review, label in zip(reviews, labels):
+        review.sentiment = Sentiment(label)
+    calculate_metrics(reviews)
+    return reviews
+
+
+def models_edge(reviews: list[Review]) -> list[dict]:
+    return [review.model_dump() for review in reviews]
+
+
+def batch_hot_path(rows: list[dict], labels: list[str]) -> ReviewBatch:
+    reviews = ReviewBatch()
+    for row in rows:
+        reviews.append(
+            review_id=row["reviewId"],
+            source="google_play_market",
+            user_name=row["userName"],
+            country="us",
+            rating=row["score"],
+            review_text=row["content"],
+            date=row["at"],
+        )
+    reviews.set_sentiments(labels)
+    calculate_metrics(reviews)
+    return reviews
+
+
+def batch_edge(reviews: ReviewBatch) -> list[dict]:
+    return reviews.dump()
+
+
+def measure(func, *args) -> tuple[dict, object]:
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Time separately, tracemalloc slows allocations down
+    started_at = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started_at
+
+    stats = {
+        "seconds": round(elapsed, 3),
+        "reviews_per_second": round(len(args[0]) / elapsed),
+        "peak_memory_mb": round(peak / 2**20, 1),
+    }
+    return stats, result
+
+
+def main(num_reviews: int) -> None:
+    rows = make_rows(num_reviews)
+    rng = random.Random(1)
+    labels = [rng.choice(list(Sentiment)).value for _ in rows]
+
+    for name, hot_path, edge in (
+        ("list[Review]", models_hot_path, models_edge),
+        ("ReviewBatch", batch_hot_path, batch_edge),
+    ):
+        hot_stats, reviews = measure(hot_path, rows, labels)
+        edge_stats, _ = measure(edge, reviews)
+        print(f"{name:>12} hot path: {hot_stats}")
+        print(f"{name:>12} edge:     {edge_stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-reviews", type=int, default=100_000)
+    args = parser.parse_args()
+
+    main(args.num_reviews)
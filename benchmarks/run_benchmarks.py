@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Benchmarks run offline and measure cold stages: no review store, no persistent caches
+os.environ.setdefault("REVIEW_STORE_PATH", "")
+os.environ.setdefault("SENTIMENT_CACHE_PATH", "")
+os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app import ReviewResponse  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+from benchmarks.fixtures import FixtureScraper, generate_reviews, load_reviews  # noqa: E402
+from src.data_analysis.hf_pipelines import sentiment_backend, sentiment_model_name  # noqa: E402
+from src.data_analysis.metrics import calculate_metrics  # noqa: E402
+from src.data_analysis.plots import generate_plots  # noqa: E402
+from src.data_analysis.review_reduction import reduce_reviews  # noqa: E402
+from src.data_analysis.sentiment_analysis import analyze_reviews_sentiment  # noqa: E402
+from src.data_analysis.sentiment_cache import get_sentiment_cache  # noqa: E402
+from src.llm.llm_pipeline import generate_summary  # noqa: E402
+from src.models import ReviewBatch  # noqa: E402
+from src.storage.sync import fetch_reviews_incrementally  # noqa: E402
+
+# Stages log every call at INFO, which would drown the results
+logging.getLogger().setLevel(logging.WARNING)
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+STAGES = ("scrape", "sentiment", "metrics", "plots", "reduction", "summary", "serialization")
+
+
+def serialize_response(reviews: ReviewBatch, summary: str | None, metrics: dict, plots: dict) -> bytes:
+    """Serialize a full /app-reviews/ response the way FastAPI does."""
+    response = ReviewResponse(llm_summary=summary, metrics=metrics, plots=plots, raw_data={"reviews": reviews.dump()})
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def run_pipeline(
+    reviews: ReviewBatch,
+    llm: FakeChatModel | None,
+    args: argparse.Namespace,
+    run: int,
+    trace_memory: bool = False,
+) -> tuple[dict[str, float], dict[str, float]]:
+    """
+    Run every stage of one analysis in order.
+
+    Returns:
+        tuple: Seconds per stage and, with `trace_memory`, peak Python allocations per stage in MB
+    """
+    timings, peaks = {}, {}
+
+    def timed(stage, func, *func_args, **kwargs):
+        if trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*func_args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        if trace_memory:
+            peaks[stage] = tracemalloc.get_traced_memory()[1] / 2**20
+        return result
+
+    # Every run labels the reviews from scratch
+    get_sentiment_cache.cache_clear()
+
+    scraper = FixtureScraper(reviews, page_latency=args.page_latency)
+    fetched = timed(
+        "scrape", asyncio.run,
+        fetch_reviews_incrementally(scraper, "app_store", "Benchmark", "benchmark", "us", len(reviews)),
+    )
+    labeled = timed("sentiment", analyze_reviews_sentiment, fetched)
+    metrics = timed("metrics", calculate_metrics, labeled)
+    # A new app name per run keeps rendered plots from being served from the plot cache
+    plots = timed("plots", generate_plots, metrics, app_name=f"Benchmark {run}", dpi=args.plot_dpi)
+
+    summary = None
+    if llm is not None:
+        reduced, weights = timed("reduction", reduce_reviews, labeled)
+        summary = timed(
+            "summary", generate_summary, reduced, "Benchmark", "", mode=args.summary_mode, llm=llm, weights=weights
+        )
+
+    timed("serialization", serialize_response, labeled, summary, metrics, plots)
+    return timings, peaks
+
+
+def describe(values: list[float], num_reviews: int) -> dict:
+    return {
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "mean": round(float(np.mean(values)), 4),
+        "min": round(float(np.min(values)), 4),
+        "reviews_per_second": round(num_reviews / max(float(np.percentile(values, 50)), 1e-9), 1),
+    }
+
+
+def benchmark_size(reviews: ReviewBatch, args: argparse.Namespace) -> dict:
+    """Time all stages on one fixture size and measure their peak memory."""
+    llm = None if args.no_llm else FakeChatModel(latency=args.llm_latency, seed=args.seed)
+    num_reviews = len(reviews)
+
+    for run in range(args.warmup):
+        run_pipeline(reviews, llm, args, run=-run - 1)
+
+    runs = []
+    calls_before = llm.calls if llm is not None else 0
+    for run in range(args.repeats):
+        timings, _ = run_pipeline(reviews, llm, args, run=run)
+        timings["total"] = sum(timings.values())
+        runs.append(timings)
+        print(f"  run {run + 1}/{args.repeats}: {timings['total']:.3f}s", flush=True)
+    llm_calls = (llm.calls - calls_before) // args.repeats if llm is not None else 0
+
+    # One more run under tracemalloc for memory, its timings are skewed by the tracing and not reported
+    tracemalloc.start()
+    _, peaks = run_pipeline(reviews, llm, args, run=args.repeats, trace_memory=True)
+    tracemalloc.stop()
+
+    stages = {}
+    for stage in (*STAGES, "total"):
+        if stage in runs[0]:
+            stages[stage] = describe([timings[stage] for timings in runs], num_reviews)
+            if stage in peaks:
+                stages[stage]["peak_python_mb"] = round(peaks[stage], 1)
+
+    return {
+        "num_reviews": num_reviews,
+        "stages": stages,
+        "llm_calls_per_run": llm_calls,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta: float) -> list[str]:
+    """
+    Compare the p50 and p95 of every stage with a baseline run.
+
+    A stage regresses when it is more than `tolerance` (relative) and `min_delta` seconds (absolute) slower,
+    so that noise on stages that take a few milliseconds doesn't count.
+
+    Returns:
+        list[str]: Description of every regression
+    """
+    regressions = []
+    for size, result in current["results"].items():
+        base = baseline["results"].get(size)
+        if base is None:
+            continue
+        print(f"\n{size} reviews vs baseline ({baseline['created_at']}):")
+        for stage, stats in result["stages"].items():
+            if stage not in base["stages"]:
+                continue
+            for metric in ("p50", "p95"):
+                old, new = base["stages"][stage][metric], stats[metric]
+                change = (new - old) / old if old else 0.0
+                regressed = new - old > min_delta and change > tolerance
+                if metric == "p50" or regressed:
+                    flag = "  REGRESSION" if regressed else ""
+                    print(f"  {stage:<14} {metric} {old:9.4f}s -> {new:9.4f}s ({change:+.1%}){flag}")
+                if regressed:
+                    regressions.append(f"{size} reviews, {stage} {metric}: {old:.4f}s -> {new:.4f}s ({change:+.1%})")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the analysis pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000], help="numbers of reviews to benchmark")
+    parser.add_argument("--fixture", help="NDJSON of recorded reviews (/analyses/{id}/reviews) instead of synthetic ones")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per size")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per size, e.g. to load the model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-latency", type=float, default=0.0, help="seconds per fixture page of the scrape stand-in")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per call of the fake chat model")
+    parser.add_argument("--no-llm", action="store_true", help="skip the reduction and summary stages")
+    parser.add_argument("--summary-mode", choices=["refine", "map_reduce"], default=None)
+    parser.add_argument("--plot-dpi", type=int, default=100)
+    parser.add_argument("--output", default=str(BENCHMARKS_DIR / "results" / "latest.json"))
+    parser.add_argument("--baseline", default=str(BENCHMARKS_DIR / "results" / "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown counted as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="absolute slowdown in seconds below which changes are noise")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    recorded = load_reviews(args.fixture) if args.fixture else None
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "platform": f"{platform.platform()} / Python {platform.python_version()} / {os.cpu_count()} CPUs",
+        "config": {
+            "fixture": args.fixture or f"synthetic (seed {args.seed})",
+            "repeats": args.repeats,
+            "llm_latency": None if args.no_llm else args.llm_latency,
+            "summary_mode": args.summary_mode or os.getenv("LLM_SUMMARY_MODE", "refine"),
+            "sentiment_model": f"{sentiment_model_name()}@{sentiment_backend()}",
+            "plot_dpi": args.plot_dpi,
+        },
+        "results": {},
+    }
+
+    for size in args.sizes:
+        if recorded is not None and size > len(recorded):
+            print(f"Skipping {size} reviews, the fixture has only {len(recorded)}")
+            continue
+        reviews = recorded[:size] if recorded is not None else generate_reviews(size, seed=args.seed)
+        print(f"Benchmarking {size} reviews", flush=True)
+        report["results"][str(size)] = result = benchmark_size(reviews, args)
+        for stage, stats in result["stages"].items():
+            print(f"  {stage:<14} p50 {stats['p50']:9.4f}s  p95 {stats['p95']:9.4f}s  {stats['reviews_per_second']:>12,.0f} reviews/s")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --save-baseline to create one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    if baseline["config"] != report["config"]:
+        print(f"Warning: baseline config differs: {baseline['config']}")
+    regressions = compare(report, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(f"  {regression}" for regression in regressions))
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import os
+import logging
+import secrets
+import tempfile
+import multiprocessing
+
+import uvicorn
+from dotenv import load_dotenv
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(levelname)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+
+def main() -> None:
+    """
+    Serve the API with SERVE_WORKERS uvicorn worker processes (default: 1) on SERVE_HOST:SERVE_PORT.
+
+    With more than one worker, the sentiment model is loaded once in a dedicated inference process
+    before the workers start, and the workers label reviews through it over a local socket instead of
+    each loading their own copy of the model. Background jobs and stored analyses are kept in SQLite
+    files shared by the workers, so that any worker answers the polls of a job another one runs.
+    """
+    workers = int(os.getenv("SERVE_WORKERS", 1))
+    host = os.getenv("SERVE_HOST", "0.0.0.0")
+    port = int(os.getenv("SERVE_PORT", 8000))
+
+    shared_files = []
+    if workers > 1:
+        for variable, name in (("JOB_STORE_PATH", "jobs"), ("ANALYSIS_STORE_PATH", "analyses")):
+            if not os.getenv(variable):
+                os.environ[variable] = os.path.join(tempfile.gettempdir(), f"app-reviews-{os.getpid()}-{name}.db")
+                shared_files.append(os.environ[variable])
+
+    inference_process = None
+    if workers > 1 and not os.getenv("SENTIMENT_SERVER_ADDRESS"):
+        from src.data_analysis.sentiment_server import run_sentiment_server
+
+        address = os.path.join(tempfile.gettempdir(), f"sentiment-{os.getpid()}.sock")
+        # Workers inherit the environment, so this is how they find the inference process
+        os.environ["SENTIMENT_SERVER_ADDRESS"] = address
+        os.environ["SENTIMENT_SERVER_AUTHKEY"] = secrets.token_hex(16)
+
+        context = multiprocessing.get_context("spawn")
+        ready = context.Event()
+        inference_process = context.Process(
+            target=run_sentiment_server, args=(address, ready), name="sentiment-inference", daemon=True
+        )
+        inference_process.start()
+        while not ready.wait(timeout=1):
+            if not inference_process.is_alive():
+                raise RuntimeError("Sentiment inference process exited before it was ready")
+
+    try:
+        uvicorn.run("app:app", host=host, port=port, workers=workers)
+    finally:
+        if inference_process is not None:
+            inference_process.terminate()
+            inference_process.join()
+            if os.path.exists(address):
+                os.remove(address)
+        for path in shared_files:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
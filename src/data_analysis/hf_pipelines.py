@@ -1,22 +1,107 @@
-import torch
-from transformers import pipeline
+import os
+import logging
 from functools import lru_cache
 
+# torch and transformers are imported where the model is loaded, so that processes labeling reviews
+# through the shared inference process (SENTIMENT_SERVER_ADDRESS) don't load them at all
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_BACKENDS = ("torch", "torch_int8", "onnx")
+MAX_LENGTH = 512
+
+
+# The model and backend are read on use rather than on import, so values loaded from .env after the
+# imports still apply
+def sentiment_model_name() -> str:
+    """Name or path of the sentiment model, set with SENTIMENT_MODEL."""
+    return os.getenv("SENTIMENT_MODEL", "tabularisai/multilingual-sentiment-analysis")
+
+
+def sentiment_backend() -> str:
+    """Default sentiment inference backend, set with SENTIMENT_BACKEND."""
+    return os.getenv("SENTIMENT_BACKEND", "torch")
+
+
+def _set_num_threads() -> None:
+    import torch
+
+    torch.set_num_threads(int(os.getenv("SENTIMENT_NUM_THREADS", os.cpu_count() or 1)))
+
 
 @lru_cache(maxsize=1)
 def get_sentiment_pipeline():
     """
     Creates and returns a cached sentiment analysis pipeline.
     The pipeline is cached to avoid recreating it on every call.
+    The number of torch intra-op threads is set with SENTIMENT_NUM_THREADS (default: all cores).
 
     Returns:
         Pipeline: A HuggingFace pipeline for multilingual sentiment analysis
     """
+    import torch
+    from transformers import pipeline
+
+    _set_num_threads()
+
     sentiment_pipeline = pipeline(
         task="text-classification",
-        model="tabularisai/multilingual-sentiment-analysis", 
-        max_length=512,
+        model=sentiment_model_name(),
+        max_length=MAX_LENGTH,
         truncation=True,
         device="cuda" if torch.cuda.is_available() else "cpu"
     )
+    sentiment_pipeline.model.eval()
     return sentiment_pipeline
+
+
+@lru_cache(maxsize=None)
+def get_sentiment_model(backend: str):
+    """
+    Creates and returns a cached tokenizer and sentiment model for the given inference backend.
+
+    Backends:
+        torch: the full-precision transformers model, shared with `get_sentiment_pipeline`
+        torch_int8: the transformers model with dynamic int8 quantization of its linear layers (CPU only)
+        onnx: the model exported to ONNX and run with ONNX Runtime, requires the `onnx` extra
+
+    Args:
+        backend: Inference backend, `sentiment_backend()` for the configured one
+
+    Returns:
+        tuple: The tokenizer and a model whose outputs have `logits`
+    """
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {SENTIMENT_BACKENDS}")
+
+    if backend == "torch":
+        sentiment_pipeline = get_sentiment_pipeline()
+        return sentiment_pipeline.tokenizer, sentiment_pipeline.model
+
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    _set_num_threads()
+    model_name = sentiment_model_name()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "torch_int8":
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("The onnx sentiment backend requires the `onnx` extra: uv sync --extra onnx") from e
+
+        export_dir = os.getenv("SENTIMENT_ONNX_DIR", "data/onnx")
+        model_dir = os.path.join(export_dir, model_name.replace("/", "--"))
+        if os.path.isdir(model_dir):
+            model = ORTModelForSequenceClassification.from_pretrained(model_dir)
+        else:
+            logger.info(f"Exporting {model_name} to ONNX at {model_dir}")
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(model_dir)
+
+    logger.info(f"Loaded {model_name} with the {backend} sentiment backend")
+    return tokenizer, model
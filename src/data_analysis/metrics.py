@@ -1,62 +1,131 @@
+import numpy as np
+import pandas as pd
 from fastapi import HTTPException
 
-from src.models import Review, Sentiment
+from src.models import Review, ReviewBatch, Sentiment
 
+# Sentiment labels as an ordinal 1-5 scale, comparable with star ratings
+SENTIMENT_SCORES = {sentiment: score for score, sentiment in enumerate(Sentiment, start=1)}
+
+
+def reviews_to_frame(reviews: ReviewBatch | list[Review]) -> pd.DataFrame:
+    """Convert reviews to a columnar DataFrame with one row per review."""
+    if isinstance(reviews, ReviewBatch):
+        return pd.DataFrame({
+            "rating": np.frombuffer(reviews.rating, dtype=np.int8),
+            "sentiment": pd.Categorical(reviews.sentiment, categories=list(Sentiment)),
+            "country": pd.Categorical(reviews.country),
+            "date": pd.to_datetime(reviews.date, utc=True),
+            "review_length": np.fromiter(map(len, reviews.review_text), dtype=np.int64, count=len(reviews)),
+        })
 
-def calculate_metrics(reviews: list[Review]) -> dict:
-    """Calculate metrics for a list of reviews."""
-    if not reviews:
-        raise HTTPException(status_code=404, detail="No reviews available")
-        
     n_reviews = len(reviews)
+    return pd.DataFrame({
+        "rating": np.fromiter((r.rating for r in reviews), dtype=np.int8, count=n_reviews),
+        "sentiment": pd.Categorical([r.sentiment for r in reviews], categories=list(Sentiment)),
+        "country": pd.Categorical([r.country for r in reviews]),
+        "date": pd.to_datetime([r.date for r in reviews], utc=True),
+        "review_length": np.fromiter((len(r.review_text) for r in reviews), dtype=np.int64, count=n_reviews),
+    })
+
+
+def _distribution(counts: pd.Series, keys, n_reviews: int) -> dict:
+    return {
+        key: {
+            "count": int(counts.get(key, 0)),
+            "percentage": round(float(counts.get(key, 0)) / n_reviews * 100, 2),
+        }
+        for key in keys
+    }
+
+
+def _daily_totals(df: pd.DataFrame) -> pd.DataFrame:
+    # Only days with reviews: a few old reviews must not fill the series with years of empty days
+    return df.groupby(df["date"].dt.floor("D")).agg(
+        count=("rating", "size"),
+        rating_sum=("rating", "sum"),
+        sentiment_sum=("sentiment_score", "sum"),
+        sentiment_count=("sentiment_score", "count"),
+    )
+
+
+def _weekly_totals(daily: pd.DataFrame) -> pd.DataFrame:
+    # Weeks start on Monday
+    return daily.groupby(daily.index - pd.to_timedelta(daily.index.dayofweek, unit="D")).sum()
+
+
+def _time_series(totals: pd.DataFrame, window: str) -> list[dict]:
+    # Rolling averages are computed from rolling sums, so they are weighted by the number of reviews per period.
+    # The window is a time span, so periods without reviews count towards it even though they are not listed.
+    rolling = totals.rolling(window).sum()
+    series = pd.DataFrame({
+        "count": totals["count"],
+        "average_rating": totals["rating_sum"] / totals["count"].where(totals["count"] > 0),
+        "average_sentiment": totals["sentiment_sum"] / totals["sentiment_count"].where(totals["sentiment_count"] > 0),
+        "rolling_average_rating": rolling["rating_sum"] / rolling["count"].where(rolling["count"] > 0),
+        "rolling_average_sentiment": (
+            rolling["sentiment_sum"] / rolling["sentiment_count"].where(rolling["sentiment_count"] > 0)
+        ),
+    }).round(2)
+
+    series = series.astype(object).where(series.notna(), None)
+    return [
+        {"date": period.strftime("%Y-%m-%d"), **row, "count": int(row["count"])}
+        for period, row in zip(series.index, series.to_dict("records"))
+    ]
+
+
+def calculate_metrics(reviews: ReviewBatch | list[Review] | pd.DataFrame) -> dict:
+    """Calculate metrics for reviews or a DataFrame built by `reviews_to_frame`."""
+    df = reviews if isinstance(reviews, pd.DataFrame) else reviews_to_frame(reviews)
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No reviews available")
+
+    n_reviews = len(df)
+    df = df.assign(sentiment_score=df["sentiment"].map(SENTIMENT_SCORES).astype(float))
+    country_counts = df["country"].value_counts(sort=False)
+    country_counts = country_counts[country_counts > 0]
+    review_length = df["review_length"]
+    daily_totals = _daily_totals(df)
+
     metrics = {
         # Basic counts and averages
         "total_reviews": n_reviews,
-        "average_rating": round(sum(r.rating for r in reviews) / n_reviews, 2),
-        
+        "average_rating": round(float(df["rating"].mean()), 2),
+
         # Sentiment distribution (Very Negative, Negative, Neutral, Positive, Very Positive)
-        "sentiment_distribution": {
-            sentiment: {
-                "count": 0,
-                "percentage": 0.0
-            } for sentiment in Sentiment
-        },
+        "sentiment_distribution": _distribution(df["sentiment"].value_counts(sort=False), Sentiment, n_reviews),
 
         # Rating distribution (1-5 stars)
-        "rating_distribution": {
-            rating: {
-                "count": 0,
-                "percentage": 0.0
-            } for rating in range(1, 6)
+        "rating_distribution": _distribution(df["rating"].value_counts(sort=False), range(1, 6), n_reviews),
+
+        # Country distribution
+        "country_distribution": _distribution(country_counts, [str(c) for c in country_counts.index], n_reviews),
+
+        # Number of reviews with each rating per sentiment
+        "rating_by_sentiment": {
+            sentiment: {rating: int(count) for rating, count in row.items()}
+            for sentiment, row in (
+                pd.crosstab(df["sentiment"], df["rating"], dropna=False)
+                .reindex(index=list(Sentiment), columns=range(1, 6), fill_value=0)
+                .iterrows()
+            )
+        },
+
+        # Review volume, rating and sentiment on the days and weeks with reviews,
+        # with 7-day and 4-week rolling averages
+        "time_series": {
+            "daily": _time_series(daily_totals, window="7D"),
+            "weekly": _time_series(_weekly_totals(daily_totals), window="28D"),
+        },
+
+        # Review length in characters
+        "review_length": {
+            "mean": round(float(review_length.mean()), 2),
+            "median": float(review_length.median()),
+            "p90": float(review_length.quantile(0.9)),
+            "max": int(review_length.max()),
         },
-        
-        # Country distribution (will be filled in the next step)
-        "country_distribution": {}
     }
-    
-    for review in reviews:
-        # Calculate sentiment distribution
-        metrics["sentiment_distribution"][review.sentiment]["count"] += 1
-
-        # Calculate rating distribution
-        metrics["rating_distribution"][review.rating]["count"] += 1
-        
-        # Calculate country distribution
-        if review.country not in metrics["country_distribution"]:
-            metrics["country_distribution"][review.country] = {"count": 0, "percentage": 0.0}
-        metrics["country_distribution"][review.country]["count"] += 1
-    
-    # Calculate percentages
-    for sentiment in metrics["sentiment_distribution"]:
-        count = metrics["sentiment_distribution"][sentiment]["count"]
-        metrics["sentiment_distribution"][sentiment]["percentage"] = round((count / n_reviews) * 100, 2)
-    
-    for rating in metrics["rating_distribution"]:
-        count = metrics["rating_distribution"][rating]["count"]
-        metrics["rating_distribution"][rating]["percentage"] = round((count / n_reviews) * 100, 2)
-        
-    for country in metrics["country_distribution"]:
-        count = metrics["country_distribution"][country]["count"]
-        metrics["country_distribution"][country]["percentage"] = round((count / n_reviews) * 100, 2)
-    
+
     return metrics
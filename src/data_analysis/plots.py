@@ -1,100 +1,218 @@
+import os
+import json
 import base64
-import numpy as np
-import matplotlib.pyplot as plt
+import hashlib
+import threading
 from io import BytesIO
+from typing import TYPE_CHECKING, Literal
+from functools import lru_cache
+from collections import OrderedDict
 
+from src.models import Sentiment
 
-def generate_plots(metrics: dict, app_name: str, top_n_countries: int = 10) -> dict[str, str]:
-    """Generate plots for the given metrics."""
-    plt.style.use("bmh")
-    fig = plt.figure(figsize=(15, 10))
-
-    # Header
-    total_reviews = sum(d["count"] for d in metrics["rating_distribution"].values())
-    fig.suptitle(f'Analysis of {total_reviews:,} Reviews for "{app_name}"', fontsize=16, y=1.0)
-
-    # 1. Ratings Bar Chart
-    ax1 = fig.add_subplot(231)
-    ratings_data = metrics["rating_distribution"]
-    ax1.bar(ratings_data.keys(), [d["count"] for d in ratings_data.values()], color="skyblue")
-    ax1.set_title(f"Rating Distribution (AVG: {metrics['average_rating']})")
-    ax1.set_xlabel("Rating")
-    ax1.set_ylabel("Number of Reviews")
-
-    # 2. Sentiment Bar Chart
-    ax2 = fig.add_subplot(232)
-    sentiment_data = metrics["sentiment_distribution"]
-    sentiment_counts = [d["count"] for d in sentiment_data.values()]
-    ax2.bar(sentiment_data.keys(), sentiment_counts, color="lightgreen")
-    ax2.set_title("Sentiment Distribution")
-    ax2.set_ylabel("Number of Reviews")
-    plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha="right")
-
-    # 3. Top Countries Bar Chart
-    ax3 = fig.add_subplot(233)
-    country_data = metrics["country_distribution"]
-    # Sort countries by count and get top N
-    sorted_countries = dict(
-        sorted(
-            country_data.items(),
-            key=lambda x: x[1]["count"],
-            reverse=True,
-        )[:top_n_countries]
-    )
-    ax3.bar(
-        sorted_countries.keys(),
-        [d["count"] for d in sorted_countries.values()],
-        color="salmon",
-    )
-    ax3.set_title(f"Top {top_n_countries} Countries Distribution")
-    ax3.set_ylabel("Number of Reviews")
-    plt.setp(ax3.xaxis.get_majorticklabels(), rotation=45, ha="right")
-
-    # 4. Ratings Pie Chart
-    ax4 = fig.add_subplot(234)
-    ratings_percentages = [d["percentage"] for d in ratings_data.values()]
-    ax4.pie(
-        ratings_percentages,
-        labels=[f"{i} Stars" for i in ratings_data.keys()],
-        autopct="%1.1f%%",
-        colors=plt.cm.Blues(np.linspace(0.3, 0.7, 5)),
-    )
-    ax4.set_title("Rating Distribution")
-    
-    # 5. Sentiment Pie Chart
-    ax5 = fig.add_subplot(235)
-    sentiment_percentages = [d["percentage"] for d in sentiment_data.values()]
-    colors = ["#ff9999", "#ffcc99", "#99cc99", "#66b3ff", "#c2c2f0"]
-    ax5.pie(
-        sentiment_percentages,
-        labels=[f"{s}" for s in sentiment_data.keys()],
-        autopct="%1.1f%%",
-        colors=colors,
-    )
-    ax5.set_title("Sentiment Distribution")
-    
-    # 6. Countries Pie Chart (New)
-    ax6 = fig.add_subplot(236)
-    country_percentages = [d["percentage"] for d in sorted_countries.values()]
-    ax6.pie(
-        country_percentages,
-        labels=[f"{c}" for c in sorted_countries.keys()],
-        autopct="%1.1f%%",
-        colors=plt.cm.Pastel1(np.linspace(0, 1, top_n_countries)),
-    )
-    ax6.set_title(f"Top {top_n_countries} Countries Distribution")
-
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    
-    # Convert plot to base64 string
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+PlotFormat = Literal["png", "svg", "webp"]
+
+STYLE = "bmh"
+SENTIMENT_COLORS = ["#ff9999", "#ffcc99", "#99cc99", "#66b3ff", "#c2c2f0"]
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml", "webp": "image/webp"}
+
+_template = threading.local()
+_cache: OrderedDict[str, bytes] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _pyplot():
+    # matplotlib takes most of a second to import, so it is loaded with the first plot rather than with the app
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+class _PlotTemplate:
+    """
+    Pre-built figure with all six subplots.
+
+    The rating and sentiment bar charts have fixed categories, so their bars are created once and only
+    their heights change between renders. The country chart and the pie charts depend on the data and
+    are redrawn on their own axes. The layout is computed once when the template is built.
+    """
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+
+        plt = _pyplot()
+        with plt.style.context(STYLE):
+            self.fig = Figure(figsize=(15, 10))
+            self.title = self.fig.suptitle("", fontsize=16, y=0.99)
+            self.axes = [self.fig.add_subplot(231 + i) for i in range(6)]
+            ax1, ax2, ax3, *_ = self.axes
+
+            self.rating_bars = ax1.bar(range(1, 6), [0] * 5, color="skyblue")
+            ax1.set_xlabel("Rating")
+            ax1.set_ylabel("Number of Reviews")
+
+            self.sentiment_bars = ax2.bar([str(s) for s in Sentiment], [0] * len(Sentiment), color="lightgreen")
+            ax2.set_title("Sentiment Distribution")
+            ax2.set_ylabel("Number of Reviews")
+            ax2.tick_params(axis="x", labelrotation=45)
+            for label in ax2.get_xticklabels():
+                label.set_horizontalalignment("right")
+
+            ax3.set_ylabel("Number of Reviews")
+            self.fig.tight_layout(rect=[0, 0, 1, 0.95])
+            # The country chart is redrawn on every render, keep room for its rotated labels
+            self.fig.subplots_adjust(hspace=0.45)
+
+    @staticmethod
+    def _update_bars(ax, bars, heights: list[int]) -> None:
+        for bar, height in zip(bars, heights):
+            bar.set_height(height)
+        ax.set_ylim(0, max(max(heights, default=0), 1) * 1.05)
+
+    def render(self, metrics: dict, app_name: str, top_n_countries: int) -> "Figure":
+        import numpy as np
+
+        plt = _pyplot()
+        ax1, ax2, ax3, ax4, ax5, ax6 = self.axes
+        ratings_data = metrics["rating_distribution"]
+        sentiment_data = metrics["sentiment_distribution"]
+        country_data = metrics["country_distribution"]
+
+        with plt.style.context(STYLE):
+            # Header
+            total_reviews = sum(d["count"] for d in ratings_data.values())
+            self.title.set_text(f'Analysis of {total_reviews:,} Reviews for "{app_name}"')
+
+            # 1. Ratings Bar Chart
+            self._update_bars(ax1, self.rating_bars, [d["count"] for d in ratings_data.values()])
+            ax1.set_title(f"Rating Distribution (AVG: {metrics['average_rating']})")
+
+            # 2. Sentiment Bar Chart
+            self._update_bars(ax2, self.sentiment_bars, [d["count"] for d in sentiment_data.values()])
+
+            # Sort countries by count and get top N
+            sorted_countries = dict(
+                sorted(
+                    country_data.items(),
+                    key=lambda x: x[1]["count"],
+                    reverse=True,
+                )[:top_n_countries]
+            )
+
+            for ax in (ax3, ax4, ax5, ax6):
+                ax.clear()
+
+            # 3. Top Countries Bar Chart
+            ax3.bar(
+                list(sorted_countries.keys()),
+                [d["count"] for d in sorted_countries.values()],
+                color="salmon",
+            )
+            ax3.set_title(f"Top {top_n_countries} Countries Distribution")
+            ax3.set_ylabel("Number of Reviews")
+            ax3.tick_params(axis="x", labelrotation=45)
+            for label in ax3.get_xticklabels():
+                label.set_horizontalalignment("right")
+
+            # 4. Ratings Pie Chart
+            ax4.pie(
+                [d["percentage"] for d in ratings_data.values()],
+                labels=[f"{i} Stars" for i in ratings_data.keys()],
+                autopct="%1.1f%%",
+                colors=plt.get_cmap("Blues")(np.linspace(0.3, 0.7, 5)),
+            )
+            ax4.set_title("Rating Distribution")
+
+            # 5. Sentiment Pie Chart
+            ax5.pie(
+                [d["percentage"] for d in sentiment_data.values()],
+                labels=[f"{s}" for s in sentiment_data.keys()],
+                autopct="%1.1f%%",
+                colors=SENTIMENT_COLORS,
+            )
+            ax5.set_title("Sentiment Distribution")
+
+            # 6. Countries Pie Chart
+            ax6.pie(
+                [d["percentage"] for d in sorted_countries.values()],
+                labels=[f"{c}" for c in sorted_countries.keys()],
+                autopct="%1.1f%%",
+                colors=plt.get_cmap("Pastel1")(np.linspace(0, 1, top_n_countries)),
+            )
+            ax6.set_title(f"Top {top_n_countries} Countries Distribution")
+
+        return self.fig
+
+
+def _get_template() -> _PlotTemplate:
+    # Templates are mutated while rendering, so every rendering thread gets its own
+    if not hasattr(_template, "value"):
+        _template.value = _PlotTemplate()
+    return _template.value
+
+
+def _cache_key(metrics: dict, app_name: str, top_n_countries: int, image_format: str, dpi: int) -> str:
+    content = json.dumps([metrics, app_name, top_n_countries, image_format, dpi], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def render_plots(
+    metrics: dict,
+    app_name: str,
+    top_n_countries: int = 10,
+    image_format: PlotFormat = "png",
+    dpi: int | None = None,
+) -> bytes:
+    """
+    Render the metrics plots to an image.
+    Rendered images are cached by a hash of the metrics and render options (PLOT_CACHE_SIZE entries).
+
+    Args:
+        metrics: Metrics calculated by `calculate_metrics`
+        app_name: Name of the app shown in the header
+        top_n_countries: Number of countries shown in the country charts (default: 10)
+        image_format: "png", "svg" or "webp" (default: "png")
+        dpi: Resolution of raster formats (default: PLOT_DPI or 300)
+
+    Returns:
+        bytes: The encoded image
+    """
+    dpi = dpi or int(os.getenv("PLOT_DPI", 300))
+    key = _cache_key(metrics, app_name, top_n_countries, image_format, dpi)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    fig = _get_template().render(metrics, app_name, top_n_countries)
     buffer = BytesIO()
-    fig.savefig(buffer, format="png", dpi=300, bbox_inches="tight")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-    plt.close(fig)
-    
+    fig.savefig(buffer, format=image_format, dpi=dpi)
+    image = buffer.getvalue()
+
+    with _cache_lock:
+        _cache[key] = image
+        while len(_cache) > int(os.getenv("PLOT_CACHE_SIZE", 32)):
+            _cache.popitem(last=False)
+
+    return image
+
+
+def generate_plots(
+    metrics: dict,
+    app_name: str,
+    top_n_countries: int = 10,
+    image_format: PlotFormat = "png",
+    dpi: int | None = None,
+) -> dict[str, str]:
+    """Generate plots for the given metrics."""
+    image = render_plots(metrics, app_name, top_n_countries, image_format, dpi)
     return {
-        "image": image_base64,
-        "format": "png",
+        "image": base64.b64encode(image).decode("utf-8"),
+        "format": image_format,
         "encoding": "base64"
     }
@@ -0,0 +1,225 @@
+import os
+import re
+import math
+import zlib
+import logging
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from src.models import ReviewBatch
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+_PERMUTATION_CHUNK = 8
+_BAND_MULTIPLIER = 0x9E3779B97F4A7C15
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def _shingles(normalized: str) -> set[int]:
+    # Word bigrams for regular reviews, single words for one-word reviews
+    words = normalized.split()
+    grams = [" ".join(pair) for pair in zip(words, words[1:])] or words or [""]
+    return {zlib.crc32(gram.encode("utf-8")) & 0x7FFFFFFF for gram in grams}
+
+
+@lru_cache(maxsize=1)
+def _permutations() -> tuple["np.ndarray", "np.ndarray"]:
+    # numpy is imported with the first reduction rather than with the app
+    import numpy as np
+
+    rng = np.random.default_rng(seed=42)
+    # Multiply-shift hashing: (a * x + b) >> 32 with odd 64-bit multipliers, wrapping on overflow
+    a = rng.integers(0, 2**64, size=NUM_PERMUTATIONS, dtype=np.uint64, endpoint=False) | np.uint64(1)
+    b = rng.integers(0, 2**64, size=NUM_PERMUTATIONS, dtype=np.uint64, endpoint=False)
+    return a, b
+
+
+def _minhash_signatures(texts: list[str]) -> "np.ndarray":
+    """Compute MinHash signatures of shape (len(texts), NUM_PERMUTATIONS) for all texts at once."""
+    import numpy as np
+
+    all_a, all_b = _permutations()
+    shingle_sets = [_shingles(text) for text in texts]
+    lengths = np.fromiter(map(len, shingle_sets), dtype=np.int64, count=len(texts))
+    hashes = np.fromiter((h for s in shingle_sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    signatures = np.empty((len(texts), NUM_PERMUTATIONS), dtype=np.uint64)
+    # Permutations are applied in chunks to bound the size of the intermediate matrix
+    for start in range(0, NUM_PERMUTATIONS, _PERMUTATION_CHUNK):
+        a = all_a[start:start + _PERMUTATION_CHUNK, None]
+        b = all_b[start:start + _PERMUTATION_CHUNK, None]
+        permuted = (a * hashes[None, :] + b) >> np.uint64(32)
+        signatures[:, start:start + _PERMUTATION_CHUNK] = np.minimum.reduceat(permuted, offsets, axis=1).T
+
+    return signatures
+
+
+def _find(parents: list[int], i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def cluster_near_duplicates(
+    texts: list[str], threshold: float | None = None, groups: list | None = None
+) -> list[list[int]]:
+    """
+    Group exact and near-duplicate texts.
+
+    Texts are first collapsed by their normalized form (case, punctuation and whitespace ignored).
+    The remaining unique texts are compared with MinHash signatures and LSH banding, and texts whose
+    estimated Jaccard similarity of word bigrams reaches the threshold end up in the same cluster.
+    Texts that are empty once normalized, like emoji or punctuation only reviews, are never clustered.
+
+    Args:
+        texts: Texts to cluster
+        threshold: Minimum estimated similarity of near-duplicates (default: LLM_DEDUP_THRESHOLD or 0.6)
+        groups: Hashable group of every text, e.g. its rating and sentiment, texts of different groups
+            are never clustered together
+
+    Returns:
+        list[list[int]]: Clusters as lists of positions in `texts`
+    """
+    threshold = threshold if threshold is not None else float(os.getenv("LLM_DEDUP_THRESHOLD", 0.6))
+    groups = groups if groups is not None else [None] * len(texts)
+
+    exact: dict[tuple, list[int]] = defaultdict(list)
+    for i, (text, group) in enumerate(zip(texts, groups)):
+        normalized = _normalize(text)
+        # Nothing is left to compare empty texts by, so each stays on its own
+        exact[(group, normalized) if normalized else (group, None, i)].append(i)
+
+    keys = list(exact)
+    members = list(exact.values())
+    parents = list(range(len(keys)))
+    comparable = [k for k, key in enumerate(keys) if key[1] is not None]
+
+    if len(comparable) > 1 and threshold < 1:
+        import numpy as np
+
+        signatures = _minhash_signatures([keys[k][1] for k in comparable])
+        rows = NUM_PERMUTATIONS // NUM_BANDS
+        # Band keys start from the group, so texts of different groups never share a bucket
+        group_ids = {group: n for n, group in enumerate(dict.fromkeys(keys[k][0] for k in comparable))}
+        group_keys = np.array([group_ids[keys[k][0]] for k in comparable], dtype=np.uint64)
+
+        positions = np.arange(len(comparable))
+        for band in range(NUM_BANDS):
+            # Texts with identical rows in a band are candidates, each is compared with the first of its bucket
+            band_keys = group_keys.copy()
+            for row in signatures[:, band * rows:(band + 1) * rows].T:
+                # Wrapping polynomial hash of the band rows, collisions are filtered by the similarity check
+                band_keys = band_keys * np.uint64(_BAND_MULTIPLIER) + row
+            _, first, bucket = np.unique(band_keys, return_index=True, return_inverse=True)
+            candidates = first[bucket]
+            pairs = candidates != positions
+            left, right = candidates[pairs], positions[pairs]
+            similar = (signatures[left] == signatures[right]).mean(axis=1) >= threshold
+            # Hash collisions across groups are filtered like other false candidates
+            similar &= group_keys[left] == group_keys[right]
+
+            for i, j in zip(left[similar].tolist(), right[similar].tolist()):
+                root_i, root_j = _find(parents, comparable[i]), _find(parents, comparable[j])
+                if root_i != root_j:
+                    parents[root_j] = root_i
+
+    clusters: dict[int, list[int]] = defaultdict(list)
+    for k in range(len(keys)):
+        clusters[_find(parents, k)].extend(members[k])
+
+    return [sorted(cluster) for cluster in clusters.values()]
+
+
+def _allocate(weights: dict, total: int) -> dict:
+    """Split `total` between strata proportionally to their weights with the largest remainder method."""
+    weight_sum = sum(weights.values())
+    quotas = {key: total * weight / weight_sum for key, weight in weights.items()}
+    allocation = {key: int(quota) for key, quota in quotas.items()}
+    remaining = total - sum(allocation.values())
+    for key in sorted(quotas, key=lambda k: quotas[k] - allocation[k], reverse=True)[:remaining]:
+        allocation[key] += 1
+    return allocation
+
+
+def reduce_reviews(
+    reviews: ReviewBatch,
+    ratio: float | None = None,
+    max_reviews: int | None = None,
+    min_reviews: int | None = None,
+) -> tuple[ReviewBatch, list[int]]:
+    """
+    Reduce reviews to a weighted, representative sample for the LLM summary.
+
+    Near-duplicate reviews with the same rating and sentiment are collapsed into clusters represented
+    by their longest review. If there are still more clusters than the target size, clusters are sampled
+    per (rating, sentiment) stratum, proportionally to the number of reviews in each stratum and largest clusters first. The reviews of
+    clusters that are sampled out are added to the weights of the kept representatives of their stratum,
+    so the weights still add up to the number of reviews.
+
+    Args:
+        reviews: Reviews with sentiment labels
+        ratio: Target size as a fraction of the number of reviews (default: LLM_REDUCTION_RATIO or 0.5)
+        max_reviews: Upper bound of the target size, which keeps LLM cost flat for large
+            review counts (default: LLM_REDUCTION_MAX_REVIEWS or 500)
+        min_reviews: Lower bound of the target size, up to this many reviews only near-duplicates
+            are collapsed (default: LLM_REDUCTION_MIN_REVIEWS or 200)
+
+    Returns:
+        tuple[ReviewBatch, list[int]]: Representative reviews in their original order and the number of
+            reviews each of them stands for
+    """
+    ratio = ratio if ratio is not None else float(os.getenv("LLM_REDUCTION_RATIO", 0.5))
+    max_reviews = max_reviews or int(os.getenv("LLM_REDUCTION_MAX_REVIEWS", 500))
+    min_reviews = min_reviews if min_reviews is not None else int(os.getenv("LLM_REDUCTION_MIN_REVIEWS", 200))
+    if not reviews:
+        return reviews, []
+
+    # Reviews are clustered within their (rating, sentiment) stratum, so a representative shares
+    # the rating and sentiment of every review it stands for
+    clusters = cluster_near_duplicates(reviews.review_text, groups=list(zip(reviews.rating, reviews.sentiment)))
+    texts = reviews.review_text
+    representatives = {max(cluster, key=lambda i: len(texts[i])): len(cluster) for cluster in clusters}
+
+    target = max(1, min(max(math.ceil(len(reviews) * ratio), min(len(reviews), min_reviews)), max_reviews))
+    if len(representatives) > target:
+        strata: dict[tuple, list[int]] = defaultdict(list)
+        for i in representatives:
+            strata[(reviews.rating[i], reviews.sentiment[i])].append(i)
+
+        allocation = _allocate(
+            {key: sum(representatives[i] for i in indices) for key, indices in strata.items()},
+            target,
+        )
+        selected = {}
+        # Reviews of strata that are too small to keep a representative, spread over all representatives
+        unassigned = 0
+        for key, indices in strata.items():
+            indices.sort(key=lambda i: (representatives[i], len(texts[i])), reverse=True)
+            kept, dropped = indices[:allocation[key]], indices[allocation[key]:]
+            dropped_reviews = sum(representatives[i] for i in dropped)
+            if not kept:
+                unassigned += dropped_reviews
+                continue
+            extra = _allocate({i: representatives[i] for i in kept}, dropped_reviews)
+            for i in kept:
+                selected[i] = representatives[i] + extra[i]
+        extra = _allocate(selected, unassigned)
+        representatives = {i: weight + extra[i] for i, weight in selected.items()}
+
+    indices = sorted(representatives)
+    logger.info(f"Reduced {len(reviews)} reviews to {len(clusters)} clusters and {len(indices)} representatives")
+    return reviews.take(indices), [representatives[i] for i in indices]
@@ -1,14 +1,57 @@
-from src.models import Review
-from src.data_analysis.hf_pipelines import get_sentiment_pipeline
+import os
 
+from src.models import ReviewBatch
+from src.pipeline.progress import report_progress
+from src.data_analysis.sentiment_cache import get_sentiment_cache
+from src.data_analysis.sentiment_server import (
+    WARMUP_TEXTS,
+    get_sentiment_client,
+    predict_in_process,
+    sentiment_server_address,
+)
 
-def analyze_reviews_sentiment(reviews: list[Review]) -> list[Review]:
-    """Analyze the sentiment of a list of reviews."""
-    sentiment_pipeline = get_sentiment_pipeline()
-    texts = [review.review_text for review in reviews]
-    results = sentiment_pipeline(texts)
 
-    for review, result in zip(reviews, results):
-        review.sentiment = result['label']
+def _predict(texts: list[str]) -> list[str]:
+    if sentiment_server_address():
+        return get_sentiment_client().predict(texts)
+    return predict_in_process(texts)
+
+
+def analyze_reviews_sentiment(reviews: ReviewBatch) -> ReviewBatch:
+    """
+    Analyze the sentiment of a list of reviews, running the model only on texts missing from the cache.
+    With SENTIMENT_MICROBATCH enabled, cache misses are merged with those of concurrent requests.
+    With SENTIMENT_SERVER_ADDRESS set, they are labeled by the shared inference process instead of a model of this process.
+    Misses are labeled in chunks of SENTIMENT_PROGRESS_CHUNK texts, reporting progress after each.
+    """
+    cache = get_sentiment_cache()
+    texts = reviews.review_text
+    labels = cache.get_many(texts)
+
+    missing_texts = list(dict.fromkeys(text for text, label in zip(texts, labels) if label is None))
+    n_cached = len(texts) - sum(label is None for label in labels)
+    report_progress("sentiment", n_cached, len(texts))
+    if missing_texts:
+        predicted = {}
+        chunk_size = int(os.getenv("SENTIMENT_PROGRESS_CHUNK", 2048))
+        for i in range(0, len(missing_texts), chunk_size):
+            chunk = missing_texts[i:i + chunk_size]
+            chunk_labels = _predict(chunk)
+            cache.set_many(chunk, chunk_labels)
+            predicted.update(zip(chunk, chunk_labels))
+            report_progress("sentiment", min(n_cached + len(predicted), len(texts)), len(texts))
+        labels = [predicted[text] if label is None else label for text, label in zip(texts, labels)]
+
+    report_progress("sentiment", len(texts), len(texts))
+
+    reviews.set_sentiments(labels)
 
     return reviews
+
+
+def warmup_sentiment_model() -> None:
+    """
+    Load the sentiment model, or connect to the shared inference process, and run a forward pass,
+    so the first request doesn't pay for it.
+    """
+    _predict(WARMUP_TEXTS)
@@ -0,0 +1,110 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+
+from src.data_analysis.sentiment_inference import predict_sentiment_labels
+
+logger = logging.getLogger(__name__)
+
+
+class SentimentBatcher:
+    """
+    Merges sentiment requests from concurrent callers into shared forward passes.
+
+    Callers submit texts and get a future. A background worker collects submissions for up to
+    `max_wait` seconds or until `max_batch_size` texts are pending, runs the model once on the
+    unique texts of all of them and resolves every future with its own labels.
+    """
+
+    def __init__(self, max_batch_size: int = 256, max_wait: float = 0.01):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: queue.Queue[tuple[list[str], Future] | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="sentiment-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for classification. The returned future resolves to their labels in order."""
+        future = Future()
+        if not texts:
+            future.set_result([])
+        else:
+            self._queue.put((texts, future))
+        return future
+
+    def close(self) -> None:
+        """Stop the worker after the already submitted texts are processed."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: tuple[list[str], Future]) -> tuple[list[tuple[list[str], Future]], bool]:
+        pending = [first]
+        n_texts = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while n_texts < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return pending, True
+            pending.append(item)
+            n_texts += len(item[0])
+
+        return pending, False
+
+    def _worker(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            pending, stop = self._collect(item)
+            unique_texts = list(dict.fromkeys(text for texts, _ in pending for text in texts))
+            try:
+                labels = dict(zip(unique_texts, predict_sentiment_labels(unique_texts)))
+            except Exception as e:
+                logger.error(f"Error in batched sentiment inference: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Classified {len(unique_texts)} texts for {len(pending)} merged requests")
+            for texts, future in pending:
+                future.set_result([labels[text] for text in texts])
+
+
+def microbatching_enabled() -> bool:
+    return os.getenv("SENTIMENT_MICROBATCH", "true").lower() == "true"
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_batcher() -> SentimentBatcher:
+    """
+    Creates and returns the cached sentiment batcher of the process.
+    The merge window is set with SENTIMENT_MICROBATCH_WAIT_MS and the batch size with SENTIMENT_MICROBATCH_SIZE.
+
+    Returns:
+        SentimentBatcher
+    """
+    return SentimentBatcher(
+        max_batch_size=int(os.getenv("SENTIMENT_MICROBATCH_SIZE", 256)),
+        max_wait=float(os.getenv("SENTIMENT_MICROBATCH_WAIT_MS", 10)) / 1000,
+    )
+
+
+def shutdown_sentiment_batcher() -> None:
+    """Stop the sentiment batcher if it was created."""
+    if get_sentiment_batcher.cache_info().currsize == 0:
+        return
+    get_sentiment_batcher().close()
+    get_sentiment_batcher.cache_clear()
@@ -0,0 +1,146 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from src.data_analysis.hf_pipelines import sentiment_backend, sentiment_model_name
+
+logger = logging.getLogger(__name__)
+
+# Stay below SQLite's limit on the number of bound parameters per statement
+SQLITE_CHUNK_SIZE = 500
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class SentimentCache:
+    """
+    Content-addressed cache of sentiment labels.
+
+    Entries are keyed by a hash of the model name and the normalized review text, so labels produced
+    by a different model are never returned. Lookups go to an in-process LRU first and then to an
+    optional SQLite tier that survives restarts; disk rows of other models are dropped on startup.
+    """
+
+    def __init__(self, model_name: str, maxsize: int = 100_000, path: str | Path | None = None):
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS sentiments (key TEXT PRIMARY KEY, model TEXT NOT NULL, label TEXT NOT NULL)"
+                )
+                deleted = conn.execute("DELETE FROM sentiments WHERE model != ?", (model_name,)).rowcount
+            if deleted:
+                logger.info(f"Dropped {deleted} cached sentiments of previous models")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{_normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: list[str]) -> list[str | None]:
+        """Return the cached label of every text, or None for texts that are not cached."""
+        keys = [self.key(text) for text in texts]
+        labels: list[str | None] = [None] * len(keys)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    labels[i] = self._memory[key]
+
+        missing = list({key for key, label in zip(keys, labels) if label is None})
+        if missing and self.path is not None:
+            found = {}
+            with self._connect() as conn:
+                for i in range(0, len(missing), SQLITE_CHUNK_SIZE):
+                    chunk = missing[i:i + SQLITE_CHUNK_SIZE]
+                    found.update(
+                        conn.execute(
+                            f"SELECT key, label FROM sentiments WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        ).fetchall()
+                    )
+            if found:
+                self._remember(found)
+                labels = [found.get(key, label) if label is None else label for key, label in zip(keys, labels)]
+
+        with self._lock:
+            n_hits = sum(label is not None for label in labels)
+            self.hits += n_hits
+            self.misses += len(labels) - n_hits
+
+        return labels
+
+    def set_many(self, texts: list[str], labels: list[str]) -> None:
+        """Cache the labels of the given texts."""
+        entries = {self.key(text): str(label) for text, label in zip(texts, labels)}
+        self._remember(entries)
+
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sentiments (key, model, label) VALUES (?, ?, ?)",
+                    [(key, self.model_name, label) for key, label in entries.items()],
+                )
+
+    def _remember(self, entries: dict[str, str]) -> None:
+        with self._lock:
+            for key, label in entries.items():
+                self._memory[key] = label
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_cache() -> SentimentCache:
+    """
+    Creates and returns the cached sentiment cache.
+    Labels are cached per model and inference backend.
+    The LRU size is set with SENTIMENT_CACHE_SIZE and the on-disk tier with SENTIMENT_CACHE_PATH
+    (disabled when empty).
+
+    Returns:
+        SentimentCache: Sentiment cache for the configured model
+    """
+    return SentimentCache(
+        # Quantized and exported backends may label a few texts differently, so they are cached separately
+        model_name=f"{sentiment_model_name()}@{sentiment_backend()}",
+        maxsize=int(os.getenv("SENTIMENT_CACHE_SIZE", 100_000)),
+        path=os.getenv("SENTIMENT_CACHE_PATH") or None,
+    )
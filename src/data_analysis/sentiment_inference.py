@@ -0,0 +1,78 @@
+import os
+import logging
+
+from src.data_analysis.hf_pipelines import MAX_LENGTH, get_sentiment_model, get_sentiment_pipeline, sentiment_backend
+
+logger = logging.getLogger(__name__)
+
+
+def predict_sentiment_labels(texts: list[str], batch_size: int | None = None, backend: str | None = None) -> list[str]:
+    """
+    Predict the sentiment label of every text with length-bucketed batches.
+
+    Texts are tokenized once, sorted by token length and padded only to the longest text of their batch,
+    so short reviews are not padded to the length of long ones. Labels are returned in input order.
+
+    Args:
+        texts: Texts to classify
+        batch_size: Number of texts per forward pass (default: SENTIMENT_BATCH_SIZE or 32)
+        backend: Inference backend (default: SENTIMENT_BACKEND or "torch")
+
+    Returns:
+        list[str]: Sentiment label of every text
+    """
+    if not texts:
+        return []
+
+    import torch
+
+    batch_size = batch_size or int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+    tokenizer, model = get_sentiment_model(backend or sentiment_backend())
+
+    encodings = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(encodings[i]))
+    labels: list[str | None] = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = tokenizer.pad(
+                {"input_ids": [encodings[i] for i in indices]},
+                padding="longest",
+                return_tensors="pt",
+            ).to(model.device)
+            predictions = model(**batch).logits.argmax(dim=-1).tolist()
+
+            for i, prediction in zip(indices, predictions):
+                labels[i] = model.config.id2label[prediction]
+
+    return labels
+
+
+def check_backend_parity(texts: list[str], backend: str | None = None, threshold: float | None = None) -> float:
+    """
+    Compare the labels of an inference backend with the reference transformers pipeline.
+
+    Args:
+        texts: Sample texts to classify
+        backend: Backend to check (default: SENTIMENT_BACKEND or "torch")
+        threshold: Minimum share of matching labels (default: SENTIMENT_PARITY_THRESHOLD or 0.98)
+
+    Returns:
+        float: Share of texts labeled the same as the reference pipeline
+
+    Raises:
+        ValueError: If the agreement is below the threshold
+    """
+    backend = backend or sentiment_backend()
+    threshold = threshold if threshold is not None else float(os.getenv("SENTIMENT_PARITY_THRESHOLD", 0.98))
+
+    reference = [result["label"] for result in get_sentiment_pipeline()(texts)]
+    labels = predict_sentiment_labels(texts, backend=backend)
+    agreement = sum(a == b for a, b in zip(reference, labels)) / len(texts)
+
+    logger.info(f"Sentiment backend '{backend}' agrees with the reference pipeline on {agreement:.2%} of {len(texts)} texts")
+    if agreement < threshold:
+        raise ValueError(f"Sentiment backend '{backend}' agreement {agreement:.2%} is below the {threshold:.2%} threshold")
+
+    return agreement
@@ -0,0 +1,164 @@
+import os
+import queue
+import logging
+import threading
+from functools import lru_cache
+from typing import Callable
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.synchronize import Event
+
+from src.data_analysis.sentiment_batcher import get_sentiment_batcher, microbatching_enabled
+from src.data_analysis.sentiment_inference import predict_sentiment_labels
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXTS = ["Great app, works as expected.", "Keeps crashing after the last update."]
+
+
+def sentiment_server_address() -> str | None:
+    """Address of the shared sentiment inference process, set with SENTIMENT_SERVER_ADDRESS, or None to run the model in process."""
+    return os.getenv("SENTIMENT_SERVER_ADDRESS") or None
+
+
+def _authkey() -> bytes:
+    return os.getenv("SENTIMENT_SERVER_AUTHKEY", "").encode() or b"sentiment"
+
+
+def predict_in_process(texts: list[str]) -> list[str]:
+    """Label texts with the model of the current process, merged with concurrent callers when micro-batching is enabled."""
+    if microbatching_enabled():
+        return get_sentiment_batcher().submit(texts).result()
+    return predict_sentiment_labels(texts)
+
+
+def _handle(connection: Connection) -> None:
+    with connection:
+        while True:
+            try:
+                texts = connection.recv()
+            except EOFError:
+                return
+            try:
+                connection.send(("ok", predict_in_process(texts)))
+            except Exception as e:
+                logger.error(f"Error in shared sentiment inference: {e}")
+                connection.send(("error", str(e)))
+
+
+def _serve(listener: Listener, stopped: threading.Event | None = None) -> None:
+    while True:
+        try:
+            connection = listener.accept()
+        except OSError as e:
+            if stopped is not None and stopped.is_set():
+                return
+            logger.warning(f"Rejected sentiment client: {e}")
+            continue
+        threading.Thread(target=_handle, args=(connection,), name="sentiment-client", daemon=True).start()
+
+
+def run_sentiment_server(address: str, ready: Event | None = None) -> None:
+    """
+    Load the sentiment model once and serve it to the API workers over a local socket.
+
+    Requests of all connected workers go through the micro-batcher of this process, so concurrent
+    requests from different workers share forward passes. Meant to run in its own process, see serve.py.
+
+    Args:
+        address: Path of the Unix socket to listen on
+        ready: Set once the model is loaded and warmed up and the socket accepts connections
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    predict_in_process(WARMUP_TEXTS)
+
+    if os.path.exists(address):
+        os.remove(address)
+    with Listener(address, family="AF_UNIX", authkey=_authkey()) as listener:
+        logger.info(f"Sentiment inference process serving on {address}")
+        if ready is not None:
+            ready.set()
+        _serve(listener)
+
+
+def start_sentiment_server_thread(address: str, authkey: str) -> Callable[[], None]:
+    """
+    Serve the sentiment model of the current process to other processes from a background thread.
+
+    Used by the job queue, so that its worker processes label reviews with the model of the API process
+    instead of each loading their own copy. The model is loaded on the first request.
+
+    Args:
+        address: Path of the Unix socket to listen on
+        authkey: Key clients authenticate with, passed to them as SENTIMENT_SERVER_AUTHKEY
+
+    Returns:
+        Callable[[], None]: Stops serving and removes the socket
+    """
+    if os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey.encode())
+    stopped = threading.Event()
+    threading.Thread(target=_serve, args=(listener, stopped), name="sentiment-server", daemon=True).start()
+    logger.info(f"Serving the sentiment model to job workers on {address}")
+
+    def stop() -> None:
+        stopped.set()
+        listener.close()
+
+    return stop
+
+
+class SentimentClient:
+    """
+    Client of the shared sentiment inference process.
+    Connections are pooled, so concurrent callers of the process each get their own connection.
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._idle: queue.SimpleQueue[Connection] = queue.SimpleQueue()
+
+    def _connect(self) -> Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return Client(self.address, family="AF_UNIX", authkey=_authkey())
+
+    def predict(self, texts: list[str]) -> list[str]:
+        """
+        Label texts with the shared model.
+
+        Raises:
+            RuntimeError: If inference failed in the inference process
+            OSError: If the inference process cannot be reached
+        """
+        if not texts:
+            return []
+
+        # A pooled connection may have been closed by a restart of the inference process, so retry once on a new one
+        for attempt in range(2):
+            connection = self._connect()
+            try:
+                connection.send(texts)
+                status, payload = connection.recv()
+                break
+            except (EOFError, OSError):
+                connection.close()
+                if attempt:
+                    raise
+        self._idle.put(connection)
+
+        if status != "ok":
+            raise RuntimeError(f"Sentiment inference failed: {payload}")
+        return payload
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_client() -> SentimentClient:
+    """
+    Creates and returns the cached client of the shared sentiment inference process at SENTIMENT_SERVER_ADDRESS.
+
+    Returns:
+        SentimentClient
+    """
+    return SentimentClient(sentiment_server_address())
@@ -0,0 +1,12 @@
+from src.jobs.queue import Job, JobQueue, get_job_queue, shutdown_job_queue
+from src.jobs.runner import AnalysisJobRequest, AnalysisJobResult, JobError
+
+__all__ = [
+    Job,
+    JobQueue,
+    get_job_queue,
+    shutdown_job_queue,
+    AnalysisJobRequest,
+    AnalysisJobResult,
+    JobError,
+]
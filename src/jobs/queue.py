@@ -0,0 +1,265 @@
+import os
+import time
+import secrets
+import tempfile
+import uuid
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Literal
+
+from fastapi import HTTPException
+
+from src.jobs.runner import AnalysisJobRequest, AnalysisJobResult, JobError, init_worker, run_analysis, run_analysis_in_worker
+from src.data_analysis.sentiment_server import sentiment_server_address, start_sentiment_server_thread
+from src.models import ReviewBatch
+from src.pipeline.progress import progress_reporter
+from src.storage.analysis_store import StoredAnalysis, get_analysis_store
+from src.storage.job_store import get_job_store
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+JobBackend = Literal["process", "local"]
+
+# Minimum seconds between writes of the progress of a job to the job store
+PROGRESS_SAVE_INTERVAL = 0.5
+
+
+class Job:
+    """State of one submitted analysis."""
+
+    def __init__(self, request: AnalysisJobRequest):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status: JobStatus = "queued"
+        self.progress: dict[str, dict] = {}
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result: AnalysisJobResult | None = None
+        self.analysis_id: str | None = None
+        self.error: JobError | None = None
+
+    def update_progress(self, stage: str, done: int, total: int | None) -> None:
+        if self.status == "queued":
+            self.status = "running"
+            self.started_at = time.time()
+        self.progress[stage] = {"done": done, "total": total}
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": {"status_code": self.error.status_code, "detail": self.error.detail} if self.error else None,
+        }
+
+    def to_state(self) -> dict:
+        """Everything needed to answer the polls of the job, as JSON-serializable values."""
+        return {
+            **self.to_dict(),
+            "request": self.request.model_dump(mode="json"),
+            "result": self.result.model_dump(mode="json", exclude={"plot", "reviews"}) if self.result else None,
+            "analysis_id": self.analysis_id,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Job":
+        """Rebuild a job from `to_state`, e.g. one that runs in another API worker."""
+        job = cls(AnalysisJobRequest.model_validate(state["request"]))
+        job.id = state["job_id"]
+        job.status = state["status"]
+        job.progress = state["progress"]
+        job.created_at = state["created_at"]
+        job.started_at = state["started_at"]
+        job.finished_at = state["finished_at"]
+        job.result = AnalysisJobResult.model_validate(state["result"]) if state["result"] else None
+        job.analysis_id = state["analysis_id"]
+        job.error = JobError(**state["error"]) if state["error"] else None
+        return job
+
+
+class JobQueue:
+    """
+    Runs analyses in the background and keeps their status, progress and results.
+
+    With the "process" backend, jobs run in a pool of spawned worker processes with their own pipeline stages,
+    and progress comes back over a multiprocessing queue. The workers label reviews through the shared inference
+    process at SENTIMENT_SERVER_ADDRESS, or else through the model of this process, so they never load a model.
+    The "local" backend runs jobs as tasks on the event loop of the API process and is meant for tests and development.
+    Finished jobs are kept for `ttl` seconds, and submissions beyond `max_pending` unfinished jobs are rejected.
+    """
+
+    def __init__(self, backend: JobBackend = "process", max_workers: int = 2, max_pending: int = 100, ttl: float = 3600):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._progress_queue = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._stop_sentiment_server = None
+        self._store = get_job_store()
+        self._saved_at: dict[str, float] = {}
+
+        if backend not in ("process", "local"):
+            raise ValueError(f"Unknown job backend '{backend}', expected 'process' or 'local'")
+
+    def _start_workers(self) -> None:
+        # Spawned workers do not inherit the threads and model state of the API process
+        context = multiprocessing.get_context("spawn")
+        sentiment_server = None
+        if not sentiment_server_address():
+            # Each worker would otherwise load its own copy of the model
+            address = os.path.join(tempfile.gettempdir(), f"sentiment-jobs-{os.getpid()}.sock")
+            authkey = secrets.token_hex(16)
+            self._stop_sentiment_server = start_sentiment_server_thread(address, authkey)
+            sentiment_server = (address, authkey)
+        self._progress_queue = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(self._progress_queue, sentiment_server),
+        )
+        threading.Thread(target=self._drain_progress, name="job-progress", daemon=True).start()
+
+    def _save(self, job: Job, force: bool = True) -> None:
+        if self._store is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job.id, 0.0) < PROGRESS_SAVE_INTERVAL:
+            return
+        self._saved_at[job.id] = now
+        self._store.save(job.id, job.to_state(), job.finished_at)
+
+    def _update_progress(self, job: Job, stage: str, done: int, total: int | None) -> None:
+        queued = job.status == "queued"
+        job.update_progress(stage, done, total)
+        self._save(job, force=queued)
+
+    def _drain_progress(self) -> None:
+        while (message := self._progress_queue.get()) is not None:
+            job_id, stage, done, total = message
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    self._update_progress(job, stage, done, total)
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                self._saved_at.pop(job_id, None)
+
+    def submit(self, request: AnalysisJobRequest) -> Job:
+        """Queue an analysis and return its job. Must be called from the event loop."""
+        with self._lock:
+            self._prune()
+            pending = sum(job.finished_at is None for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many pending jobs, try again later",
+                    headers={"Retry-After": "30"},
+                )
+            job = Job(request)
+            self._jobs[job.id] = job
+            if self.backend == "process" and self._executor is None:
+                self._start_workers()
+        self._save(job)
+
+        task = asyncio.create_task(self._run(job), name=f"job-{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job) -> None:
+        try:
+            if self._executor is not None:
+                future = self._executor.submit(run_analysis_in_worker, job.id, job.request)
+                result = await asyncio.wrap_future(future)
+            else:
+                if self._semaphore is None:
+                    self._semaphore = asyncio.Semaphore(self.max_workers)
+                async with self._semaphore:
+                    with progress_reporter(lambda *progress: self._update_progress(job, *progress)):
+                        self._update_progress(job, "reviews", 0, job.request.num_reviews)
+                        result = await run_analysis(job.request)
+        except JobError as e:
+            job.error = e
+        except HTTPException as e:
+            job.error = JobError(e.status_code, str(e.detail))
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            job.error = JobError(500, str(e))
+        else:
+            # The plot and the reviews are served by the /analyses/ endpoints, the job keeps the rest
+            job.analysis_id = get_analysis_store().add(
+                StoredAnalysis(result.reviews or ReviewBatch(), plot=result.plot, plot_format=job.request.plot_format)
+            )
+            job.result = result.model_copy(update={"plot": None, "reviews": None})
+
+        with self._lock:
+            job.status = "failed" if job.error else "succeeded"
+            job.finished_at = time.time()
+            self._save(job)
+        logger.info(f"Job {job.id} {job.status} after {job.finished_at - job.created_at:.1f}s")
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job, or None if it is unknown or expired."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            state = self._store.get(job_id)
+            job = Job.from_state(state) if state is not None else None
+        return job
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+        if self._stop_sentiment_server is not None:
+            self._stop_sentiment_server()
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    """
+    Creates and returns the job queue of the process.
+    The backend is set with JOB_BACKEND ("process" or "local"), the number of concurrent jobs with JOB_WORKERS,
+    the number of unfinished jobs accepted with JOB_QUEUE_SIZE and the lifetime of finished jobs with JOB_TTL_SECONDS.
+    Jobs are shared with the other API workers through the job store at JOB_STORE_PATH, if it is set.
+
+    Returns:
+        JobQueue
+    """
+    return JobQueue(
+        backend=os.getenv("JOB_BACKEND", "process"),
+        max_workers=int(os.getenv("JOB_WORKERS", 2)),
+        max_pending=int(os.getenv("JOB_QUEUE_SIZE", 100)),
+        ttl=float(os.getenv("JOB_TTL_SECONDS", 3600)),
+    )
+
+
+def shutdown_job_queue() -> None:
+    """Cancel running jobs and stop the worker processes, if the job queue was created."""
+    if get_job_queue.cache_info().currsize == 0:
+        return
+    get_job_queue().shutdown()
+    get_job_queue.cache_clear()
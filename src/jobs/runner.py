@@ -0,0 +1,155 @@
+import os
+import asyncio
+import logging
+from multiprocessing.queues import Queue
+from typing import Literal
+
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+from src.data_analysis.plots import PlotFormat
+from src.llm.batching import SummaryMode
+from src.llm.summary_updates import SummaryTarget
+from src.models import ReviewBatch
+from src.pipeline.analysis import SentimentPrefetch, build_analysis_dag
+from src.pipeline.fan_out import SCRAPERS
+from src.pipeline.progress import progress_reporter
+from src.pipeline.stages import get_stages
+from src.storage.sync import fetch_reviews_incrementally
+
+logger = logging.getLogger(__name__)
+
+JOB_MAX_REVIEWS = 50_000
+
+# Progress queue and event loop of a worker process, set by `init_worker`
+_progress_queue: Queue | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+class JobError(Exception):
+    """Picklable failure of a job, with the status code to report it with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+    def __str__(self) -> str:
+        return self.detail
+
+
+class AnalysisJobRequest(BaseModel):
+    app_name: str
+    app_id: int | str
+    country: str = "us"
+    num_reviews: int = Field(default=1000, ge=1, le=JOB_MAX_REVIEWS)
+    reviews_source: Literal["app_store", "google_play_market"] = "app_store"
+    include_llm_summary: bool = True
+    include_metrics: bool = True
+    include_plots: bool = True
+    include_raw_data: bool = True
+    summary_mode: SummaryMode | None = None
+    plot_format: PlotFormat = "png"
+    plot_dpi: int | None = Field(default=None, ge=50, le=300)
+    rebuild_summary: bool = False
+
+
+class AnalysisJobResult(BaseModel):
+    summary: str | None = None
+    summary_update: dict | None = None
+    metrics: dict | None = None
+    plot: bytes | None = None
+    reviews: ReviewBatch | None = None
+    timings: dict
+
+    model_config = {"arbitrary_types_allowed": True}
+
+
+async def run_analysis(request: AnalysisJobRequest) -> AnalysisJobResult:
+    """
+    Run one analysis on the stages of the current process.
+    Progress is reported to the progress reporter of the calling context.
+
+    Args:
+        request: What to analyze and which outputs to produce
+
+    Returns:
+        AnalysisJobResult: Summary, metrics, the rendered plot and the analyzed reviews
+    """
+    stages = get_stages()
+    scraper = SCRAPERS[request.reviews_source]
+
+    async def fetch_reviews():
+        prefetch = SentimentPrefetch()
+        reviews = await stages["scrape"].run(
+            fetch_reviews_incrementally, scraper, request.reviews_source, request.app_name, request.app_id,
+            request.country, request.num_reviews, on_page=prefetch,
+        )
+        await prefetch.wait()
+        if not reviews:
+            raise HTTPException(status_code=404, detail="No reviews found")
+        return reviews
+
+    async def fetch_description():
+        if request.reviews_source == "google_play_market":
+            return await stages["scrape"].run(scraper.afetch_app_description, request.app_id, request.country)
+        return None
+
+    dag = build_analysis_dag(
+        fetch_reviews,
+        fetch_description,
+        request.app_name,
+        include_llm_summary=request.include_llm_summary,
+        include_metrics=request.include_metrics,
+        include_plots=request.include_plots,
+        summary_mode=request.summary_mode,
+        plot_format=request.plot_format,
+        plot_dpi=request.plot_dpi,
+        plot_bytes=True,
+        summary_target=SummaryTarget(
+            request.reviews_source, request.app_id, request.country, request.num_reviews, rebuild=request.rebuild_summary
+        ),
+    )
+    results = await dag.run()
+    summary_update = results.get("summary_update")
+
+    return AnalysisJobResult(
+        summary=results.get("summary"),
+        summary_update=summary_update.to_dict() if summary_update is not None else None,
+        metrics=results.get("metrics") if request.include_metrics else None,
+        plot=results.get("plots"),
+        reviews=results["sentiment"] if request.include_raw_data else None,
+        timings=dag.timings,
+    )
+
+
+def init_worker(progress_queue: Queue, sentiment_server: tuple[str, str] | None = None) -> None:
+    """Initializer of worker processes, `sentiment_server` is the address and key of the model to label reviews with."""
+    global _progress_queue, _loop
+    _progress_queue = progress_queue
+    if sentiment_server is not None:
+        os.environ["SENTIMENT_SERVER_ADDRESS"], os.environ["SENTIMENT_SERVER_AUTHKEY"] = sentiment_server
+    # Stages and the HTTP client are bound to an event loop, so every job of the worker runs on the same one
+    _loop = asyncio.new_event_loop()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+
+def run_analysis_in_worker(job_id: str, request: AnalysisJobRequest) -> AnalysisJobResult:
+    """Entry point of worker processes: run an analysis and send its progress to the API process."""
+
+    def report(stage: str, done: int, total: int | None) -> None:
+        _progress_queue.put((job_id, stage, done, total))
+
+    async def run() -> AnalysisJobResult:
+        report("reviews", 0, request.num_reviews)
+        # HTTPException cannot be pickled back to the API process
+        try:
+            with progress_reporter(report):
+                return await run_analysis(request)
+        except HTTPException as e:
+            raise JobError(e.status_code, str(e.detail)) from None
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            raise JobError(500, str(e)) from None
+
+    return _loop.run_until_complete(run())
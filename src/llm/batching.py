@@ -0,0 +1,119 @@
+import os
+import math
+import hashlib
+import logging
+from typing import Literal
+
+from src.models import ReviewBatch, ReviewRecord
+
+logger = logging.getLogger(__name__)
+
+# How batches are combined into one summary, see `generate_summary`
+SummaryMode = Literal["refine", "map_reduce"]
+
+# Rough characters-per-token ratio of Claude tokenizers on English and European-language text
+CHARS_PER_TOKEN = 4
+# Per-review overhead of the prompt template: numbering, <review> tags and newlines
+REVIEW_OVERHEAD_TOKENS = 8
+# On average one review in this many is an anchor, after which a batch that is full enough is closed
+ANCHOR_EVERY = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text without calling the tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def serialize_review(review: ReviewRecord, max_chars: int | None = None, weight: int = 1) -> str:
+    """
+    Serialize a review for the prompt, keeping only what the analysis needs.
+
+    Args:
+        review: Review to serialize
+        max_chars: Maximum length of the review text, longer texts are trimmed (default: LLM_REVIEW_MAX_CHARS or 1000)
+        weight: Number of similar reviews this review stands for, shown as "×N" when above 1
+
+    Returns:
+        str: e.g. "×12 | 4/5 | Positive | Works great but drains the battery"
+    """
+    max_chars = max_chars or int(os.getenv("LLM_REVIEW_MAX_CHARS", 1000))
+    text = " ".join(review.review_text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+    parts = [f"×{weight}"] if weight > 1 else []
+    parts.append(f"{review.rating}/5")
+    if review.sentiment:
+        parts.append(str(review.sentiment))
+    parts.append(text)
+    return " | ".join(parts)
+
+
+def _is_anchor(serialized: str) -> bool:
+    digest = hashlib.blake2b(serialized.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % ANCHOR_EVERY == 0
+
+
+def plan_batches(
+    reviews: ReviewBatch,
+    weights: list[int] | None = None,
+    token_budget: int | None = None,
+    max_batch_size: int | None = None,
+    min_fill: float | None = None,
+) -> list[list[str]]:
+    """
+    Pack serialized reviews into batches by estimated token count.
+
+    Reviews keep their order. A batch is closed when the next review would exceed the token budget or
+    the batch already holds `max_batch_size` reviews, so short reviews share fewer, fuller LLM calls.
+
+    Once a batch is `min_fill` full, it is also closed after an anchor review, picked by a hash of its
+    serialized text. Boundaries then depend on the reviews around them rather than on where the first
+    batch started, so when new reviews are added in front, the batches after the first anchor come out
+    the same and their LLM responses are served from the LLM cache.
+
+    Args:
+        reviews: Reviews to pack
+        weights: Number of similar reviews each review stands for, see `reduce_reviews`
+        token_budget: Estimated review tokens per batch (default: LLM_BATCH_TOKEN_BUDGET or 8000)
+        max_batch_size: Maximum number of reviews per batch (default: LLM_BATCH_SIZE or 200)
+        min_fill: Share of the token budget or batch size from which a batch is closed after an anchor,
+            1 packs batches as full as possible (default: LLM_BATCH_MIN_FILL or 0.75)
+
+    Returns:
+        list[list[str]]: Batches of serialized reviews
+    """
+    token_budget = token_budget or int(os.getenv("LLM_BATCH_TOKEN_BUDGET", 8000))
+    max_batch_size = max_batch_size or int(os.getenv("LLM_BATCH_SIZE", 200))
+    min_fill = min_fill if min_fill is not None else float(os.getenv("LLM_BATCH_MIN_FILL", 0.75))
+
+    batches: list[list[str]] = []
+    batch_tokens: list[int] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    weights = weights or [1] * len(reviews)
+    for review, weight in zip(reviews, weights):
+        serialized = serialize_review(review, weight=weight)
+        tokens = estimate_tokens(serialized) + REVIEW_OVERHEAD_TOKENS
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            batch_tokens.append(current_tokens)
+            current, current_tokens = [], 0
+        current.append(serialized)
+        current_tokens += tokens
+        full_enough = current_tokens >= min_fill * token_budget or len(current) >= min_fill * max_batch_size
+        if min_fill < 1 and full_enough and _is_anchor(serialized):
+            batches.append(current)
+            batch_tokens.append(current_tokens)
+            current, current_tokens = [], 0
+
+    if current:
+        batches.append(current)
+        batch_tokens.append(current_tokens)
+
+    logger.info(
+        f"Planned {len(batches)} LLM batches for {len(reviews)} reviews, "
+        f"~{sum(batch_tokens)} review tokens (per batch: {batch_tokens})"
+    )
+    return batches
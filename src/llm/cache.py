@@ -0,0 +1,196 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from abc import abstractmethod
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+logger = logging.getLogger(__name__)
+
+CacheValue = Sequence[Generation]
+
+
+def _key(prompt: str, llm_string: str) -> str:
+    # The LLM string holds the model name and its parameters (temperature, max tokens, ...)
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class _CountingCache(BaseCache):
+    """
+    LangChain LLM cache that keeps hit and miss counters.
+
+    It is set on the chat model, so every LLM call is cached on its own. That covers the per-batch
+    summaries and merges of a chain. Subclasses store entries by a hash of the rendered prompt and the
+    model parameters, so only identical prompts hit: partially overlapping review sets reuse the map step
+    batches they share, whose boundaries `plan_batches` keeps content-stable, but not refine steps, which
+    embed the running summary, nor batches of reviews that were sampled differently.
+    """
+
+    backend = ""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def _get(self, key: str) -> CacheValue | None:
+        """Return the cached value of a key, or None if it is missing or expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value: CacheValue) -> None:
+        """Store the value of a key."""
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def lookup(self, prompt: str, llm_string: str) -> CacheValue | None:
+        value = self._get(_key(prompt, llm_string))
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: CacheValue) -> None:
+        self._set(_key(prompt, llm_string), return_val)
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryLLMCache(_CountingCache):
+    """In-process LRU cache of LLM responses with a time to live."""
+
+    backend = "memory"
+
+    def __init__(self, maxsize: int = 1000, ttl: float | None = None):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, CacheValue]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> CacheValue | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[0]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value: CacheValue) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Lookups are cheap, so the async API does not need to go through an executor
+    async def alookup(self, prompt: str, llm_string: str) -> CacheValue | None:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: CacheValue) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    @property
+    def stats(self) -> dict:
+        return {**super().stats, "entries": len(self._entries)}
+
+
+class SQLiteLLMCache(_CountingCache):
+    """On-disk cache of LLM responses that survives restarts, with a time to live."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str | Path, ttl: float | None = None):
+        super().__init__(ttl)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses (key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            if ttl is not None:
+                deleted = conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (time.time() - ttl,)).rowcount
+                if deleted:
+                    logger.info(f"Dropped {deleted} expired LLM responses")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, key: str) -> CacheValue | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT created_at, value FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        if row is None or self._expired(row[0]):
+            return None
+        try:
+            return loads(row[1])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached LLM response: {e}")
+            return None
+
+    def _set(self, key: str, value: CacheValue) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, created_at, value) VALUES (?, ?, ?)",
+                (key, time.time(), dumps(list(value))),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> _CountingCache | None:
+    """
+    Creates and returns the cached LLM response cache.
+    The backend is set with LLM_CACHE_BACKEND ("memory", "sqlite" or "none"), entries expire after
+    LLM_CACHE_TTL_SECONDS. The memory backend keeps LLM_CACHE_SIZE responses, the sqlite backend
+    stores them in LLM_CACHE_PATH.
+
+    Returns:
+        _CountingCache | None: LLM cache, or None when caching is disabled
+    """
+    backend = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", 86400)) or None
+
+    if backend == "memory":
+        return MemoryLLMCache(maxsize=int(os.getenv("LLM_CACHE_SIZE", 1000)), ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteLLMCache(os.getenv("LLM_CACHE_PATH", "data/llm_cache.db"), ttl=ttl)
+    if backend != "none":
+        raise ValueError(f"Unknown LLM_CACHE_BACKEND '{backend}', expected 'memory', 'sqlite' or 'none'")
+    return None
@@ -1,22 +1,32 @@
 import os
-from langchain_anthropic import ChatAnthropic
 from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from src.llm.cache import get_llm_cache
+
+if TYPE_CHECKING:
+    from langchain_anthropic import ChatAnthropic
 
 
 @lru_cache(maxsize=1)
-def get_anthropic_llm() -> ChatAnthropic:
+def get_anthropic_llm() -> "ChatAnthropic":
     """
     Creates and returns a cached LangChain chat model.
     The model is cached to avoid recreating it on every call.
+    Responses are cached per LLM call by the backend configured with LLM_CACHE_BACKEND.
+    Calls are not streamed unless the chain is streamed, e.g. for the last call of a streamed summary.
 
     Returns:
         ChatAnthropic: A LangChain chat model.
     """
+    # The Anthropic SDK takes seconds to import, so it is loaded with the first summary
+    from langchain_anthropic import ChatAnthropic
+
     llm = ChatAnthropic(
         model=os.getenv("ANTHROPIC_MODEL"),
         api_key=os.getenv("ANTHROPIC_API_KEY"),
-        streaming=False,
         temperature=os.getenv("ANTHROPIC_TEMPERATURE"),
         max_retries=3,
+        cache=get_llm_cache(),
     )
     return llm
@@ -1,23 +1,41 @@
+import hashlib
+import threading
+
+from jinja2 import Template
 from jinja2.sandbox import SandboxedEnvironment
 from langchain_core.prompts.string import DEFAULT_FORMATTER_MAPPING
 
 ENV = SandboxedEnvironment(trim_blocks=True, lstrip_blocks=True)
 
+# Compiled templates by SHA-256 of their source. The prompts are a handful of fixed files, the bound
+# only matters if templates are ever built from changing strings.
+MAX_COMPILED_TEMPLATES = 128
+
+_compiled: dict[str, Template] = {}
+_compiled_lock = threading.Lock()
 
-def my_jinja2_formatter(template: str, **kwargs) -> str:
-    return ENV.from_string(template).render(**kwargs)
 
+def compile_template(source: str) -> Template:
+    """Compile a Jinja template, or return the compiled template of the same source from an earlier call."""
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    template = _compiled.get(key)
+    if template is None:
+        template = ENV.from_string(source)
+        with _compiled_lock:
+            if len(_compiled) >= MAX_COMPILED_TEMPLATES:
+                _compiled.pop(next(iter(_compiled)))
+            _compiled[key] = template
+    return template
 
-def recursive_jinja2_formatter(template: str, **kwargs) -> str:
-    MAX_DEPTH = 5
-    res = template
 
-    for _ in range(MAX_DEPTH):
-        res = my_jinja2_formatter(res, **kwargs)
-        if "{{" not in res and "{%" not in res:
-            break
+def jinja2_formatter(template: str, **kwargs) -> str:
+    """
+    Render a prompt template in a single pass.
 
-    return res
+    The values are inserted as plain text and never rendered themselves, so review texts or summaries
+    that contain "{{" or "{%" end up in the prompt as they are.
+    """
+    return compile_template(template).render(**kwargs)
 
 
-DEFAULT_FORMATTER_MAPPING["jinja2"] = recursive_jinja2_formatter
+DEFAULT_FORMATTER_MAPPING["jinja2"] = jinja2_formatter
@@ -1,46 +1,304 @@
 import os
+import time
 import logging
+from uuid import UUID
+from typing import Callable, NamedTuple
 from fastapi import HTTPException
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
 from langchain_core.runnables import RunnableLambda, RunnableSerializable
 from langchain_core.language_models import BaseChatModel
 
-from src.models import Review
-from src.llm.prompts import OVERVIEW_PROMPT
+from src.models import ReviewBatch
+from src.llm.batching import SummaryMode, plan_batches
+from src.llm.prompts import get_merge_prompt, get_overview_prompt
 from src.llm.chat_models import get_anthropic_llm
 from src.llm.output_parser import XMLToMarkdownParser
+from src.pipeline.instrumentation import observe_llm_tokens, observe_stage
+from src.pipeline.progress import report_progress
 
 logger = logging.getLogger(__name__)
 
 
-def _get_lcel_pipeline(llm: BaseChatModel, app_name: str, app_description: str) -> RunnableSerializable[list[Review], str]:
-    bs = int(os.getenv("LLM_BATCH_SIZE", 50))
-    split_reviews_chain = RunnableLambda(lambda x: [x[i:i + bs] for i in range(0, len(x), bs)])
-    single_analyze_chain: RunnableSerializable = (
-        OVERVIEW_PROMPT.partial(app_name=app_name, app_description=app_description)
+class _InstrumentationCallback(BaseCallbackHandler):
+    """Records the duration and, where the model reports it, the token usage of every LLM call."""
+
+    def __init__(self):
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            observe_stage("llm_batch", time.perf_counter() - started)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                # Cached responses may come back with only a zeroed cost
+                if usage:
+                    observe_llm_tokens(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._started.pop(run_id, None)
+
+
+class _FinalCall(NamedTuple):
+    """The last LLM call of a summary, whose output is the summary itself. Kept apart so it can be streamed."""
+
+    chain: RunnableSerializable
+    input: dict
+    progress: tuple[int, int] | None = None
+
+
+def _split_reviews_chain() -> RunnableLambda:
+    return RunnableLambda(lambda x: plan_batches(x["reviews"], weights=x.get("weights")))
+
+
+def _get_single_analyze_chain(llm: BaseChatModel, app_name: str, app_description: str) -> RunnableSerializable:
+    return (
+        get_overview_prompt().partial(app_name=app_name, app_description=app_description)
         | llm
         | XMLToMarkdownParser()
     )
 
+
+def _get_lcel_pipeline(
+    llm: BaseChatModel, app_name: str, app_description: str, previous_summary: str = ""
+) -> RunnableSerializable[dict, _FinalCall | str]:
+    single_analyze_chain = _get_single_analyze_chain(llm, app_name, app_description)
+
+    def _final_call(reviews_batches, summary):
+        total = len(reviews_batches)
+        return _FinalCall(single_analyze_chain, {"reviews": reviews_batches[-1], "summary": summary}, (total, total))
+
     def loop_func(reviews_batches):
-        summary = ""
-        for batch in reviews_batches:
+        if not reviews_batches:
+            return previous_summary
+
+        summary = previous_summary
+        for i, batch in enumerate(reviews_batches[:-1], start=1):
             summary = single_analyze_chain.invoke({"reviews": batch, "summary": summary})
+            report_progress("llm_batches", i, len(reviews_batches))
+
+        return _final_call(reviews_batches, summary)
 
-        return summary
+    async def aloop_func(reviews_batches):
+        if not reviews_batches:
+            return previous_summary
+
+        summary = previous_summary
+        for i, batch in enumerate(reviews_batches[:-1], start=1):
+            summary = await single_analyze_chain.ainvoke({"reviews": batch, "summary": summary})
+            report_progress("llm_batches", i, len(reviews_batches))
+
+        return _final_call(reviews_batches, summary)
 
     lcel_pipeline = (
-        split_reviews_chain
-        | loop_func
+        _split_reviews_chain()
+        | RunnableLambda(loop_func, afunc=aloop_func)
     )
-    
+
     return lcel_pipeline
 
 
-def generate_summary(reviews: list[Review], app_name: str, app_description: str) -> str:
+def _get_map_reduce_pipeline(llm: BaseChatModel, app_name: str, app_description: str) -> RunnableSerializable[dict, _FinalCall | str]:
+    """
+    Summarize every batch independently, then merge the partial summaries as a tree.
+
+    Batches in the map step and groups within each reduce level are sent to the LLM concurrently,
+    so the number of sequential LLM round trips grows with log(batches) instead of linearly.
+    """
+    max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 5))
+    fan_in = max(int(os.getenv("LLM_REDUCE_FAN_IN", 4)), 2)
+    config = {"max_concurrency": max_concurrency}
+
+    single_analyze_chain = _get_single_analyze_chain(llm, app_name, app_description)
+    merge_chain: RunnableSerializable = (
+        get_merge_prompt().partial(app_name=app_name, app_description=app_description)
+        | llm
+        | XMLToMarkdownParser()
+    )
+
+    def _map_inputs(reviews_batches):
+        return [{"reviews": batch, "summary": ""} for batch in reviews_batches]
+
+    def _reduce_level(summaries):
+        groups = [summaries[i:i + fan_in] for i in range(0, len(summaries), fan_in)]
+        # A trailing single-summary group has nothing to merge and moves up a level as is
+        carried = groups.pop()[0] if len(groups[-1]) == 1 else None
+        return [{"summaries": group} for group in groups], carried
+
+    def _single_batch(reviews_batches):
+        # A single batch has nothing to merge, its summary is the final one
+        return _FinalCall(single_analyze_chain, _map_inputs(reviews_batches)[0], (1, 1))
+
+    def map_func(reviews_batches):
+        if len(reviews_batches) == 1:
+            return _single_batch(reviews_batches)
+
+        summaries = [None] * len(reviews_batches)
+        for done, (i, summary) in enumerate(
+            single_analyze_chain.batch_as_completed(_map_inputs(reviews_batches), config=config), start=1
+        ):
+            summaries[i] = summary
+            report_progress("llm_batches", done, len(reviews_batches))
+        return summaries
+
+    async def amap_func(reviews_batches):
+        if len(reviews_batches) == 1:
+            return _single_batch(reviews_batches)
+
+        summaries = [None] * len(reviews_batches)
+        done = 0
+        async for i, summary in single_analyze_chain.abatch_as_completed(_map_inputs(reviews_batches), config=config):
+            summaries[i] = summary
+            done += 1
+            report_progress("llm_batches", done, len(reviews_batches))
+        return summaries
+
+    def reduce_func(summaries):
+        if isinstance(summaries, _FinalCall) or not summaries:
+            return summaries or ""
+
+        # Levels are merged until the remaining summaries fit into the final merge
+        while len(summaries) > fan_in:
+            inputs, carried = _reduce_level(summaries)
+            summaries = merge_chain.batch(inputs, config=config)
+            if carried is not None:
+                summaries.append(carried)
+
+        return _FinalCall(merge_chain, {"summaries": summaries})
+
+    async def areduce_func(summaries):
+        if isinstance(summaries, _FinalCall) or not summaries:
+            return summaries or ""
+
+        while len(summaries) > fan_in:
+            inputs, carried = _reduce_level(summaries)
+            summaries = await merge_chain.abatch(inputs, config=config)
+            if carried is not None:
+                summaries.append(carried)
+
+        return _FinalCall(merge_chain, {"summaries": summaries})
+
+    lcel_pipeline = (
+        _split_reviews_chain()
+        | RunnableLambda(map_func, afunc=amap_func)
+        | RunnableLambda(reduce_func, afunc=areduce_func)
+    )
+
+    return lcel_pipeline
+
+
+def _get_prepare_pipeline(
+    llm: BaseChatModel, app_name: str, app_description: str, mode: SummaryMode | None, previous_summary: str | None = None
+) -> RunnableSerializable[dict, _FinalCall | str]:
+    """Pipeline of all LLM calls of a summary but the last one, which is returned to run, or the summary if there is none."""
+    mode = mode or os.getenv("LLM_SUMMARY_MODE", "refine")
+    # Refining is what folds new reviews into an existing summary, so a previous summary always refines
+    if mode == "map_reduce" and not previous_summary:
+        return _get_map_reduce_pipeline(llm, app_name, app_description)
+    return _get_lcel_pipeline(llm, app_name, app_description, previous_summary or "")
+
+
+def _run_final_call(prepared: _FinalCall | str) -> str:
+    if isinstance(prepared, str):
+        return prepared
+    summary = prepared.chain.invoke(prepared.input)
+    if prepared.progress is not None:
+        report_progress("llm_batches", *prepared.progress)
+    return summary
+
+
+async def _arun_final_call(prepared: _FinalCall | str) -> str:
+    if isinstance(prepared, str):
+        return prepared
+    summary = await prepared.chain.ainvoke(prepared.input)
+    if prepared.progress is not None:
+        report_progress("llm_batches", *prepared.progress)
+    return summary
+
+
+def _get_pipeline(
+    llm: BaseChatModel, app_name: str, app_description: str, mode: SummaryMode | None, previous_summary: str | None = None
+) -> RunnableSerializable[dict, str]:
+    prepare_chain = _get_prepare_pipeline(llm, app_name, app_description, mode, previous_summary)
+    return prepare_chain | RunnableLambda(_run_final_call, afunc=_arun_final_call)
+
+
+def generate_summary(
+    reviews: ReviewBatch,
+    app_name: str,
+    app_description: str,
+    mode: SummaryMode | None = None,
+    llm: BaseChatModel | None = None,
+    weights: list[int] | None = None,
+    previous_summary: str | None = None,
+) -> str:
+    """
+    Generate an LLM summary of the reviews.
+
+    Args:
+        reviews: Reviews to summarize
+        app_name: Name of the app
+        app_description: App description passed to the prompt, if available
+        mode: "refine" folds batches into a running summary one at a time, "map_reduce" summarizes
+            batches concurrently and merges them hierarchically (default: LLM_SUMMARY_MODE or "refine")
+        llm: Chat model to use (default: the cached Anthropic model)
+        weights: Number of similar reviews each review stands for, as returned by `reduce_reviews`
+        previous_summary: Summary of earlier reviews to refine with these reviews, in refine mode whatever `mode` is
+
+    Returns:
+        str: Markdown formatted summary
+    """
     try:
-        llm = get_anthropic_llm()
-        chain = _get_lcel_pipeline(llm, app_name, app_description)
-        return chain.invoke(reviews)
+        chain = _get_pipeline(llm or get_anthropic_llm(), app_name, app_description, mode, previous_summary)
+        return chain.invoke({"reviews": reviews, "weights": weights}, config={"callbacks": [_InstrumentationCallback()]})
+    except Exception as e:
+        logger.error(f"Error generating overview: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def agenerate_summary(
+    reviews: ReviewBatch,
+    app_name: str,
+    app_description: str,
+    mode: SummaryMode | None = None,
+    llm: BaseChatModel | None = None,
+    weights: list[int] | None = None,
+    previous_summary: str | None = None,
+    on_chunk: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Async version of `generate_summary` that awaits the LLM without blocking the event loop.
+
+    With `on_chunk`, the last LLM call, whose output is the summary, is streamed and every piece of
+    markdown is passed to `on_chunk` as it arrives. The earlier refine batches or map and merge calls
+    only produce intermediate summaries and are not streamed.
+    """
+    config = {"callbacks": [_InstrumentationCallback()]}
+    try:
+        llm = llm or get_anthropic_llm()
+        if on_chunk is None:
+            chain = _get_pipeline(llm, app_name, app_description, mode, previous_summary)
+            return await chain.ainvoke({"reviews": reviews, "weights": weights}, config=config)
+
+        prepare_chain = _get_prepare_pipeline(llm, app_name, app_description, mode, previous_summary)
+        prepared = await prepare_chain.ainvoke({"reviews": reviews, "weights": weights}, config=config)
+        if isinstance(prepared, str):
+            if prepared:
+                on_chunk(prepared)
+            return prepared
+
+        chunks = []
+        async for chunk in prepared.chain.astream(prepared.input, config=config):
+            chunks.append(chunk)
+            on_chunk(chunk)
+        if prepared.progress is not None:
+            report_progress("llm_batches", *prepared.progress)
+        return "".join(chunks)
     except Exception as e:
         logger.error(f"Error generating overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,118 @@
 import re
+from typing import AsyncIterator, Iterator
 from langchain_core.exceptions import OutputParserException
-from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import BaseTransformOutputParser
 
+OPEN_TAG = re.compile(r'<(\w+)>')
+# A "<" followed by these characters may still turn into an opening tag once the next chunk arrives
+PARTIAL_OPEN_TAG = re.compile(r'<\w*')
 
-class XMLToMarkdownParser(BaseOutputParser):
-    """Parser that converts XML-style tags to markdown headers."""
+
+def _header(tag: str) -> str:
+    return f"**{tag.replace('_', ' ').title()}**:\n"
+
+
+def _collapse_newlines(text: str) -> str:
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def _chunk_text(chunk: str | BaseMessage) -> str:
+    # Read the content rather than `BaseMessage.text`, a method in older langchain-core and a property in newer
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in chunk.content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
+
+
+class XMLToMarkdownStream:
+    """
+    Converts XML-style tags to markdown headers chunk by chunk, as `XMLToMarkdownParser.parse` does on a full text.
+
+    Text is returned as soon as it can't be part of a tag anymore. Only the start of a tag and whitespace
+    that may turn out to be trailing are held back until the next chunk, or `close`.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._tag: str | None = None
+        # Whitespace after the last text, dropped if a tag closes or the text ends right after it
+        self._whitespace = ""
+        self._strip_leading = True
+        # End of the markdown returned so far, to collapse blank lines across chunks
+        self._tail = ""
+
+    def _emit(self, text: str) -> str:
+        collapsed = _collapse_newlines(self._tail + text)[len(self._tail):]
+        self._tail = (self._tail + collapsed)[-2:]
+        return collapsed
+
+    def _text(self, text: str) -> str:
+        combined = self._whitespace + text
+        content = combined.rstrip()
+        self._whitespace = combined[len(content):]
+        if self._strip_leading:
+            content = content.lstrip()
+        if not content:
+            return ""
+        self._strip_leading = False
+        return self._emit(content)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of the LLM output and return the markdown that is final so far."""
+        self._buffer += chunk
+        output = []
+        while self._buffer:
+            position = self._buffer.find("<")
+            if position == -1:
+                output.append(self._text(self._buffer))
+                self._buffer = ""
+                break
+            output.append(self._text(self._buffer[:position]))
+            self._buffer = self._buffer[position:]
+
+            if self._tag is None:
+                match = OPEN_TAG.match(self._buffer)
+                if match:
+                    leading = "" if self._strip_leading else self._whitespace
+                    output.append(self._emit(leading + _header(match.group(1))))
+                    self._tag, self._whitespace, self._strip_leading = match.group(1), "", True
+                    self._buffer = self._buffer[match.end():]
+                    continue
+                if PARTIAL_OPEN_TAG.fullmatch(self._buffer):
+                    break
+            else:
+                closing = f"</{self._tag}>"
+                if self._buffer.startswith(closing):
+                    # A section ends with a blank line, which is only returned if anything follows it
+                    self._tag, self._whitespace, self._strip_leading = None, "\n\n", False
+                    self._buffer = self._buffer[len(closing):]
+                    continue
+                if closing.startswith(self._buffer):
+                    break
+
+            output.append(self._text("<"))
+            self._buffer = self._buffer[1:]
+        return "".join(output)
+
+    def close(self) -> str:
+        """Return the rest of the markdown once the LLM output is complete."""
+        buffer, self._buffer = self._buffer, ""
+        return self._text(buffer)
+
+
+class XMLToMarkdownParser(BaseTransformOutputParser[str]):
+    """
+    Parser that converts XML-style tags to markdown headers.
+
+    When the chain is streamed, the output is converted incrementally and every chunk carries the markdown
+    that became final with it. A tag that is never closed is converted too, unlike with `parse`.
+    """
 
     def parse(self, text: str) -> str:
         try:
@@ -21,10 +129,30 @@ class XMLToMarkdownParser(BaseOutputParser):
             result = re.sub(r'\n{3,}', '\n\n', result)
 
             return result.strip()
-            
+
         except Exception as e:
             raise OutputParserException(f"XMLToMarkdownParser failed to parse XML tags to markdown: {str(e)}")
 
+    def _transform(self, input: Iterator[str | BaseMessage]) -> Iterator[str]:
+        stream = XMLToMarkdownStream()
+        for chunk in input:
+            markdown = stream.feed(_chunk_text(chunk))
+            if markdown:
+                yield markdown
+        markdown = stream.close()
+        if markdown:
+            yield markdown
+
+    async def _atransform(self, input: AsyncIterator[str | BaseMessage]) -> AsyncIterator[str]:
+        stream = XMLToMarkdownStream()
+        async for chunk in input:
+            markdown = stream.feed(_chunk_text(chunk))
+            if markdown:
+                yield markdown
+        markdown = stream.close()
+        if markdown:
+            yield markdown
+
     @property
     def _type(self) -> str:
-        return "xml_to_markdown_parser"
\ No newline at end of file
+        return "xml_to_markdown_parser"
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 
 from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
@@ -5,13 +6,26 @@ from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplat
 from src.llm.jinja_config import DEFAULT_FORMATTER_MAPPING  # noqa: F401
 
 
-with (
-    Path(__file__).parent.joinpath("system.jinja2").open("r") as f_system,
-    Path(__file__).parent.joinpath("human.jinja2").open("r") as f_human,
-):
-    OVERVIEW_PROMPT = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(f_system.read().strip(), template_format="jinja2"),
-            HumanMessagePromptTemplate.from_template(f_human.read().strip(), template_format="jinja2"),
-        ]
-    )
+def _load_prompt(system_file: str, human_file: str) -> ChatPromptTemplate:
+    with (
+        Path(__file__).parent.joinpath(system_file).open("r") as f_system,
+        Path(__file__).parent.joinpath(human_file).open("r") as f_human,
+    ):
+        return ChatPromptTemplate.from_messages(
+            [
+                SystemMessagePromptTemplate.from_template(f_system.read().strip(), template_format="jinja2"),
+                HumanMessagePromptTemplate.from_template(f_human.read().strip(), template_format="jinja2"),
+            ]
+        )
+
+
+@lru_cache(maxsize=1)
+def get_overview_prompt() -> ChatPromptTemplate:
+    """Prompt that summarizes a batch of reviews, refining the summary of the previous batches if given."""
+    return _load_prompt("system.jinja2", "human.jinja2")
+
+
+@lru_cache(maxsize=1)
+def get_merge_prompt() -> ChatPromptTemplate:
+    """Prompt that merges partial summaries of the map-reduce mode."""
+    return _load_prompt("merge_system.jinja2", "merge_human.jinja2")
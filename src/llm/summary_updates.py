@@ -0,0 +1,184 @@
+import os
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Literal, NamedTuple
+
+from src.models import ReviewBatch
+from src.storage.summary_store import StoredSummary, get_summary_store
+
+logger = logging.getLogger(__name__)
+
+# Why a summary is rebuilt from all reviews instead of refined with the new ones
+RebuildReason = Literal["requested", "no_summary", "scope", "window", "stale", "updates", "new_share", "drift"]
+
+
+class SummaryTarget(NamedTuple):
+    """App, store and country whose stored summary an analysis brings up to date."""
+
+    source: str
+    app_id: int | str
+    country: str
+    num_reviews: int
+    rebuild: bool = False
+
+
+class SummaryUpdate:
+    """
+    Plan for bringing the stored summary of an app up to date with the reviews of an analysis.
+
+    An incremental update refines the previous summary with the reviews newer than it covers, and leaves
+    it unchanged if there are none. A full rebuild summarizes all reviews of the analysis.
+    """
+
+    __slots__ = ("target", "previous", "reviews", "rebuild_reason", "version")
+
+    def __init__(
+        self,
+        target: SummaryTarget,
+        previous: StoredSummary | None,
+        reviews: ReviewBatch,
+        rebuild_reason: RebuildReason | None,
+    ):
+        self.target = target
+        self.previous = previous
+        # Reviews to summarize: the new ones for an incremental update, all of them for a rebuild
+        self.reviews = reviews
+        self.rebuild_reason = rebuild_reason
+        self.version: int | None = None
+
+    @property
+    def incremental(self) -> bool:
+        return self.rebuild_reason is None
+
+    @property
+    def unchanged(self) -> bool:
+        return self.incremental and not self.reviews
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "update": "unchanged" if self.unchanged else "incremental" if self.incremental else "full",
+            "rebuild_reason": self.rebuild_reason,
+            "reviews_summarized": len(self.reviews),
+        }
+
+
+def sentiment_drift(before: dict[str, int], after: dict[str, int]) -> float:
+    """Total variation distance between two sentiment distributions given as counts, from 0 (same) to 1."""
+    before_total, after_total = sum(before.values()), sum(after.values())
+    if not before_total or not after_total:
+        return 0.0
+    labels = set(before) | set(after)
+    return sum(abs(before.get(label, 0) / before_total - after.get(label, 0) / after_total) for label in labels) / 2
+
+
+def _sentiment_counts(reviews: ReviewBatch) -> dict[str, int]:
+    return dict(Counter(label for label in reviews.sentiment if label))
+
+
+def _rebuild_reason(
+    target: SummaryTarget, previous: StoredSummary | None, reviews: ReviewBatch, new: ReviewBatch
+) -> RebuildReason | None:
+    if target.rebuild:
+        return "requested"
+    if previous is None:
+        return "no_summary"
+    if previous.num_reviews != target.num_reviews:
+        return "scope"
+    if len(new) == len(reviews):
+        # All reviews are newer than the summary, it doesn't cover any review of this analysis
+        return "window"
+
+    max_age = timedelta(days=float(os.getenv("SUMMARY_MAX_AGE_DAYS", 7)))
+    if datetime.now(timezone.utc) - previous.rebuilt_at > max_age:
+        return "stale"
+    if not new:
+        return None
+
+    if previous.updates_since_rebuild >= int(os.getenv("SUMMARY_MAX_UPDATES", 30)):
+        return "updates"
+    added = previous.review_count - previous.rebuild_review_count + len(new)
+    if added > float(os.getenv("SUMMARY_MAX_NEW_SHARE", 1.0)) * previous.rebuild_review_count:
+        return "new_share"
+    if len(new) >= int(os.getenv("SUMMARY_DRIFT_MIN_REVIEWS", 20)):
+        drift = sentiment_drift(previous.sentiment_counts, _sentiment_counts(new))
+        if drift > float(os.getenv("SUMMARY_DRIFT_THRESHOLD", 0.25)):
+            return "drift"
+    return None
+
+
+def plan_summary_update(target: SummaryTarget, reviews: ReviewBatch) -> SummaryUpdate | None:
+    """
+    Decide whether the stored summary of the target is refined with the new reviews or rebuilt.
+
+    The summary is rebuilt when asked to, when there is none or it was built for a different number of
+    reviews, and when none of the reviews are covered by it anymore. It is also rebuilt when a threshold
+    is crossed since the last rebuild: SUMMARY_MAX_AGE_DAYS passed, SUMMARY_MAX_UPDATES incremental updates
+    were made, more than SUMMARY_MAX_NEW_SHARE times the reviews of the rebuild were added, or the sentiment
+    of the new reviews drifts from the summarized ones by more than SUMMARY_DRIFT_THRESHOLD (total variation
+    distance, checked from SUMMARY_DRIFT_MIN_REVIEWS new reviews).
+
+    Args:
+        target: App, store and country of the analysis
+        reviews: Reviews of the analysis, with sentiment labels
+
+    Returns:
+        SummaryUpdate | None: The plan, or None if the summary store is disabled
+    """
+    store = get_summary_store()
+    if store is None:
+        return None
+
+    previous = store.latest(target.source, target.app_id, target.country)
+    new = reviews
+    if previous is not None:
+        new = reviews.take(i for i, date in enumerate(reviews.date) if date > previous.covered_until)
+
+    reason = _rebuild_reason(target, previous, reviews, new)
+    update = SummaryUpdate(target, previous, reviews if reason is not None else new, reason)
+    if reason is not None:
+        logger.info(f"Rebuilding the summary of {target.source}/{target.app_id}/{target.country} ({reason})")
+    else:
+        logger.info(f"Updating summary version {previous.version} with {len(new)} new reviews")
+    return update
+
+
+def save_summary_update(update: SummaryUpdate, summary: str) -> int:
+    """Store the summary produced for an update as a new version and return its version number."""
+    previous = update.previous
+    if update.unchanged:
+        update.version = previous.version
+        return update.version
+
+    store = get_summary_store()
+    now = datetime.now(timezone.utc)
+    covered_until = max(update.reviews.date)
+    counts = _sentiment_counts(update.reviews)
+
+    if update.incremental:
+        stored = previous._replace(
+            summary=summary,
+            covered_until=max(covered_until, previous.covered_until),
+            review_count=previous.review_count + len(update.reviews),
+            sentiment_counts=dict(Counter(previous.sentiment_counts) + Counter(counts)),
+            updates_since_rebuild=previous.updates_since_rebuild + 1,
+            created_at=now,
+        )
+    else:
+        stored = StoredSummary(
+            version=0,
+            summary=summary,
+            covered_until=covered_until,
+            review_count=len(update.reviews),
+            sentiment_counts=counts,
+            num_reviews=update.target.num_reviews,
+            rebuilt_at=now,
+            rebuild_review_count=len(update.reviews),
+            updates_since_rebuild=0,
+            created_at=now,
+        )
+
+    target = update.target
+    update.version = store.add(target.source, target.app_id, target.country, stored)
+    return update.version
@@ -1,6 +1,9 @@
 from src.models.review import Review, Sentiment
+from src.models.review_batch import ReviewBatch, ReviewRecord
 
 __all__ = [
     Review,
+    ReviewBatch,
+    ReviewRecord,
     Sentiment,
 ]
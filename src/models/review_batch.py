@@ -0,0 +1,156 @@
+from array import array
+from datetime import datetime
+from typing import Iterator, overload
+from collections.abc import Iterable, Sequence
+
+from pydantic import TypeAdapter
+
+from src.models.review import Review
+
+FIELDS = ("review_id", "source", "user_name", "country", "rating", "sentiment", "review_text", "date")
+
+_reviews_adapter = TypeAdapter(list[Review])
+
+
+class ReviewRecord:
+    """Read-only view of one review in a `ReviewBatch`, with the same attributes as `Review`."""
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "ReviewBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    review_id = property(lambda self: self._batch.review_id[self._index])
+    source = property(lambda self: self._batch.source[self._index])
+    user_name = property(lambda self: self._batch.user_name[self._index])
+    country = property(lambda self: self._batch.country[self._index])
+    rating = property(lambda self: self._batch.rating[self._index])
+    sentiment = property(lambda self: self._batch.sentiment[self._index])
+    review_text = property(lambda self: self._batch.review_text[self._index])
+    date = property(lambda self: self._batch.date[self._index])
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def to_review(self) -> Review:
+        return Review.model_validate(self.to_dict())
+
+    def __str__(self) -> str:
+        return " ".join(f"{field}={getattr(self, field)!r}" for field in FIELDS)
+
+    def __repr__(self) -> str:
+        return f"ReviewRecord({self})"
+
+
+class ReviewBatch(Sequence):
+    """
+    Struct-of-arrays container for reviews on the hot path.
+
+    Scrapers append raw values column by column without building a pydantic model per review.
+    Sentiment analysis, metrics, the LLM pipeline and the stores read the columns directly, and
+    validation into `Review` models happens once at the API edge with `to_reviews`.
+    Indexing returns a `ReviewRecord` view, slicing returns a new batch.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self):
+        self.review_id: list[str | None] = []
+        self.source: list[str] = []
+        self.user_name: list[str] = []
+        self.country: list[str] = []
+        self.rating = array("b")
+        self.sentiment: list[str | None] = []
+        self.review_text: list[str] = []
+        self.date: list[datetime] = []
+
+    def append(
+        self,
+        *,
+        review_id: str | None,
+        source: str,
+        user_name: str,
+        country: str,
+        rating: int,
+        review_text: str,
+        date: datetime,
+        sentiment: str | None = None,
+    ) -> None:
+        self.review_id.append(review_id)
+        self.source.append(source)
+        self.user_name.append(user_name)
+        self.country.append(country)
+        self.rating.append(rating)
+        self.sentiment.append(sentiment)
+        self.review_text.append(review_text)
+        self.date.append(date)
+
+    def extend(self, other: "ReviewBatch") -> None:
+        for field in FIELDS:
+            getattr(self, field).extend(getattr(other, field))
+
+    def set_sentiments(self, labels: list[str]) -> None:
+        if len(labels) != len(self):
+            raise ValueError(f"Expected {len(self)} sentiment labels, got {len(labels)}")
+        self.sentiment = [str(label) for label in labels]
+
+    @classmethod
+    def from_reviews(cls, reviews: Iterable[Review | ReviewRecord]) -> "ReviewBatch":
+        batch = cls()
+        for review in reviews:
+            batch.append(**{field: getattr(review, field) for field in FIELDS})
+        return batch
+
+    def take(self, indices: Iterable[int]) -> "ReviewBatch":
+        """Return a new batch with the reviews at the given positions."""
+        indices = list(indices)
+        batch = ReviewBatch()
+        for field in FIELDS:
+            column = getattr(self, field)
+            values = [column[i] for i in indices]
+            setattr(batch, field, array("b", values) if field == "rating" else values)
+        return batch
+
+    def copy(self) -> "ReviewBatch":
+        return self[:]
+
+    def iter_dicts(self) -> Iterator[dict]:
+        for values in zip(*(getattr(self, field) for field in FIELDS)):
+            yield dict(zip(FIELDS, values))
+
+    def to_reviews(self) -> list[Review]:
+        """Validate the batch into `Review` models in a single pass."""
+        return _reviews_adapter.validate_python(list(self.iter_dicts()))
+
+    def dump(self) -> list[dict]:
+        """Validate the batch and dump it like `Review.model_dump` does, without per-model calls."""
+        return _reviews_adapter.dump_python(self.to_reviews())
+
+    def __len__(self) -> int:
+        return len(self.review_text)
+
+    @overload
+    def __getitem__(self, index: int) -> ReviewRecord: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ReviewBatch": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            batch = ReviewBatch()
+            for field in FIELDS:
+                setattr(batch, field, getattr(self, field)[index])
+            return batch
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ReviewBatch index out of range")
+        return ReviewRecord(self, index)
+
+    def __iter__(self) -> Iterator[ReviewRecord]:
+        return (ReviewRecord(self, i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"ReviewBatch({len(self)} reviews)"
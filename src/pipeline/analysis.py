@@ -0,0 +1,293 @@
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable, Literal
+
+from src.data_analysis.plots import MEDIA_TYPES, PlotFormat, generate_plots, render_plots
+from src.data_analysis.review_reduction import reduce_reviews
+from src.data_analysis.sentiment_analysis import analyze_reviews_sentiment, warmup_sentiment_model
+from src.llm.batching import SummaryMode
+from src.llm.summary_updates import SummaryTarget, SummaryUpdate, plan_summary_update, save_summary_update
+from src.models import ReviewBatch, Sentiment
+from src.pipeline.dag import PipelineDAG
+from src.pipeline.stages import get_stages
+from src.storage.analysis_store import StoredAnalysis, get_analysis_store
+
+logger = logging.getLogger(__name__)
+
+ResponseMode = Literal["inline", "reference"]
+
+
+class SentimentPrefetch:
+    """
+    Labels pages of reviews while the rest of the reviews is still being scraped.
+
+    Pass an instance as `on_page` to `fetch_reviews_incrementally`. The labels land in the sentiment
+    cache, so the sentiment stage mostly hits the cache once all reviews are there. Prefetching only
+    uses idle sentiment workers and never makes the stage reject calls.
+    """
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+
+    def __call__(self, page: ReviewBatch) -> None:
+        stage = get_stages()["sentiment"]
+        if stage.pending < stage.max_concurrency:
+            self._tasks.append(asyncio.ensure_future(stage.run(analyze_reviews_sentiment, page.copy())))
+
+    async def wait(self) -> None:
+        """Wait for the pages that are being labeled, ignoring failures."""
+        for result in await asyncio.gather(*self._tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.debug(f"Sentiment prefetch failed: {result}")
+        self._tasks.clear()
+
+
+def build_analysis_dag(
+    fetch_reviews: Callable[[], Awaitable[ReviewBatch]],
+    fetch_description: Callable[[], Awaitable[str | None]],
+    app_name: str,
+    include_llm_summary: bool = True,
+    include_metrics: bool = True,
+    include_plots: bool = True,
+    summary_mode: SummaryMode | None = None,
+    plot_format: PlotFormat = "png",
+    plot_dpi: int | None = None,
+    plot_bytes: bool = False,
+    on_summary_chunk: Callable[[str], None] | None = None,
+    summary_target: SummaryTarget | None = None,
+) -> PipelineDAG:
+    """
+    Build the analysis pipeline of one request on the shared stages.
+
+    The results are stored under "reviews", "sentiment" (reviews with sentiment labels), "description",
+    "summary_update", "summary", "metrics" and "plots", depending on what is included.
+
+    Args:
+        fetch_reviews: Coroutine function returning the reviews to analyze
+        fetch_description: Coroutine function returning the app description for the summary, if any
+        app_name: Name of the app
+        include_llm_summary: Whether to generate the LLM summary (default: True)
+        include_metrics: Whether to calculate metrics (default: True)
+        include_plots: Whether to render plots, which also calculates metrics (default: True)
+        summary_mode: "refine" or "map_reduce" (default: LLM_SUMMARY_MODE)
+        plot_format: Image format of the plots (default: "png")
+        plot_dpi: Resolution of raster plots (default: PLOT_DPI)
+        plot_bytes: Return plots as raw image bytes instead of a base64 dict (default: False)
+        on_summary_chunk: Called with every piece of the summary as the LLM streams it (default: not streamed)
+        summary_target: App, store and country whose stored summary is updated with only the new reviews,
+            see `plan_summary_update` (default: always summarize all reviews)
+
+    Returns:
+        PipelineDAG: The pipeline, ready to run
+    """
+    stages = get_stages()
+    dag = PipelineDAG()
+
+    async def analyze_sentiment(reviews):
+        reviews = await stages["sentiment"].run(analyze_reviews_sentiment, reviews)
+        logger.debug("Sentiment analysis completed")
+        return reviews
+
+    async def plan_summary(sentiment):
+        return await asyncio.to_thread(plan_summary_update, summary_target, sentiment)
+
+    async def summarize(sentiment, description, summary_update: SummaryUpdate | None = None):
+        # The LangChain and Anthropic stack is only imported by requests that ask for a summary
+        from src.llm.llm_pipeline import agenerate_summary
+
+        if summary_update is not None and summary_update.unchanged:
+            logger.debug("No new reviews, the stored summary is up to date")
+            summary = summary_update.previous.summary
+            if on_summary_chunk is not None:
+                on_summary_chunk(summary)
+        else:
+            to_summarize = summary_update.reviews if summary_update is not None else sentiment
+            previous_summary = None
+            if summary_update is not None and summary_update.incremental:
+                previous_summary = summary_update.previous.summary
+            reviews, weights = await stages["reduction"].run(reduce_reviews, to_summarize)
+            summary = await stages["llm"].run(
+                agenerate_summary, reviews, app_name, description, mode=summary_mode, weights=weights,
+                previous_summary=previous_summary, on_chunk=on_summary_chunk,
+            )
+            logger.debug("LLM overview generation completed")
+
+        if summary_update is not None:
+            await asyncio.to_thread(save_summary_update, summary_update, summary)
+        return summary
+
+    async def compute_metrics(sentiment):
+        from src.data_analysis.metrics import calculate_metrics
+
+        metrics = await stages["metrics"].run(calculate_metrics, sentiment)
+        logger.debug("Metrics calculation completed")
+        return metrics
+
+    async def make_plots(metrics):
+        plots = await stages["plots"].run(
+            render_plots if plot_bytes else generate_plots,
+            metrics,
+            app_name=app_name,
+            image_format=plot_format,
+            dpi=plot_dpi,
+        )
+        logger.debug("Plots generation completed")
+        return plots
+
+    dag.add("reviews", fetch_reviews)
+    dag.add("sentiment", analyze_sentiment, deps=["reviews"])
+    if include_llm_summary:
+        dag.add("description", fetch_description)
+        if summary_target is not None:
+            dag.add("summary_update", plan_summary, deps=["sentiment"])
+            dag.add("summary", summarize, deps=["sentiment", "description", "summary_update"])
+        else:
+            dag.add("summary", summarize, deps=["sentiment", "description"])
+    if include_metrics or include_plots:
+        dag.add("metrics", compute_metrics, deps=["sentiment"])
+    if include_plots:
+        dag.add("plots", make_plots, deps=["metrics"])
+
+    return dag
+
+
+def reference_links(analysis_id: str, analysis: StoredAnalysis, include_plots: bool, include_raw_data: bool) -> dict:
+    """Links to the plot and the reviews of a stored analysis, served by the /analyses/ endpoints."""
+    links = {}
+    if include_plots:
+        links["plots"] = {
+            "url": f"/analyses/{analysis_id}/plot",
+            "format": analysis.plot_format,
+            "media_type": MEDIA_TYPES[analysis.plot_format],
+        }
+    if include_raw_data:
+        links["raw_data"] = {
+            "url": f"/analyses/{analysis_id}/reviews",
+            "format": "ndjson",
+            "count": len(analysis.reviews),
+        }
+    return links
+
+
+def build_response(
+    results: dict,
+    include_metrics: bool = True,
+    include_plots: bool = True,
+    include_raw_data: bool = True,
+    response_mode: ResponseMode = "inline",
+    plot_format: PlotFormat = "png",
+    analysis_id: str | None = None,
+) -> dict:
+    """
+    Build the fields of an API response from the results of an analysis.
+
+    Inline, the plots and the raw reviews are embedded in the response. With "reference", they are kept
+    in the analysis store and the response links to the /analyses/ endpoints instead.
+
+    Args:
+        results: Results of the analysis DAG, or a dict with the same keys
+        include_metrics: Whether the response has the metrics
+        include_plots: Whether the response has the plots
+        include_raw_data: Whether the response has the reviews
+        response_mode: "inline" or "reference"
+        plot_format: Format of the rendered plot, with "reference"
+        analysis_id: Stored analysis to link to, if it was stored already, e.g. by a background job
+
+    Returns:
+        dict: Fields of the response
+    """
+    summary_update = results.get("summary_update")
+    response = {
+        "llm_summary": results.get("summary"),
+        "metrics": results.get("metrics") if include_metrics else None,
+        # Background jobs keep the summary update as a dict
+        "summary_update": summary_update.to_dict() if isinstance(summary_update, SummaryUpdate) else summary_update,
+    }
+
+    if response_mode == "inline":
+        response["plots"] = results.get("plots")
+        if include_raw_data:
+            response["raw_data"] = {"reviews": results["sentiment"].dump()}
+        return response
+
+    store = get_analysis_store()
+    if analysis_id is None:
+        reviews = results["sentiment"] if include_raw_data else ReviewBatch()
+        analysis = StoredAnalysis(reviews, plot=results.get("plots"), plot_format=plot_format)
+        analysis_id = store.add(analysis)
+    else:
+        analysis = store.get(analysis_id)
+    response["analysis_id"] = analysis_id
+    # Stored analyses expire before their jobs do
+    if analysis is not None:
+        response.update(reference_links(analysis_id, analysis, include_plots, include_raw_data))
+    return response
+
+
+def _warmup_metrics() -> dict:
+    from src.data_analysis.metrics import calculate_metrics
+
+    reviews = ReviewBatch()
+    reviews.append(
+        review_id=None, source="app_store", user_name="warmup", country="us", rating=5,
+        review_text="warmup", date=datetime.now(timezone.utc), sentiment=Sentiment.POSITIVE,
+    )
+    return calculate_metrics(reviews)
+
+
+def _warmup_llm() -> None:
+    from langchain_anthropic import ChatAnthropic  # noqa: F401
+    from src.llm.prompts import get_merge_prompt, get_overview_prompt
+
+    get_overview_prompt()
+    get_merge_prompt()
+
+
+WarmupPart = Literal["sentiment", "metrics", "plots", "llm"]
+WARMUP_PARTS: tuple[WarmupPart, ...] = ("sentiment", "metrics", "plots", "llm")
+
+
+async def warmup_analysis(parts: Iterable[WarmupPart] = WARMUP_PARTS) -> dict[str, float]:
+    """
+    Load what the stages only load on first use, so the first request doesn't pay for it.
+
+    "sentiment" loads the model or connects to the shared inference process, "metrics" imports pandas,
+    "plots" imports matplotlib and builds the template of the plots stage, and "llm" imports the LangChain
+    and Anthropic stack and compiles the prompts. Each part runs on its own stage, so per-thread state
+    ends up where requests use it.
+
+    Args:
+        parts: Parts to warm up (default: all)
+
+    Returns:
+        dict[str, float]: Seconds spent warming up each part
+
+    Raises:
+        ValueError: If a part is unknown
+    """
+    parts = set(parts)
+    if unknown := parts.difference(WARMUP_PARTS):
+        raise ValueError(f"Unknown warmup parts {sorted(unknown)}, expected some of {WARMUP_PARTS}")
+
+    stages = get_stages()
+    timings = {}
+
+    async def timed(name, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = await stages[stage].run(func, *args, **kwargs)
+        timings[name] = round(time.perf_counter() - start, 3)
+        return result
+
+    if "sentiment" in parts:
+        await timed("sentiment", "sentiment", warmup_sentiment_model)
+    if "metrics" in parts or "plots" in parts:
+        metrics = await timed("metrics", "metrics", _warmup_metrics)
+    if "plots" in parts:
+        await timed("plots", "plots", render_plots, metrics, app_name="warmup", dpi=50)
+    if "llm" in parts:
+        await timed("llm", "reduction", _warmup_llm)
+
+    logger.info(f"Warmed up in {sum(timings.values()):.2f}s: {timings}")
+    return timings
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from src.models import ReviewBatch
+from src.pipeline.instrumentation import observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineDAG:
+    """
+    Minimal dependency-driven scheduler for the stages of one request.
+
+    Every stage is an async callable that receives the results of its dependencies as keyword arguments.
+    A stage starts as soon as all of its dependencies are done, so independent stages overlap and
+    the wall-clock time approaches the longest path instead of the sum of all stages.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, tuple[Callable[..., Awaitable[Any]], tuple[str, ...]]] = {}
+        self.timings: dict[str, dict[str, float]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], deps: tuple[str, ...] | list[str] = ()) -> None:
+        """Register a stage. Dependencies must be registered before the stages that use them."""
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+        self._stages[name] = (func, tuple(deps))
+
+    async def run(self, on_stage_done: Callable[[str, Any], None] | None = None) -> dict[str, Any]:
+        """
+        Run all registered stages.
+
+        Args:
+            on_stage_done: Called with the name and result of every stage as soon as it is done
+
+        Returns:
+            dict[str, Any]: Result of every stage by name
+
+        Raises:
+            The first exception raised by a stage, after all other stages are cancelled.
+        """
+        started_at = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, deps = self._stages[name]
+            inputs = {dep: await tasks[dep] for dep in deps}
+
+            stage_start = time.perf_counter()
+            result = await func(**inputs)
+            stage_end = time.perf_counter()
+
+            self.timings[name] = {
+                "start": round(stage_start - started_at, 4),
+                "duration": round(stage_end - stage_start, 4),
+            }
+            observe_stage(name, stage_end - stage_start, items=len(result) if isinstance(result, ReviewBatch) else None)
+            if on_stage_done is not None:
+                on_stage_done(name, result)
+            return result
+
+        # Stages are registered in dependency order, so every dependency task exists before its dependents
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name), name=f"stage-{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        self.timings["total"] = {"start": 0.0, "duration": round(time.perf_counter() - started_at, 4)}
+        logger.info(
+            "Pipeline stage timings: "
+            + ", ".join(f"{name}={timing['duration']:.3f}s" for name, timing in self.timings.items())
+        )
+        return {name: task.result() for name, task in tasks.items()}
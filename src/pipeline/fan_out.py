@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import AsyncIterator, NamedTuple
+
+from src.llm.summary_updates import SummaryTarget
+from src.models import ReviewBatch
+from src.scrapers import (
+    google_play_market as google_play_market_scraper,
+    app_store as app_store_scraper,
+)
+from src.pipeline.analysis import SentimentPrefetch
+from src.pipeline.stages import get_stages
+from src.storage.sync import fetch_reviews_incrementally
+
+logger = logging.getLogger(__name__)
+
+SCRAPERS = {
+    "app_store": app_store_scraper,
+    "google_play_market": google_play_market_scraper,
+}
+
+
+class Shard(NamedTuple):
+    """Reviews of one app in one store and country."""
+
+    source: str
+    app_id: int | str
+    country: str
+
+
+class ShardResult(NamedTuple):
+    shard: Shard
+    reviews: ReviewBatch
+    error: Exception | None = None
+
+
+async def fetch_shards(shards: list[Shard], app_name: str, num_reviews: int) -> AsyncIterator[ShardResult]:
+    """
+    Fetch all shards concurrently on the scrape stage and yield them in order of completion.
+
+    Requests to each store host are throttled by the shared rate limiters, and pages are labeled
+    with sentiment while the other shards are still being fetched. A failing shard is
+    yielded with its error and an empty batch, so the other shards still make it into the analysis.
+
+    Args:
+        shards: Stores and countries to fetch
+        app_name: Name of the app
+        num_reviews: Number of reviews to fetch per shard
+
+    Yields:
+        ShardResult: Reviews or error of every shard, as soon as it is done
+    """
+    stage = get_stages()["scrape"]
+    prefetch = SentimentPrefetch()
+
+    async def fetch(shard: Shard) -> ShardResult:
+        try:
+            reviews = await stage.run(
+                fetch_reviews_incrementally,
+                SCRAPERS[shard.source],
+                shard.source,
+                app_name,
+                shard.app_id,
+                shard.country,
+                num_reviews,
+                on_page=prefetch,
+            )
+            return ShardResult(shard, reviews)
+        except Exception as e:
+            logger.error(f"Error fetching {shard.source} reviews for {shard.country}: {e}")
+            return ShardResult(shard, ReviewBatch(), e)
+
+    tasks = [asyncio.create_task(fetch(shard)) for shard in shards]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+        await prefetch.wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def merge_shards(batches: list[ReviewBatch]) -> ReviewBatch:
+    """
+    Merge the reviews of several shards, dropping duplicates.
+
+    Google Play serves the same reviews to storefronts that share a language, so reviews are
+    deduplicated by store and review ID, or by user, date and text where the store has no IDs.
+    The first occurrence is kept.
+
+    Args:
+        batches: Reviews of every shard
+
+    Returns:
+        ReviewBatch: Unique reviews of all shards
+    """
+    merged = ReviewBatch()
+    seen = set()
+    for batch in batches:
+        keep = []
+        for i, (source, review_id) in enumerate(zip(batch.source, batch.review_id)):
+            if review_id:
+                key = (source, review_id)
+            else:
+                key = (source, batch.user_name[i], batch.date[i], batch.review_text[i])
+            if key not in seen:
+                seen.add(key)
+                keep.append(i)
+        merged.extend(batch.take(keep) if len(keep) < len(batch) else batch)
+    return merged
+
+
+async def afetch_app_description(app_id: str, countries: list[str]) -> str | None:
+    """
+    Fetch the Google Play description of an app from the first country that has one.
+
+    Args:
+        app_id: Package name/ID of the app on Google Play Store
+        countries: Country codes to try, in order
+
+    Returns:
+        str | None: App description text, or None if no country returned one
+    """
+    scraper = SCRAPERS["google_play_market"]
+    for country in dict.fromkeys(countries):
+        description = await scraper.afetch_app_description(app_id, country)
+        if description:
+            return description
+        logger.info(f"No Google Play description of {app_id} for {country}")
+    return None
+
+
+def summary_target(shards: list[Shard], num_reviews: int, rebuild: bool = False) -> SummaryTarget:
+    """
+    Stored summary that a fan-out analysis brings up to date.
+
+    The merged reviews are summarized under a key of their own, so the summary is shared by fan-outs of
+    the same apps and countries and kept apart from the summaries of single stores and countries.
+    """
+    app_ids = sorted({f"{shard.source}:{shard.app_id}" for shard in shards})
+    countries = sorted({shard.country for shard in shards})
+    return SummaryTarget("fan_out", "|".join(app_ids), ",".join(countries), num_reviews, rebuild=rebuild)
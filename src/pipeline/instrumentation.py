@@ -0,0 +1,201 @@
+import os
+import sys
+import bisect
+import resource
+import threading
+from typing import Callable, Iterable
+
+from src.data_analysis.sentiment_cache import get_sentiment_cache
+from src.pipeline.stages import get_stages
+
+# Metric families of the process in Prometheus text format, see `render_metrics`.
+# The stages record into them directly, and collectors add values that are read at scrape time.
+
+Sample = tuple[str, dict[str, str], float]
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Histogram:
+    """Histogram with cumulative buckets and labels."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of every bucket (the last one is +Inf), sum of observations
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Metric families of the process plus collectors that read gauges and external counters at scrape time."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[tuple[str, str, str, Callable[[], Iterable[tuple[dict[str, str], float]]]]] = []
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, description, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        metric = Histogram(name, description, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name: str, description: str, type: str = "gauge"):
+        """Register a function returning (labels, value) pairs of a metric, read on every scrape."""
+
+        def register(func: Callable[[], Iterable[tuple[dict[str, str], float]]]):
+            self._collectors.append((name, description, type, func))
+            return func
+
+        return register
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines += [f"# HELP {metric.name} {metric.description}", f"# TYPE {metric.name} {metric.type}"]
+            lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in metric.samples()]
+        for name, description, type, func in self._collectors:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {type}"]
+            lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in func()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "app_reviews_stage_duration_seconds",
+    "Duration of analysis pipeline stages (reviews is the scrape, llm_batch a single LLM call)",
+    labels=("stage",),
+)
+STAGE_ITEMS = REGISTRY.counter(
+    "app_reviews_stage_items_total",
+    "Reviews processed by analysis pipeline stages",
+    labels=("stage",),
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "app_reviews_llm_batch_tokens",
+    "Tokens per LLM call as reported by the model",
+    labels=("direction",),
+    buckets=TOKEN_BUCKETS,
+)
+
+
+def observe_stage(stage: str, seconds: float, items: int | None = None) -> None:
+    """Record the duration of a stage and, if known, the number of reviews it processed."""
+    STAGE_DURATION.observe(seconds, stage=stage)
+    if items is not None:
+        STAGE_ITEMS.inc(items, stage=stage)
+
+
+def observe_llm_tokens(input_tokens: int, output_tokens: int) -> None:
+    """Record the token usage of one LLM call."""
+    LLM_TOKENS.observe(input_tokens, direction="input")
+    LLM_TOKENS.observe(output_tokens, direction="output")
+
+
+@REGISTRY.collector("app_reviews_stage_pending", "Calls running or waiting on each pipeline stage")
+def _stage_pending():
+    if get_stages.cache_info().currsize == 0:
+        return []
+    return [({"stage": name}, stage.pending) for name, stage in get_stages().items()]
+
+
+@REGISTRY.collector("app_reviews_cache_requests_total", "Lookups of the sentiment and LLM caches", type="counter")
+def _cache_requests():
+    samples = []
+    if get_sentiment_cache.cache_info().currsize:
+        stats = get_sentiment_cache().stats
+        samples += [({"cache": "sentiment", "result": "hit"}, stats["hits"]), ({"cache": "sentiment", "result": "miss"}, stats["misses"])]
+
+    # The LLM cache is only reported once LangChain is loaded, scraping must not import it
+    llm_cache_module = sys.modules.get("src.llm.cache")
+    if llm_cache_module is not None and llm_cache_module.get_llm_cache.cache_info().currsize:
+        llm_cache = llm_cache_module.get_llm_cache()
+        if llm_cache is not None:
+            stats = llm_cache.stats
+            samples += [({"cache": "llm", "result": "hit"}, stats["hits"]), ({"cache": "llm", "result": "miss"}, stats["misses"])]
+    return samples
+
+
+@REGISTRY.collector("app_reviews_process_memory_bytes", "Resident memory of the process, current and peak")
+def _process_memory():
+    samples = [({"kind": "peak"}, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)]
+    try:
+        with open("/proc/self/statm") as file:
+            samples.append(({"kind": "current"}, int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")))
+    except OSError:
+        pass
+    return samples
+
+
+def render_metrics() -> str:
+    """Metrics of the process in the Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+# Innermost frames in these files mean a thread is blocked waiting for work, not doing any
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads of the process at a fixed interval.
+
+    Stacks are aggregated in the collapsed format ("thread;outer;...;inner count" per line) that
+    flamegraph.pl, speedscope and most other flame graph tools read. Meant for a single request, so it
+    also samples other requests running at the same time. Threads that are blocked waiting for work,
+    such as idle stage workers or the event loop waiting on sockets, are left out.
+    """
+
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or float(os.getenv("PROFILER_INTERVAL_MS", 5)) / 1000
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """The sampled stacks in collapsed format, most frequent first."""
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def summary(self) -> dict:
+        return {"samples": self.samples, "interval_ms": round(self.interval * 1000, 3), "stacks": len(self._stacks)}
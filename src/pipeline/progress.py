@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+ProgressCallback = Callable[[str, int, int | None], None]
+
+_reporter: ContextVar[ProgressCallback | None] = ContextVar("progress_reporter", default=None)
+
+
+def report_progress(stage: str, done: int, total: int | None = None) -> None:
+    """
+    Report the progress of a pipeline stage to the reporter of the current context, if any.
+
+    Args:
+        stage: Name of the stage, e.g. "reviews", "sentiment" or "llm_batches"
+        done: Number of items done so far
+        total: Number of items expected, if known
+    """
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(stage, done, total)
+
+
+@contextmanager
+def progress_reporter(callback: ProgressCallback) -> Iterator[None]:
+    """Send the progress reported within the block, including by tasks and stages started in it, to `callback`."""
+    token = _reporter.set(callback)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
@@ -0,0 +1,108 @@
+import os
+import asyncio
+import logging
+import contextvars
+from functools import lru_cache, partial
+from concurrent.futures import Executor, ThreadPoolExecutor
+from fastapi import HTTPException
+
+from src.data_analysis.sentiment_batcher import microbatching_enabled
+from src.data_analysis.sentiment_server import sentiment_server_address
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    Bounded execution slot for one pipeline stage.
+
+    At most `max_concurrency` calls run at once and at most `max_queue` more wait for a slot.
+    Calls beyond that are rejected with a 503 so that an overloaded stage sheds load
+    instead of growing an unbounded backlog.
+    Blocking functions run on the stage's own executor, coroutine functions run on the event loop.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, executor: Executor | None = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.executor = executor
+        self.pending = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, func, *args, **kwargs):
+        if self.pending >= self.max_concurrency + self.max_queue:
+            logger.warning(f"Stage '{self.name}' is overloaded ({self.pending} pending calls)")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server is busy ({self.name} queue is full), try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                if asyncio.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                loop = asyncio.get_running_loop()
+                # Run in a copy of the caller's context so context variables such as the progress reporter carry over
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(self.executor, partial(context.run, func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+
+def _thread_stage(name: str, default_workers: int, default_queue: int) -> Stage:
+    env_prefix = name.upper()
+    workers = int(os.getenv(f"{env_prefix}_WORKERS", default_workers))
+    queue_size = int(os.getenv(f"{env_prefix}_QUEUE_SIZE", default_queue))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-stage")
+    return Stage(name, max_concurrency=workers, max_queue=queue_size, executor=executor)
+
+
+@lru_cache(maxsize=1)
+def get_stages() -> dict[str, Stage]:
+    """
+    Creates and returns the pipeline stages shared by all requests of the process.
+    Worker and queue sizes are configured with <STAGE>_WORKERS and <STAGE>_QUEUE_SIZE.
+
+    Returns:
+        dict[str, Stage]: Stages by name
+    """
+    llm_concurrency = int(os.getenv("LLM_WORKERS", 4))
+    return {
+        # Scrapers are awaited on the event loop and share the pooled HTTP client
+        "scrape": Stage(
+            "scrape",
+            max_concurrency=int(os.getenv("SCRAPE_WORKERS", 8)),
+            max_queue=int(os.getenv("SCRAPE_QUEUE_SIZE", 32)),
+        ),
+        # Torch releases the GIL during inference, but parallel forward passes compete for the same cores.
+        # With micro-batching or the shared inference process the workers only wait for the batcher, so many requests can be in flight
+        "sentiment": _thread_stage(
+            "sentiment",
+            default_workers=16 if microbatching_enabled() or sentiment_server_address() else 1,
+            default_queue=16,
+        ),
+        # Near-duplicate clustering and sampling of reviews before the LLM summary
+        "reduction": _thread_stage("reduction", default_workers=2, default_queue=16),
+        "metrics": _thread_stage("metrics", default_workers=2, default_queue=16),
+        # pyplot keeps global state, so figures are rendered by a single thread
+        "plots": _thread_stage("plots", default_workers=1, default_queue=16),
+        # LLM calls are awaited on the event loop through the async LangChain API
+        "llm": Stage(
+            "llm",
+            max_concurrency=llm_concurrency,
+            max_queue=int(os.getenv("LLM_QUEUE_SIZE", 16)),
+        ),
+    }
+
+
+def shutdown_stages() -> None:
+    """Shut down the executors of all created stages."""
+    if get_stages.cache_info().currsize == 0:
+        return
+    for stage in get_stages().values():
+        if stage.executor is not None:
+            stage.executor.shutdown(wait=False, cancel_futures=True)
+    get_stages.cache_clear()
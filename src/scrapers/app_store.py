@@ -1,43 +1,129 @@
+import os
+import re
+import asyncio
 import logging
-from app_store_scraper import AppStore
+from datetime import datetime
+from typing import AsyncIterator
 
-from src.models import Review
+from src.models import ReviewBatch
+from src.scrapers.http import ScraperError, request
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 20
 
-def fetch_app_reviews(app_name: str, app_id: int, country: str = "us", num_reviews: int = 100) -> list[Review]:
+_TOKEN_PATTERN = re.compile(r"token%22%3A%22(.+?)%22")
+_OFFSET_PATTERN = re.compile(r"offset=([0-9]+)")
+
+
+def _base_urls() -> tuple[str, str]:
+    # Configurable so the scraper can run against a local stand-in server
+    return (
+        os.getenv("APP_STORE_BASE_URL", "https://apps.apple.com").rstrip("/"),
+        os.getenv("APP_STORE_API_BASE_URL", "https://amp-api.apps.apple.com").rstrip("/"),
+    )
+
+
+def _landing_url(app_name: str, app_id: int, country: str) -> str:
+    slug = re.sub(r"[\W_]+", "-", str(app_name).lower())
+    return f"{_base_urls()[0]}/{country}/app/{slug}/id{app_id}"
+
+
+async def _fetch_token(landing_url: str) -> str:
+    # The web API token is embedded in the configuration meta tag of the app page
+    response = await request("GET", landing_url)
+    match = _TOKEN_PATTERN.search(response.text)
+    if match is None:
+        raise ScraperError(
+            f"No App Store API token found on {landing_url}, the layout of the app page may have changed"
+        )
+    return f"bearer {match.group(1)}"
+
+
+async def iter_review_pages(
+    app_name: str,
+    app_id: int,
+    country: str = "us",
+    num_reviews: int = 100,
+) -> AsyncIterator[ReviewBatch]:
     """
-    Fetch reviews from Apple App Store.
-    
+    Fetch reviews from Apple App Store page by page, newest first.
+
     Args:
         app_name: Name of the app
         app_id: Numeric ID of the app on App Store
         country: Country code for the store (default: "us")
         num_reviews: Number of reviews to fetch (default: 100)
-    
-    Returns:
-        list[Review]
+
+    Yields:
+        ReviewBatch: Reviews of every page as soon as it arrives
     """
-    try:
-        app = AppStore(country=country, app_name=app_name, app_id=app_id)
-        app.review(how_many=num_reviews)
+    country = country.lower()
+    landing_url = _landing_url(app_name, app_id, country)
+    headers = {
+        "Accept": "application/json",
+        "Authorization": await _fetch_token(landing_url),
+        "Origin": _base_urls()[0],
+        "Referer": landing_url,
+    }
+    url = f"{_base_urls()[1]}/v1/catalog/{country}/apps/{app_id}/reviews"
+    params = {
+        "l": "en-GB",
+        "offset": 0,
+        "limit": PAGE_SIZE,
+        "platform": "web",
+        "additionalPlatforms": "appletv,ipad,iphone,mac",
+    }
 
-        fetched_reviews = [
-            Review(
-                review_id=None, # app_store_scraper does not provide review IDs
+    fetched = 0
+    while fetched < num_reviews:
+        response = await request("GET", url, headers=headers, params=params)
+        payload = response.json()
+
+        page = ReviewBatch()
+        for item in payload.get("data", [])[:num_reviews - fetched]:
+            review = item["attributes"]
+            page.append(
+                review_id=item.get("id"),
                 source="app_store",
                 user_name=review["userName"],
                 country=country,
                 rating=review["rating"],
                 review_text=review["review"],
-                date=review["date"],
+                date=datetime.strptime(review["date"], "%Y-%m-%dT%H:%M:%SZ"),
             )
-            for review in app.reviews
-        ]
-
-        return fetched_reviews
-        
-    except Exception as e:
-        logger.error(f"Error fetching App Store reviews: {e}")
-        return []
+        fetched += len(page)
+        if page:
+            yield page
+
+        next_offset = _OFFSET_PATTERN.search(payload.get("next") or "")
+        if next_offset is None or not page:
+            break
+        params["offset"] = int(next_offset.group(1))
+
+
+async def afetch_app_reviews(app_name: str, app_id: int, country: str = "us", num_reviews: int = 100) -> ReviewBatch:
+    """
+    Fetch reviews from Apple App Store.
+
+    Args:
+        app_name: Name of the app
+        app_id: Numeric ID of the app on App Store
+        country: Country code for the store (default: "us")
+        num_reviews: Number of reviews to fetch (default: 100)
+
+    Returns:
+        ReviewBatch
+
+    Raises:
+        ScraperError: The App Store could not be reached, throttled us or does not know the app
+    """
+    fetched_reviews = ReviewBatch()
+    async for page in iter_review_pages(app_name, app_id, country, num_reviews):
+        fetched_reviews.extend(page)
+    return fetched_reviews
+
+
+def fetch_app_reviews(app_name: str, app_id: int, country: str = "us", num_reviews: int = 100) -> ReviewBatch:
+    """Blocking version of `afetch_app_reviews` for scripts."""
+    return asyncio.run(afetch_app_reviews(app_name, app_id, country, num_reviews))
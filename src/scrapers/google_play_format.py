@@ -0,0 +1,66 @@
+import json
+
+from src.scrapers.http import ScraperError
+
+# The only module that touches google_play_scraper. Its request payloads, response regexes and element
+# specs are internals rather than API, so the package is pinned to an exact version in pyproject.toml and
+# any layout it no longer matches surfaces as a ScraperError. It is imported where it is used, so that
+# importing the app doesn't load it.
+
+_REVIEW_FIELDS = ("reviewId", "userName", "score", "content", "at")
+
+
+def build_reviews_body(app_id: str, count: int, token: str | None) -> str:
+    """Build the form body requesting a page of the newest reviews of an app."""
+    from google_play_scraper import Sort
+    from google_play_scraper.constants.request import Formats
+
+    return Formats.Reviews.build_body(str(app_id), Sort.NEWEST.value, count, "null", "null", token).decode("utf-8")
+
+
+def parse_reviews_response(text: str) -> tuple[list[dict], str | None]:
+    """
+    Parse a page of reviews.
+
+    Args:
+        text: Body of the batchexecute response
+
+    Returns:
+        tuple[list[dict], str | None]: Reviews with the fields of `_REVIEW_FIELDS`, and the token of the next page
+
+    Raises:
+        ScraperError: The response does not have the expected layout
+    """
+    from google_play_scraper.constants.element import ElementSpecs
+    from google_play_scraper.constants.regex import Regex
+
+    try:
+        match = json.loads(Regex.REVIEWS.findall(text)[0])
+        results = json.loads(match[0][2])
+    except (IndexError, TypeError, ValueError) as e:
+        raise ScraperError(f"Unexpected Google Play reviews response: {e!r}")
+
+    if not results or not results[0]:
+        return [], None
+    try:
+        token = results[-2][-1]
+    except (IndexError, TypeError):
+        token = None
+
+    try:
+        items = [
+            {field: ElementSpecs.Review[field].extract_content(item) for field in _REVIEW_FIELDS} for item in results[0]
+        ]
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ScraperError(f"Unexpected Google Play review layout: {e!r}")
+    return items, token
+
+
+def parse_app_description(html: str, app_id: str, url: str) -> str | None:
+    """Extract the description from the details page of an app."""
+    from google_play_scraper.features.app import parse_dom
+
+    try:
+        return parse_dom(dom=html, app_id=app_id, url=url)["description"]
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ScraperError(f"Unexpected Google Play details page: {e!r}")
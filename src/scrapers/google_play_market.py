@@ -1,73 +1,152 @@
+import os
+import asyncio
 import logging
-from google_play_scraper import Sort, reviews, app
+from datetime import datetime
+from typing import AsyncIterator
 
-from src.models import Review
+import httpx
+
+from src.models import ReviewBatch
+from src.scrapers.google_play_format import build_reviews_body, parse_app_description, parse_reviews_response
+from src.scrapers.http import ScraperNotFoundError, request
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 100
+
+
+def _base_url() -> str:
+    # Configurable so the scraper can run against a local stand-in server
+    return os.getenv("GOOGLE_PLAY_BASE_URL", "https://play.google.com").rstrip("/")
+
+
+def _is_throttled(response: httpx.Response) -> bool:
+    return "com.google.play.gateway.proto.PlayGatewayError" in response.text
+
 
-def fetch_app_reviews(app_name: str, app_id: str, country: str = "us", num_reviews: int = 100) -> list[Review]:
+async def iter_review_pages(
+    app_id: str,
+    country: str = "us",
+    num_reviews: int = 100,
+    since: datetime | None = None,
+) -> AsyncIterator[ReviewBatch]:
     """
-    Fetch reviews from Google Play Store.
-    
+    Fetch reviews from Google Play Store page by page, newest first.
+
     Args:
-        app_name: Name of the app
         app_id: Package name/ID of the app on Google Play Store
         country: Country code for the store (default: "us")
         num_reviews: Number of reviews to fetch (default: 100)
-    
-    Returns:
-        list[Review]
+        since: Stop at the first review posted at or before this date
+
+    Yields:
+        ReviewBatch: Reviews of every page as soon as it arrives
     """
-    try:
-        package_name = str(app_id)
-        result, _ = reviews(
-            package_name,
-            lang=country,
-            country=country,
-            sort=Sort.NEWEST,
-            count=num_reviews
-        )
-
-        fetched_reviews = [
-            Review(
+    url = f"{_base_url()}/_/PlayStoreUi/data/batchexecute"
+    params = {"hl": country, "gl": country}
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    token = None
+    fetched = 0
+    while fetched < num_reviews:
+        body = build_reviews_body(app_id, min(PAGE_SIZE, num_reviews - fetched), token)
+        response = await request("POST", url, params=params, headers=headers, content=body, is_throttled=_is_throttled)
+        items, token = parse_reviews_response(response.text)
+
+        page = ReviewBatch()
+        for review in items:
+            if since is not None and review["at"] <= since:
+                token = None
+                break
+            page.append(
                 review_id=review["reviewId"],
                 source="google_play_market",
                 user_name=review["userName"],
                 country=country,
                 rating=review["score"],
-                review_text=review["content"],
+                review_text=review["content"] or "",
                 date=review["at"],
             )
-            for review in result
-        ]
+        fetched += len(page)
+        if page:
+            yield page
 
-        return fetched_reviews
+        if not items or token is None:
+            break
 
-    except Exception as e:
-        logger.error(f"Error fetching Google Play reviews: {e}")
-        return []
 
+async def afetch_app_reviews(app_name: str, app_id: str, country: str = "us", num_reviews: int = 100) -> ReviewBatch:
+    """
+    Fetch reviews from Google Play Store.
 
-def fetch_app_description(app_id: str, country: str = "us") -> str | None:
+    Args:
+        app_name: Name of the app
+        app_id: Package name/ID of the app on Google Play Store
+        country: Country code for the store (default: "us")
+        num_reviews: Number of reviews to fetch (default: 100)
+
+    Returns:
+        ReviewBatch
+
+    Raises:
+        ScraperError: Google Play could not be reached, throttled us or does not know the app
+    """
+    fetched_reviews = ReviewBatch()
+    async for page in iter_review_pages(app_id, country, num_reviews):
+        fetched_reviews.extend(page)
+    return fetched_reviews
+
+
+async def afetch_new_reviews(app_id: str, since: datetime, country: str = "us", max_reviews: int = 1000) -> ReviewBatch:
+    """
+    Fetch only the reviews posted after `since` from Google Play Store.
+
+    Args:
+        app_id: Package name/ID of the app on Google Play Store
+        since: Date of the newest review already known
+        country: Country code for the store (default: "us")
+        max_reviews: Upper bound on the number of new reviews to fetch (default: 1000)
+
+    Returns:
+        ReviewBatch: New reviews, newest first
+    """
+    fetched_reviews = ReviewBatch()
+    async for page in iter_review_pages(app_id, country, max_reviews, since=since):
+        fetched_reviews.extend(page)
+    return fetched_reviews
+
+
+async def afetch_app_description(app_id: str, country: str = "us") -> str | None:
     """
     Fetch the description of an app from the Google Play Store.
-    
+
     Args:
         app_id: Package name/ID of the app on Google Play Store
         country: Country code for the store (default: "us")
-    
+
     Returns:
-        str: App description text. Returns empty string if description cannot be fetched.
+        str: App description text, or None if it cannot be fetched
     """
+    url = f"{_base_url()}/store/apps/details"
+    params = {"id": app_id, "hl": "en", "gl": country}
     try:
-        result = app(
-            app_id=app_id,
-            lang="en",
-            country=country,
-        )
+        try:
+            response = await request("GET", url, params=params)
+        except ScraperNotFoundError:
+            # Apps that are not available in the country are still listed without it
+            params.pop("gl")
+            response = await request("GET", url, params=params)
+        return parse_app_description(response.text, app_id, str(response.url))
     except Exception as e:
         logger.error(f"Error fetching Google Play description: {e}")
         return None
 
-    return result["description"]
+
+def fetch_app_reviews(app_name: str, app_id: str, country: str = "us", num_reviews: int = 100) -> ReviewBatch:
+    """Blocking version of `afetch_app_reviews` for scripts."""
+    return asyncio.run(afetch_app_reviews(app_name, app_id, country, num_reviews))
+
+
+def fetch_app_description(app_id: str, country: str = "us") -> str | None:
+    """Blocking version of `afetch_app_description` for scripts."""
+    return asyncio.run(afetch_app_description(app_id, country))
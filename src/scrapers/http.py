@@ -0,0 +1,153 @@
+import os
+import json
+import random
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.scrapers.rate_limit import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+# One pooled client per event loop, connections cannot be shared between loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_record_lock = threading.Lock()
+
+
+class ScraperError(Exception):
+    """A store request failed. `status_code` is the status to answer API clients with."""
+
+    status_code = 502
+
+
+class ScraperNotFoundError(ScraperError):
+    status_code = 404
+
+
+class ScraperThrottledError(ScraperError):
+    status_code = 503
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the HTTP client of the running event loop, creating it on first use.
+    Connections are kept alive and shared by all scrapers; the pool size is set with
+    SCRAPER_MAX_CONNECTIONS and the timeout with SCRAPER_TIMEOUT_SECONDS.
+
+    Returns:
+        httpx.AsyncClient: Pooled HTTP client
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = int(os.getenv("SCRAPER_MAX_CONNECTIONS", 20))
+        client = httpx.AsyncClient(
+            timeout=float(os.getenv("SCRAPER_TIMEOUT_SECONDS", 20)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_http_client() -> None:
+    """Close the HTTP client of the running event loop."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _backoff_delay(attempt: int, response: httpx.Response | None) -> float:
+    cap = float(os.getenv("SCRAPER_BACKOFF_MAX_SECONDS", 30))
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), cap)
+    # Exponential backoff with full jitter
+    base = float(os.getenv("SCRAPER_BACKOFF_BASE_SECONDS", 0.5))
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _record(method: str, url: str, body: str | bytes | None, response: httpx.Response) -> None:
+    # Responses are appended to SCRAPER_RECORD_PATH to be replayed by utils/replay_store_server.py
+    path = os.getenv("SCRAPER_RECORD_PATH")
+    if not path:
+        return
+    parts = urlsplit(url)
+    entry = {
+        "method": method,
+        "path": parts.path,
+        "query": parts.query,
+        "body": body.decode("utf-8") if isinstance(body, bytes) else body,
+        "status": response.status_code,
+        "content_type": response.headers.get("Content-Type"),
+        "text": response.text,
+    }
+    with _record_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+async def request(
+    method: str,
+    url: str,
+    *,
+    is_throttled: Callable[[httpx.Response], bool] | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Send a request to a store through the shared client.
+
+    Every attempt waits for the rate limiter of the URL's host. Throttled responses (429, 5xx, or
+    whatever `is_throttled` detects) and network errors are retried with exponential backoff and
+    jitter, honoring Retry-After, up to SCRAPER_MAX_RETRIES times.
+
+    Args:
+        method: HTTP method
+        url: Absolute URL
+        is_throttled: Detects throttling that the store reports with a successful status code
+        **kwargs: Passed to `httpx.AsyncClient.request`
+
+    Returns:
+        httpx.Response: Successful response
+
+    Raises:
+        ScraperNotFoundError: The store answered 404
+        ScraperThrottledError: The store kept throttling after all retries
+        ScraperError: Any other failure
+    """
+    max_retries = int(os.getenv("SCRAPER_MAX_RETRIES", 4))
+    limiter = get_rate_limiter(urlsplit(url).netloc)
+    client = get_http_client()
+
+    for attempt in range(max_retries + 1):
+        await limiter.aacquire()
+        response = None
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            error = ScraperError(f"{method} {url} failed: {e!r}")
+        else:
+            _record(method, str(response.request.url), kwargs.get("content"), response)
+            if response.status_code == 404:
+                raise ScraperNotFoundError(f"{method} {url} returned 404")
+            if response.status_code in RETRY_STATUS_CODES or (is_throttled is not None and is_throttled(response)):
+                error = ScraperThrottledError(f"{method} {url} was throttled (status {response.status_code})")
+            elif response.is_error:
+                raise ScraperError(f"{method} {url} returned {response.status_code}")
+            else:
+                return response
+
+        if attempt < max_retries:
+            delay = _backoff_delay(attempt, response)
+            logger.warning(f"{error}, retrying in {delay:.2f}s ({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+    raise error
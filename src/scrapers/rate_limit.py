@@ -0,0 +1,61 @@
+import os
+import time
+import asyncio
+import threading
+from functools import lru_cache
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`, so short bursts of up to
+    `capacity` requests go through immediately and sustained traffic is held at `rate`.
+    Blocking callers (scraper threads) use `acquire`, coroutines use `aacquire`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("Token bucket rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens, possibly going into debt, and return how long the caller has to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1) -> None:
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: float = 1) -> None:
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter(host: str) -> TokenBucket:
+    """
+    Creates and returns the rate limiter shared by all requests to a store host.
+    The rate is set with SCRAPER_RATE_LIMIT (requests per second) and SCRAPER_BURST.
+
+    Args:
+        host: Host name of the store
+
+    Returns:
+        TokenBucket: Rate limiter of the host
+    """
+    return TokenBucket(
+        rate=float(os.getenv("SCRAPER_RATE_LIMIT", 2)),
+        capacity=float(os.getenv("SCRAPER_BURST", 5)),
+    )
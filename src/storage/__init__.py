@@ -0,0 +1,18 @@
+from src.storage.analysis_store import AnalysisStore, SQLiteAnalysisStore, StoredAnalysis, get_analysis_store
+from src.storage.job_store import JobStore, get_job_store
+from src.storage.review_store import ReviewStore, get_review_store
+from src.storage.summary_store import StoredSummary, SummaryStore, get_summary_store
+
+__all__ = [
+    AnalysisStore,
+    SQLiteAnalysisStore,
+    StoredAnalysis,
+    get_analysis_store,
+    JobStore,
+    get_job_store,
+    ReviewStore,
+    get_review_store,
+    StoredSummary,
+    SummaryStore,
+    get_summary_store,
+]
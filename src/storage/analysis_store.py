@@ -0,0 +1,151 @@
+import os
+import time
+import uuid
+import pickle
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from src.models import ReviewBatch
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    reviews BLOB NOT NULL,
+    plot BLOB,
+    plot_format TEXT,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_by_access ON analyses (accessed_at);
+"""
+
+
+class StoredAnalysis:
+    """Binary and bulk outputs of one analysis, served by their own endpoints."""
+
+    __slots__ = ("reviews", "plot", "plot_format", "created_at")
+
+    def __init__(self, reviews: ReviewBatch, plot: bytes | None = None, plot_format: str | None = None):
+        self.reviews = reviews
+        self.plot = plot
+        self.plot_format = plot_format
+        self.created_at = time.monotonic()
+
+
+class AnalysisStore:
+    """In-process LRU of recent analyses with a time-to-live."""
+
+    def __init__(self, maxsize: int = 100, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._analyses: OrderedDict[str, StoredAnalysis] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, analysis: StoredAnalysis) -> str:
+        """Store an analysis and return its ID."""
+        analysis_id = uuid.uuid4().hex
+        with self._lock:
+            self._analyses[analysis_id] = analysis
+            while len(self._analyses) > self.maxsize:
+                self._analyses.popitem(last=False)
+        return analysis_id
+
+    def get(self, analysis_id: str) -> StoredAnalysis | None:
+        """Return a stored analysis, or None if it is unknown or expired."""
+        with self._lock:
+            analysis = self._analyses.get(analysis_id)
+            if analysis is None:
+                return None
+            if time.monotonic() - analysis.created_at > self.ttl:
+                del self._analyses[analysis_id]
+                return None
+            self._analyses.move_to_end(analysis_id)
+            return analysis
+
+
+class SQLiteAnalysisStore:
+    """
+    SQLite-backed store of recent analyses with a time-to-live, shared by all processes using the same file.
+
+    It has the interface of `AnalysisStore`, and lets any API worker serve an analysis another one created.
+    The reviews are stored pickled, the file is a private cache of the server and not meant to be shared.
+    """
+
+    def __init__(self, path: str | Path, maxsize: int = 100, ttl: float = 3600):
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, analysis: StoredAnalysis) -> str:
+        """Store an analysis and return its ID."""
+        analysis_id = uuid.uuid4().hex
+        now = time.time()
+        reviews = pickle.dumps(analysis.reviews, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                (analysis_id, reviews, analysis.plot, analysis.plot_format, now, now),
+            )
+            conn.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                """
+                DELETE FROM analyses WHERE analysis_id NOT IN (
+                    SELECT analysis_id FROM analyses ORDER BY accessed_at DESC LIMIT ?
+                )
+                """,
+                (self.maxsize,),
+            )
+        return analysis_id
+
+    def get(self, analysis_id: str) -> StoredAnalysis | None:
+        """Return a stored analysis, or None if it is unknown or expired."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT reviews, plot, plot_format FROM analyses WHERE analysis_id = ? AND created_at >= ?",
+                (analysis_id, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE analyses SET accessed_at = ? WHERE analysis_id = ?", (now, analysis_id))
+        reviews, plot, plot_format = row
+        return StoredAnalysis(pickle.loads(reviews), plot=plot, plot_format=plot_format)
+
+
+@lru_cache(maxsize=1)
+def get_analysis_store() -> AnalysisStore | SQLiteAnalysisStore:
+    """
+    Creates and returns the cached analysis store.
+    Its size is set with ANALYSIS_STORE_SIZE and the lifetime of entries with ANALYSIS_TTL_SECONDS.
+    With ANALYSIS_STORE_PATH, analyses are kept in that SQLite file and shared by the API workers using it,
+    otherwise they are kept in the memory of the process.
+
+    Returns:
+        AnalysisStore | SQLiteAnalysisStore
+    """
+    maxsize = int(os.getenv("ANALYSIS_STORE_SIZE", 100))
+    ttl = float(os.getenv("ANALYSIS_TTL_SECONDS", 3600))
+    path = os.getenv("ANALYSIS_STORE_PATH", "")
+    if path:
+        logger.info(f"Using analysis store at {path}")
+        return SQLiteAnalysisStore(path, maxsize=maxsize, ttl=ttl)
+    return AnalysisStore(maxsize=maxsize, ttl=ttl)
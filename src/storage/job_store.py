@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+from pathlib import Path
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    finished_at REAL
+);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed store of the state of background jobs, shared by all processes using the same file.
+
+    The API worker running a job writes its state here, so that any worker can answer the status and
+    result polls of the job. States are JSON documents, finished jobs expire after `ttl` seconds.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, job_id: str, state: dict, finished_at: float | None = None) -> None:
+        """Insert or replace the state of a job and delete the expired ones."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, state, finished_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(state), finished_at),
+            )
+            if finished_at is not None:
+                conn.execute("DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.ttl,))
+
+    def get(self, job_id: str) -> dict | None:
+        """Return the state of a job, or None if it is unknown or expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM jobs WHERE job_id = ? AND (finished_at IS NULL OR finished_at >= ?)",
+                (job_id, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+@lru_cache(maxsize=1)
+def get_job_store() -> JobStore | None:
+    """
+    Creates and returns the cached job store.
+    The store location is set with JOB_STORE_PATH, an empty value keeps jobs in the memory of the API worker
+    that runs them. The lifetime of finished jobs is set with JOB_TTL_SECONDS.
+
+    Returns:
+        JobStore | None: The job store, or None if it is disabled
+    """
+    path = os.getenv("JOB_STORE_PATH", "")
+    if not path:
+        return None
+    logger.info(f"Using job store at {path}")
+    return JobStore(path, ttl=float(os.getenv("JOB_TTL_SECONDS", 3600)))
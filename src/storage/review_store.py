@@ -0,0 +1,185 @@
+import os
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+
+from src.models import ReviewBatch, ReviewRecord
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    source TEXT NOT NULL,
+    app_id TEXT NOT NULL,
+    country TEXT NOT NULL,
+    review_key TEXT NOT NULL,
+    review_id TEXT,
+    user_name TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    review_text TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (source, app_id, country, review_key)
+);
+CREATE INDEX IF NOT EXISTS reviews_by_date ON reviews (source, app_id, country, date);
+"""
+
+
+def _content_key(review: ReviewRecord) -> str:
+    content = f"{review.user_name}\x00{review.date.isoformat()}\x00{review.review_text}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _review_key(review: ReviewRecord) -> str:
+    # Both stores return review IDs, reviews without one are keyed by their content
+    return review.review_id or _content_key(review)
+
+
+class ReviewStore:
+    """SQLite-backed store of scraped reviews, partitioned by source, app ID and country."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_reviews(self, app_id: int | str, reviews: ReviewBatch) -> int:
+        """
+        Insert new reviews and update the ones already stored.
+
+        Args:
+            app_id: ID of the app the reviews belong to
+            reviews: Reviews to store
+
+        Returns:
+            int: Number of upserted reviews
+        """
+        rows = [
+            (
+                review.source,
+                str(app_id),
+                review.country,
+                _review_key(review),
+                review.review_id,
+                review.user_name,
+                review.rating,
+                review.review_text,
+                review.date.isoformat(),
+            )
+            for review in reviews
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO reviews (source, app_id, country, review_key, review_id, user_name, rating, review_text, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, app_id, country, review_key) DO UPDATE SET
+                    user_name = excluded.user_name,
+                    rating = excluded.rating,
+                    review_text = excluded.review_text,
+                    date = excluded.date
+                """,
+                rows,
+            )
+            # Reviews stored before their store returned IDs were keyed by their content
+            conn.executemany(
+                "DELETE FROM reviews WHERE source = ? AND app_id = ? AND country = ? AND review_key = ?",
+                [
+                    (review.source, str(app_id), review.country, _content_key(review))
+                    for review in reviews
+                    if review.review_id
+                ],
+            )
+        return len(rows)
+
+    def latest_review_date(self, source: str, app_id: int | str, country: str) -> datetime | None:
+        """Return the date of the newest stored review, or None if nothing is stored."""
+        with self._connect() as conn:
+            (latest,) = conn.execute(
+                "SELECT MAX(date) FROM reviews WHERE source = ? AND app_id = ? AND country = ?",
+                (source, str(app_id), country),
+            ).fetchone()
+        return datetime.fromisoformat(latest) if latest else None
+
+    def count_reviews(self, source: str, app_id: int | str, country: str) -> int:
+        """Return the number of stored reviews."""
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM reviews WHERE source = ? AND app_id = ? AND country = ?",
+                (source, str(app_id), country),
+            ).fetchone()
+        return count
+
+    def delete_reviews_before(self, source: str, app_id: int | str, country: str, before: datetime) -> int:
+        """Delete the stored reviews posted before a date and return how many were deleted."""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM reviews WHERE source = ? AND app_id = ? AND country = ? AND date < ?",
+                (source, str(app_id), country, before.isoformat()),
+            ).rowcount
+
+    def load_reviews(self, source: str, app_id: int | str, country: str, limit: int | None = None) -> ReviewBatch:
+        """
+        Load stored reviews, newest first.
+
+        Args:
+            source: Reviews source
+            app_id: ID of the app
+            country: Country code of the store
+            limit: Maximum number of reviews to load (default: all)
+
+        Returns:
+            ReviewBatch
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT review_id, user_name, rating, review_text, date FROM reviews
+                WHERE source = ? AND app_id = ? AND country = ?
+                ORDER BY date DESC
+                LIMIT ?
+                """,
+                (source, str(app_id), country, -1 if limit is None else limit),
+            ).fetchall()
+
+        reviews = ReviewBatch()
+        for review_id, user_name, rating, review_text, date in rows:
+            reviews.append(
+                review_id=review_id,
+                source=source,
+                user_name=user_name,
+                country=country,
+                rating=rating,
+                review_text=review_text,
+                date=datetime.fromisoformat(date),
+            )
+        return reviews
+
+
+@lru_cache(maxsize=1)
+def get_review_store() -> ReviewStore | None:
+    """
+    Creates and returns the cached review store.
+    The store location is set with REVIEW_STORE_PATH, an empty value disables the store.
+
+    Returns:
+        ReviewStore | None: The review store, or None if it is disabled
+    """
+    path = os.getenv("REVIEW_STORE_PATH", "data/reviews.db")
+    if not path:
+        return None
+    logger.info(f"Using review store at {path}")
+    return ReviewStore(path)
@@ -0,0 +1,154 @@
+import os
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    source TEXT NOT NULL,
+    app_id TEXT NOT NULL,
+    country TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    covered_until TEXT NOT NULL,
+    review_count INTEGER NOT NULL,
+    sentiment_counts TEXT NOT NULL,
+    num_reviews INTEGER NOT NULL,
+    rebuilt_at TEXT NOT NULL,
+    rebuild_review_count INTEGER NOT NULL,
+    updates_since_rebuild INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (source, app_id, country, version)
+);
+"""
+
+COLUMNS = (
+    "version", "summary", "covered_until", "review_count", "sentiment_counts", "num_reviews",
+    "rebuilt_at", "rebuild_review_count", "updates_since_rebuild", "created_at",
+)
+
+
+class StoredSummary(NamedTuple):
+    """One version of the LLM summary of an app in one store and country."""
+
+    version: int
+    summary: str
+    # Date of the newest review the summary covers, newer reviews are not in it yet
+    covered_until: datetime
+    # Reviews summarized into this version and all versions since the last full rebuild
+    review_count: int
+    sentiment_counts: dict[str, int]
+    # Number of reviews requested by the analysis that did the last full rebuild
+    num_reviews: int
+    rebuilt_at: datetime
+    rebuild_review_count: int
+    updates_since_rebuild: int
+    created_at: datetime
+
+
+class SummaryStore:
+    """SQLite-backed store of versioned LLM summaries, partitioned by source, app ID and country."""
+
+    def __init__(self, path: str | Path, max_versions: int = 20):
+        self.path = Path(path)
+        self.max_versions = max_versions
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _from_row(row: tuple) -> StoredSummary:
+        values = dict(zip(COLUMNS, row))
+        for field in ("covered_until", "rebuilt_at", "created_at"):
+            values[field] = datetime.fromisoformat(values[field])
+        values["sentiment_counts"] = json.loads(values["sentiment_counts"])
+        return StoredSummary(**values)
+
+    def latest(self, source: str, app_id: int | str, country: str) -> StoredSummary | None:
+        """Return the newest version of the summary, or None if nothing is stored."""
+        versions = self.versions(source, app_id, country, limit=1)
+        return versions[0] if versions else None
+
+    def versions(self, source: str, app_id: int | str, country: str, limit: int | None = None) -> list[StoredSummary]:
+        """Return the stored versions of the summary, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {", ".join(COLUMNS)} FROM summaries
+                WHERE source = ? AND app_id = ? AND country = ?
+                ORDER BY version DESC
+                LIMIT ?
+                """,
+                (source, str(app_id), country, -1 if limit is None else limit),
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def add(self, source: str, app_id: int | str, country: str, summary: StoredSummary) -> int:
+        """
+        Store a new version of the summary. Versions beyond the newest `max_versions` are deleted.
+
+        Args:
+            source: Reviews source
+            app_id: ID of the app
+            country: Country code of the store
+            summary: The summary, its `version` is ignored
+
+        Returns:
+            int: Version number of the stored summary
+        """
+        values = summary._asdict()
+        for field in ("covered_until", "rebuilt_at", "created_at"):
+            values[field] = values[field].isoformat()
+        values["sentiment_counts"] = json.dumps(values["sentiment_counts"])
+        key = (source, str(app_id), country)
+
+        with self._connect() as conn:
+            (latest,) = conn.execute(
+                "SELECT MAX(version) FROM summaries WHERE source = ? AND app_id = ? AND country = ?", key
+            ).fetchone()
+            values["version"] = (latest or 0) + 1
+            conn.execute(
+                f"""
+                INSERT INTO summaries (source, app_id, country, {", ".join(COLUMNS)})
+                VALUES (?, ?, ?, {", ".join("?" for _ in COLUMNS)})
+                """,
+                (*key, *(values[column] for column in COLUMNS)),
+            )
+            conn.execute(
+                "DELETE FROM summaries WHERE source = ? AND app_id = ? AND country = ? AND version <= ?",
+                (*key, values["version"] - self.max_versions),
+            )
+        return values["version"]
+
+
+@lru_cache(maxsize=1)
+def get_summary_store() -> SummaryStore | None:
+    """
+    Creates and returns the cached summary store.
+    The store location is set with SUMMARY_STORE_PATH, an empty value disables the store and incremental summaries.
+    The number of versions kept per app, source and country is set with SUMMARY_STORE_VERSIONS.
+
+    Returns:
+        SummaryStore | None: The summary store, or None if it is disabled
+    """
+    path = os.getenv("SUMMARY_STORE_PATH", "data/summaries.db")
+    if not path:
+        return None
+    logger.info(f"Using summary store at {path}")
+    return SummaryStore(path, max_versions=int(os.getenv("SUMMARY_STORE_VERSIONS", 20)))
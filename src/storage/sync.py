@@ -0,0 +1,89 @@
+import os
+import asyncio
+import logging
+from types import ModuleType
+from typing import Callable
+
+from fastapi import HTTPException
+
+from src.models import ReviewBatch
+from src.pipeline.progress import report_progress
+from src.scrapers.http import ScraperError
+from src.storage.review_store import get_review_store
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_reviews_incrementally(
+    scraper: ModuleType,
+    source: str,
+    app_name: str,
+    app_id: int | str,
+    country: str = "us",
+    num_reviews: int = 100,
+    on_page: Callable[[ReviewBatch], None] | None = None,
+) -> ReviewBatch:
+    """
+    Fetch reviews through the review store, scraping only what is not stored yet.
+
+    Google Play reviews are fetched newest first and only down to the newest stored review, however
+    many arrived since, so the stored reviews stay contiguous. Up to REVIEW_SYNC_MAX_NEW_REVIEWS
+    (default: 10000) are fetched that way; if there are more, the stored reviews older than the fetched
+    ones are deleted rather than leaving a gap.
+    The App Store does not page by date, so App Store reviews are re-scraped and upserted.
+    A full fetch is also done whenever fewer than `num_reviews` reviews are stored.
+    Scraped pages are stored as they arrive.
+
+    Args:
+        scraper: Scraper module for the source
+        source: Reviews source
+        app_name: Name of the app
+        app_id: ID of the app in the store
+        country: Country code for the store (default: "us")
+        num_reviews: Number of reviews to return (default: 100)
+        on_page: Called with every scraped page, so later stages can start on it early
+
+    Returns:
+        ReviewBatch: The newest `num_reviews` reviews
+
+    Raises:
+        HTTPException: 404 if the store does not know the app, 502/503 if the store fails or throttles
+    """
+    store = get_review_store()
+    since = None
+    if store is not None and source == "google_play_market":
+        latest = await asyncio.to_thread(store.latest_review_date, source, app_id, country)
+        if latest is not None and await asyncio.to_thread(store.count_reviews, source, app_id, country) >= num_reviews:
+            since = latest
+
+    # An incremental fetch pages down to the newest stored review, not just `num_reviews` deep
+    max_new = int(os.getenv("REVIEW_SYNC_MAX_NEW_REVIEWS", 10_000))
+    if since is not None:
+        pages = scraper.iter_review_pages(app_id, country, max(num_reviews, max_new), since=since)
+    elif source == "google_play_market":
+        pages = scraper.iter_review_pages(app_id, country, num_reviews)
+    else:
+        pages = scraper.iter_review_pages(app_name, app_id, country, num_reviews)
+
+    fetched = ReviewBatch()
+    try:
+        async for page in pages:
+            fetched.extend(page)
+            report_progress("reviews", len(fetched), num_reviews)
+            if store is not None:
+                await asyncio.to_thread(store.upsert_reviews, app_id, page)
+            if on_page is not None:
+                on_page(page)
+    except ScraperError as e:
+        logger.error(f"Error fetching {source} reviews: {e}")
+        raise HTTPException(status_code=e.status_code, detail=f"Error fetching {source} reviews: {e}")
+
+    if store is None:
+        return fetched
+    if since is not None:
+        logger.info(f"Fetched {len(fetched)} new reviews since {since.isoformat()}")
+        if len(fetched) >= max(num_reviews, max_new):
+            # The newest stored review may not have been reached, older stored reviews would leave a gap
+            deleted = await asyncio.to_thread(store.delete_reviews_before, source, app_id, country, min(fetched.date))
+            logger.warning(f"Dropped {deleted} stored reviews older than the {len(fetched)} fetched ones")
+    return await asyncio.to_thread(store.load_reviews, source, app_id, country, limit=num_reviews)
@@ -0,0 +1,61 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from src.data_analysis import sentiment_analysis
+from src.jobs import shutdown_job_queue
+from src.llm import llm_pipeline
+from src.models import ReviewBatch
+from src.pipeline.fan_out import SCRAPERS
+from src.storage.analysis_store import get_analysis_store
+from src.storage.summary_store import get_summary_store
+from tests.fakes import FakeSummaryModel
+
+
+async def iter_review_pages(app_name, app_id, country="us", num_reviews=100):
+    for start in range(0, num_reviews, 20):
+        page = ReviewBatch()
+        for i in range(start, min(start + 20, num_reviews)):
+            page.append(
+                review_id=f"a{i}",
+                source="app_store",
+                user_name="user",
+                country=country,
+                rating=i % 5 + 1,
+                review_text=f"r{i:02d}",
+                date=datetime(2025, 1, 1),
+            )
+        yield page
+
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeSummaryModel:
+    """Fake chat model that the summaries of the app are generated with."""
+    llm = FakeSummaryModel()
+    monkeypatch.setattr(llm_pipeline, "get_anthropic_llm", lambda: llm)
+    return llm
+
+
+@pytest.fixture
+def client(monkeypatch, fake_llm):
+    """Client of the app with a fake App Store scraper, sentiment labeler and chat model, and no stores on disk."""
+    for name in ("REVIEW_STORE_PATH", "SUMMARY_STORE_PATH", "SENTIMENT_CACHE_PATH", "JOB_STORE_PATH", "STARTUP_WARMUP"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.setenv("JOB_BACKEND", "local")
+    monkeypatch.setenv("LLM_BATCH_SIZE", "10")
+    monkeypatch.setenv("LLM_BATCH_MIN_FILL", "1")
+    scraper = SimpleNamespace(iter_review_pages=iter_review_pages)
+    monkeypatch.setitem(SCRAPERS, "app_store", scraper)
+    monkeypatch.setattr(app, "app_store_scraper", scraper)
+    monkeypatch.setattr(sentiment_analysis, "_predict", lambda texts: ["Positive"] * len(texts))
+    shutdown_job_queue()
+    get_analysis_store.cache_clear()
+    get_summary_store.cache_clear()
+
+    with TestClient(app.app) as client:
+        yield client
+    get_analysis_store.cache_clear()
+    get_summary_store.cache_clear()
@@ -0,0 +1,26 @@
+import re
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeSummaryModel(BaseChatModel):
+    """Chat model that answers from the prompt: the range of reviews of a batch, or the number of summaries merged."""
+
+    prompts: list[str] = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(message.content for message in messages)
+        self.prompts.append(prompt)
+        partial_summaries = re.findall(r"<partial_summary>", prompt)
+        if partial_summaries:
+            content = f"<overview>merged {len(partial_summaries)} summaries</overview>"
+        else:
+            reviews = re.findall(r"<review>[^<]*\| (r\d+)</review>", prompt)
+            content = f"<overview>covers {reviews[0]}-{reviews[-1]}</overview>"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-summary"
@@ -0,0 +1,96 @@
+import json
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.models import ReviewBatch
+from src.pipeline.fan_out import SCRAPERS, Shard, afetch_app_description, merge_shards, summary_target
+from src.storage.summary_store import get_summary_store
+
+
+def make_batch(*reviews: tuple[str, str | None, str, str]) -> ReviewBatch:
+    batch = ReviewBatch()
+    for source, review_id, user_name, text in reviews:
+        batch.append(
+            review_id=review_id,
+            source=source,
+            user_name=user_name,
+            country="us",
+            rating=4,
+            review_text=text,
+            date=datetime(2025, 1, 1),
+        )
+    return batch
+
+
+def test_merge_drops_reviews_with_the_same_store_id():
+    us = make_batch(("google_play_market", "g1", "ann", "Great"), ("google_play_market", "g2", "bob", "Bad"))
+    gb = make_batch(("google_play_market", "g2", "bob", "Bad"), ("google_play_market", "g3", "cid", "Okay"))
+    app_store = make_batch(("app_store", "g1", "ann", "Great"))
+
+    merged = merge_shards([us, gb, app_store])
+
+    assert list(zip(merged.source, merged.review_id)) == [
+        ("google_play_market", "g1"), ("google_play_market", "g2"), ("google_play_market", "g3"), ("app_store", "g1")
+    ]
+
+
+def test_merge_drops_reviews_without_id_by_user_date_and_text():
+    first = make_batch(("app_store", None, "ann", "Great"), ("app_store", None, "ann", "Great, edited"))
+    second = make_batch(("app_store", None, "ann", "Great"), ("app_store", None, "bob", "Great"))
+
+    merged = merge_shards([first, second])
+
+    assert list(zip(merged.user_name, merged.review_text)) == [
+        ("ann", "Great"), ("ann", "Great, edited"), ("bob", "Great")
+    ]
+
+
+def test_description_falls_back_to_the_next_country(monkeypatch):
+    descriptions = {"de": None, "fr": "Une app", "us": "An app"}
+    requested = []
+
+    async def fetch_description(app_id, country):
+        requested.append(country)
+        return descriptions[country]
+
+    monkeypatch.setitem(SCRAPERS, "google_play_market", SimpleNamespace(afetch_app_description=fetch_description))
+
+    assert asyncio.run(afetch_app_description("com.x", ["de", "fr", "us"])) == "Une app"
+    assert requested == ["de", "fr"]
+    assert asyncio.run(afetch_app_description("com.x", ["de"])) is None
+
+
+def test_summary_target_depends_on_the_apps_and_countries_only():
+    shards = [Shard("app_store", 123, "us"), Shard("google_play_market", "com.x", "us"), Shard("app_store", 123, "de")]
+
+    target = summary_target(shards, 100)
+
+    assert target == ("fan_out", "app_store:123|google_play_market:com.x", "de,us", 100, False)
+    assert summary_target(shards[::-1], 100) == target
+    assert summary_target(shards[:2], 100) != target
+
+
+def test_fan_out_merges_countries_and_stores_its_summary(client, fake_llm, tmp_path, monkeypatch):
+    monkeypatch.setenv("SUMMARY_STORE_PATH", str(tmp_path / "summaries.db"))
+    get_summary_store.cache_clear()
+    params = {"app_name": "App", "app_store_id": 123, "countries": ["us", "gb"], "num_reviews": 30, "include_plots": 0}
+
+    def fan_out() -> list[dict]:
+        return [json.loads(line) for line in client.get("/app-reviews/fan-out/", params=params).text.splitlines()]
+
+    events = fan_out()
+    calls = len(fake_llm.prompts)
+    repeated = fan_out()
+
+    shards = [event for event in events if event["event"] == "shard"]
+    assert sorted(event["country"] for event in shards) == ["gb", "us"]
+    # The fake store returns the same review IDs in every country
+    assert events[len(shards)] == {"event": "merged", "reviews": 30, "duplicates": 30}
+    assert events[-1]["data"]["metrics"]["total_reviews"] == 30
+    assert events[-1]["data"]["summary_update"]["update"] == "full"
+    assert repeated[-1]["data"]["summary_update"]["update"] == "unchanged"
+    assert repeated[-1]["data"]["llm_summary"] == events[-1]["data"]["llm_summary"]
+    assert len(fake_llm.prompts) == calls
+    stored = get_summary_store().latest("fan_out", "app_store:123", "gb,us")
+    assert stored.summary == events[-1]["data"]["llm_summary"]
@@ -0,0 +1,6 @@
+from utils.check_import_time import check_import_time
+
+
+def test_app_import_is_fast_and_defers_heavy_dependencies():
+    # Raises if the import is over IMPORT_TIME_BUDGET_SECONDS or loads one of DEFERRED_MODULES
+    check_import_time("app")
@@ -0,0 +1,30 @@
+import time
+
+
+def test_local_job_reports_progress_and_serves_its_result(client):
+    request = {"app_name": "App", "app_id": 123, "num_reviews": 30, "summary_mode": "refine", "include_plots": False}
+    response = client.post("/jobs/", json=request)
+    assert response.status_code == 202
+    job = response.json()
+
+    deadline = time.monotonic() + 30
+    while (status := client.get(job["status_url"]).json())["status"] not in ("succeeded", "failed"):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    assert status["status"] == "succeeded", status["error"]
+    assert status["progress"]["reviews"] == {"done": 30, "total": 30}
+    assert status["progress"]["sentiment"] == {"done": 30, "total": 30}
+    assert status["progress"]["llm_batches"] == {"done": 3, "total": 3}
+
+    result = client.get(job["result_url"]).json()
+    assert result["llm_summary"] == "**Overview**:\ncovers r20-r29"
+    assert result["metrics"]["total_reviews"] == 30
+    assert result["raw_data"]["count"] == 30
+    reviews = client.get(result["raw_data"]["url"]).text.splitlines()
+    assert len(reviews) == 30
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.get("/jobs/unknown/result").status_code == 404
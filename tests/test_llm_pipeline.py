@@ -0,0 +1,134 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from src.llm import cache as llm_cache
+from src.llm.cache import MemoryLLMCache, SQLiteLLMCache
+from src.llm.llm_pipeline import generate_summary
+from src.models import Review, ReviewBatch
+from tests.fakes import FakeSummaryModel
+
+
+@pytest.fixture
+def reviews() -> ReviewBatch:
+    return ReviewBatch.from_reviews(
+        Review(
+            source="app_store",
+            user_name="user",
+            country="us",
+            rating=4,
+            review_text=f"r{i:02d}",
+            date=datetime(2025, 1, 1),
+        )
+        for i in range(25)
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make_cache(ttl: float | None = None):
+        if request.param == "memory":
+            return MemoryLLMCache(ttl=ttl)
+        return SQLiteLLMCache(tmp_path / "llm_cache.db", ttl=ttl)
+
+    return make_cache
+
+
+@pytest.fixture(autouse=True)
+def batches_of_ten(monkeypatch):
+    monkeypatch.setenv("LLM_BATCH_SIZE", "10")
+    monkeypatch.setenv("LLM_BATCH_MIN_FILL", "1")
+    monkeypatch.setenv("LLM_REDUCE_FAN_IN", "4")
+
+
+def test_refine_folds_batches_into_the_running_summary(reviews):
+    llm = FakeSummaryModel()
+
+    summary = generate_summary(reviews, "App", "", mode="refine", llm=llm)
+
+    assert summary == "**Overview**:\ncovers r20-r24"
+    assert len(llm.prompts) == 3
+    assert "Previous analysis summary" not in llm.prompts[0]
+    assert "covers r00-r09" in llm.prompts[1]
+    assert "covers r10-r19" in llm.prompts[2]
+
+
+def test_refine_is_seeded_with_the_previous_summary(reviews):
+    llm = FakeSummaryModel()
+
+    summary = generate_summary(
+        reviews[20:], "App", "", mode="map_reduce", llm=llm, previous_summary="**Overview**:\ncovers r00-r19"
+    )
+
+    assert summary == "**Overview**:\ncovers r20-r24"
+    assert len(llm.prompts) == 1
+    assert "Previous analysis summary: **Overview**:\ncovers r00-r19" in llm.prompts[0]
+
+
+def test_template_syntax_in_reviews_is_not_rendered(reviews):
+    llm = FakeSummaryModel()
+    injected = "{{ app_name }} {% for review in reviews %}{{ review }}{% endfor %} {# note #}"
+    batch = ReviewBatch.from_reviews([Review(**{**reviews[0].to_review().model_dump(), "review_text": injected})])
+    batch.extend(reviews[:9])
+
+    generate_summary(batch, "App", "{{ 7 * 7 }}", mode="refine", llm=llm, previous_summary="{% raw %}")
+
+    prompt = llm.prompts[0]
+    assert f"1. <review>4/5 | {injected}</review>" in prompt
+    assert "Description: {{ 7 * 7 }}" in prompt
+    assert "Previous analysis summary: {% raw %}" in prompt
+
+
+def test_map_reduce_summarizes_batches_independently_and_merges_them(reviews):
+    llm = FakeSummaryModel()
+
+    summary = generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+
+    assert summary == "**Overview**:\nmerged 3 summaries"
+    assert len(llm.prompts) == 4
+    batch_prompts, merge_prompt = llm.prompts[:3], llm.prompts[3]
+    assert all("Previous analysis summary" not in prompt for prompt in batch_prompts)
+    partial_summaries = re.findall(r"<partial_summary>(.*?)</partial_summary>", merge_prompt, flags=re.DOTALL)
+    assert partial_summaries == [f"**Overview**:\ncovers {batch}" for batch in ("r00-r09", "r10-r19", "r20-r24")]
+
+
+def test_repeated_review_set_is_served_from_the_cache(reviews, make_cache):
+    cache = make_cache()
+    llm = FakeSummaryModel(cache=cache)
+    first = generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+
+    second = generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+
+    assert second == first
+    assert len(llm.prompts) == 4
+    assert (cache.hits, cache.misses) == (4, 4)
+
+
+def test_overlapping_review_set_reuses_the_batches_it_shares(reviews, make_cache):
+    cache = make_cache()
+    llm = FakeSummaryModel(cache=cache)
+    generate_summary(reviews[:20], "App", "", mode="map_reduce", llm=llm)
+    llm.prompts.clear()
+
+    generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+
+    # The batches r00-r09 and r10-r19 are cached, the last batch and the merge are not
+    assert cache.hits == 2
+    assert len(llm.prompts) == 2
+
+
+def test_cached_responses_expire_after_their_ttl(reviews, make_cache, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now)
+    cache = make_cache(ttl=60)
+    llm = FakeSummaryModel(cache=cache)
+    generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+
+    now += 30
+    generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+    assert len(llm.prompts) == 4
+
+    now += 60
+    generate_summary(reviews, "App", "", mode="map_reduce", llm=llm)
+    assert len(llm.prompts) == 8
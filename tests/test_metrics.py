@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.data_analysis.metrics import calculate_metrics
+from src.models import Review, ReviewBatch, Sentiment
+
+
+def make_review(day: datetime, rating: int, sentiment: Sentiment, country: str = "us", text: str = "text") -> Review:
+    return Review(
+        source="app_store", user_name="user", country=country, rating=rating, sentiment=sentiment, review_text=text,
+        date=day,
+    )
+
+
+def baseline_distributions(reviews: list[Review]) -> dict:
+    """Distributions as computed review by review before the metrics were vectorized."""
+    n_reviews = len(reviews)
+
+    def distribution(values, keys) -> dict:
+        return {
+            key: {"count": values.count(key), "percentage": round(values.count(key) / n_reviews * 100, 2)}
+            for key in keys
+        }
+
+    countries = list(dict.fromkeys(r.country for r in reviews))
+    return {
+        "total_reviews": n_reviews,
+        "average_rating": round(sum(r.rating for r in reviews) / n_reviews, 2),
+        "sentiment_distribution": distribution([r.sentiment for r in reviews], Sentiment),
+        "rating_distribution": distribution([r.rating for r in reviews], range(1, 6)),
+        "country_distribution": distribution([r.country for r in reviews], countries),
+    }
+
+
+@pytest.mark.parametrize("as_batch", [False, True])
+def test_distributions_match_the_baseline(as_batch):
+    rng = random.Random(0)
+    reviews = [
+        make_review(
+            datetime(2025, 1, 1) + timedelta(hours=rng.randrange(24 * 60)),
+            rng.randint(1, 5),
+            rng.choice(list(Sentiment)),
+            country=rng.choice(["us", "gb", "de"]),
+            text="x" * rng.randrange(200),
+        )
+        for _ in range(500)
+    ]
+
+    metrics = calculate_metrics(ReviewBatch.from_reviews(reviews) if as_batch else reviews)
+
+    for name, expected in baseline_distributions(reviews).items():
+        assert metrics[name] == expected, name
+
+
+def test_time_series_only_lists_periods_with_reviews():
+    sentiment = list(Sentiment)
+    reviews = [
+        make_review(datetime(2020, 1, 1), 1, sentiment[0]),
+        make_review(datetime(2025, 3, 3, 9), 5, sentiment[4]),
+        make_review(datetime(2025, 3, 3, 18), 3, sentiment[2]),
+        make_review(datetime(2025, 3, 8), 4, sentiment[3]),
+        make_review(datetime(2025, 3, 12), 2, sentiment[1]),
+    ]
+
+    series = calculate_metrics(reviews)["time_series"]
+
+    daily = {day["date"]: day for day in series["daily"]}
+    assert list(daily) == ["2020-01-01", "2025-03-03", "2025-03-08", "2025-03-12"]
+    assert (daily["2025-03-03"]["count"], daily["2025-03-03"]["average_rating"]) == (2, 4.0)
+    # The 7 days up to March 8 include March 3, those up to March 12 only include March 8
+    assert daily["2025-03-08"]["rolling_average_rating"] == 4.0
+    assert daily["2025-03-12"]["rolling_average_rating"] == 3.0
+    assert daily["2020-01-01"]["rolling_average_sentiment"] == 1.0
+
+    weekly = {week["date"]: week for week in series["weekly"]}
+    assert list(weekly) == ["2019-12-30", "2025-03-03", "2025-03-10"]
+    assert [weekly[week]["count"] for week in weekly] == [1, 3, 1]
+    assert weekly["2025-03-10"]["rolling_average_rating"] == 3.5
@@ -0,0 +1,73 @@
+import json
+from itertools import combinations
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from src.llm.output_parser import XMLToMarkdownParser, XMLToMarkdownStream
+
+TEXTS = [
+    "<overview>\nUsers like it.\n\n\n\nBut a < b and x<y.\n</overview>\n\n"
+    "<pain_points>\n1. Crash <b>bold</b>\n</pain_points>",
+    "Intro text\n\n<overview>  hi  </overview> trailing </x> <",
+    "  <a></a><b>x</b>  ",
+    "<major_themes>\n1. A\n</major_themes>\n\n\n\n<x>\n\n\ny\n\n\n</x>\n  \n",
+    "no tags at all\n\n\n\nreally   ",
+]
+
+
+def stream(chunks: list[str]) -> str:
+    markdown = XMLToMarkdownStream()
+    return "".join(markdown.feed(chunk) for chunk in chunks) + markdown.close()
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_stream_matches_parse_for_every_split_into_up_to_three_chunks(text):
+    expected = XMLToMarkdownParser().parse(text)
+
+    assert stream([text]) == expected
+    assert stream(list(text)) == expected
+    for cuts in (*combinations(range(1, len(text)), 1), *combinations(range(1, len(text)), 2)):
+        bounds = (0, *cuts, len(text))
+        chunks = [text[start:end] for start, end in zip(bounds, bounds[1:])]
+        assert stream(chunks) == expected, chunks
+
+
+def test_transform_reads_message_chunks():
+    chunks = [
+        AIMessageChunk(content="<over"),
+        AIMessageChunk(content=[{"type": "text", "text": "view>Hel"}, {"type": "tool_use", "id": "x"}]),
+        AIMessageChunk(content="lo</overview>  "),
+    ]
+
+    assert "".join(XMLToMarkdownParser().transform(iter(chunks))) == "**Overview**:\nHello"
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_endpoint_sends_events_in_stage_order(client):
+    params = {"app_name": "App", "app_id": 123, "num_reviews": 30, "summary_mode": "refine", "include_plots": False}
+
+    with client.stream("GET", "/app-reviews/stream/", params=params) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_events(response.read().decode("utf-8"))
+
+    names = [name for name, _ in events if name != "progress"]
+    assert names[0] == "reviews" and names[-1] == "result"
+    assert names.index("reviews") < names.index("sentiment") < names.index("metrics")
+    assert names.index("sentiment") < names.index("summary_chunk") < names.index("summary")
+    assert "error" not in names
+
+    data = dict(events)
+    chunks = "".join(payload["text"] for name, payload in events if name == "summary_chunk")
+    assert chunks == data["summary"]["text"] == data["result"]["llm_summary"] == "**Overview**:\ncovers r20-r29"
+    assert data["reviews"] == data["sentiment"] == {"count": 30}
+    assert data["metrics"] == data["result"]["metrics"]
+    progress = [payload for name, payload in events if name == "progress" and payload["stage"] == "llm_batches"]
+    assert progress[-1] == {"stage": "llm_batches", "done": 3, "total": 3}
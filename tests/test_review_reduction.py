@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+
+from benchmarks.fixtures import generate_reviews
+from src.data_analysis.review_reduction import _allocate, cluster_near_duplicates, reduce_reviews
+from src.models import Review, ReviewBatch
+
+
+def make_reviews(*reviews: tuple[str, int, str]) -> ReviewBatch:
+    return ReviewBatch.from_reviews(
+        Review(
+            source="app_store",
+            user_name="user",
+            country="us",
+            rating=rating,
+            sentiment=sentiment,
+            review_text=text,
+            date=datetime(2025, 1, 1),
+        )
+        for text, rating, sentiment in reviews
+    )
+
+
+def test_exact_and_near_duplicates_are_clustered():
+    texts = [
+        "The app crashes every time I open the map on my phone",
+        "the app crashes every time I open the map on my phone!!",
+        "The app crashes every time I open the map on my new phone",
+        "Love the dark mode",
+    ]
+
+    clusters = cluster_near_duplicates(texts, threshold=0.6)
+
+    assert sorted(clusters) == [[0, 1, 2], [3]]
+
+
+def test_texts_of_different_groups_are_never_clustered():
+    texts = ["Great app", "great app!", "Great app"]
+
+    clusters = cluster_near_duplicates(texts, groups=[(5, "Positive"), (1, "Negative"), (5, "Positive")])
+
+    assert sorted(clusters) == [[0, 2], [1]]
+
+
+def test_texts_empty_once_normalized_stay_apart():
+    clusters = cluster_near_duplicates(["😍😍", "🤬", "!!!", "🤬"])
+
+    assert sorted(clusters) == [[0], [1], [2], [3]]
+
+
+def test_allocate_splits_the_total_proportionally_with_largest_remainders():
+    assert _allocate({"a": 1, "b": 1, "c": 1}, 4) == {"a": 2, "b": 1, "c": 1}
+    assert _allocate({"a": 6, "b": 3, "c": 1}, 5) == {"a": 3, "b": 2, "c": 0}
+    assert sum(_allocate({"a": 7, "b": 2, "c": 5}, 11).values()) == 11
+
+
+def test_reduction_keeps_the_rating_and_sentiment_of_every_review():
+    reviews = make_reviews(
+        ("😍😍", 5, "Positive"),
+        ("🤬", 1, "Negative"),
+        ("!!!", 1, "Negative"),
+        ("Great app", 5, "Positive"),
+        ("great app!", 1, "Negative"),
+    )
+
+    reduced, weights = reduce_reviews(reviews, ratio=0.5, min_reviews=0)
+
+    kept = {(review.rating, review.sentiment): 0 for review in reduced}
+    for review, weight in zip(reduced, weights):
+        kept[(review.rating, review.sentiment)] += weight
+    assert kept == {(5, "Positive"): 2, (1, "Negative"): 3}
+
+
+@pytest.mark.parametrize("num_reviews", [1, 50, 300, 3000])
+def test_weights_add_up_to_the_number_of_reviews(num_reviews):
+    reviews = generate_reviews(num_reviews, seed=1)
+
+    reduced, weights = reduce_reviews(reviews, ratio=0.5, max_reviews=500, min_reviews=200)
+
+    assert len(reduced) == len(weights)
+    assert sum(weights) == num_reviews
+    assert len(reduced) <= max(500 if num_reviews > 200 else num_reviews, 1)
+
+
+def test_small_review_sets_are_only_deduplicated():
+    reviews = make_reviews(*((f"review number {i} about feature {i}", 4, "Positive") for i in range(100)))
+
+    reduced, weights = reduce_reviews(reviews, ratio=0.5, min_reviews=200)
+
+    assert len(reduced) == 100
+    assert weights == [1] * 100
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.models import ReviewBatch
+from src.storage import review_store
+from src.storage.sync import fetch_reviews_incrementally
+
+START = datetime(2025, 1, 1)
+
+
+class FakeGooglePlay:
+    """Google Play scraper serving `count` reviews, newest first, in pages of 100."""
+
+    def __init__(self, count: int):
+        self.count = count
+
+    def publish(self, count: int) -> None:
+        self.count += count
+
+    async def iter_review_pages(self, app_id, country, num_reviews, since=None):
+        reviews = ReviewBatch()
+        for i in reversed(range(self.count)):
+            date = START + timedelta(hours=i)
+            if len(reviews) >= num_reviews or (since is not None and date <= since):
+                break
+            reviews.append(
+                review_id=f"gp-{i}",
+                source="google_play_market",
+                user_name=f"user {i}",
+                country=country,
+                rating=i % 5 + 1,
+                review_text=f"review {i}",
+                date=date,
+            )
+        for start in range(0, len(reviews), 100):
+            yield reviews[start : start + 100]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("REVIEW_STORE_PATH", str(tmp_path / "reviews.db"))
+    review_store.get_review_store.cache_clear()
+    yield review_store.get_review_store()
+    review_store.get_review_store.cache_clear()
+
+
+def sync(scraper, num_reviews: int) -> ReviewBatch:
+    return asyncio.run(
+        fetch_reviews_incrementally(scraper, "google_play_market", "App", "app", num_reviews=num_reviews)
+    )
+
+
+def assert_contiguous(reviews: ReviewBatch) -> None:
+    hours = [int((date - START).total_seconds() // 3600) for date in reviews.date]
+    assert hours == list(range(hours[0], hours[0] - len(hours), -1))
+
+
+def test_incremental_sync_fetches_every_review_since_the_last_one(store):
+    scraper = FakeGooglePlay(100)
+    assert len(sync(scraper, 100)) == 100
+
+    scraper.publish(250)
+    reviews = sync(scraper, 100)
+
+    assert reviews.review_id == [f"gp-{i}" for i in range(349, 249, -1)]
+    assert store.count_reviews("google_play_market", "app", "us") == 350
+    assert_contiguous(store.load_reviews("google_play_market", "app", "us", limit=300))
+
+
+def test_incremental_sync_drops_stored_reviews_it_cannot_reach(store, monkeypatch):
+    monkeypatch.setenv("REVIEW_SYNC_MAX_NEW_REVIEWS", "200")
+    scraper = FakeGooglePlay(100)
+    sync(scraper, 100)
+
+    scraper.publish(250)
+    sync(scraper, 100)
+
+    stored = store.load_reviews("google_play_market", "app", "us")
+    assert len(stored) == 200
+    assert stored.review_id[-1] == "gp-150"
+    assert_contiguous(stored)
+
+
+def test_reviews_are_keyed_by_their_id_when_they_have_one(store):
+    def app_store_review(review_id: str | None, text: str) -> ReviewBatch:
+        reviews = ReviewBatch()
+        reviews.append(
+            review_id=review_id,
+            source="app_store",
+            user_name="user",
+            country="us",
+            rating=4,
+            review_text=text,
+            date=START,
+        )
+        return reviews
+
+    store.upsert_reviews(123, app_store_review(None, "Nice"))
+    store.upsert_reviews(123, app_store_review("a1", "Nice"))
+    store.upsert_reviews(123, app_store_review("a1", "Nice, edited"))
+
+    stored = store.load_reviews("app_store", 123, "us")
+    assert (stored.review_id, stored.review_text) == (["a1"], ["Nice, edited"])
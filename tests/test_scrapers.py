@@ -0,0 +1,203 @@
+import json
+import asyncio
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.scrapers import app_store, google_play_market
+from src.scrapers.http import ScraperError, ScraperThrottledError, _backoff_delay, aclose_http_client
+from src.scrapers.rate_limit import get_rate_limiter
+from src.storage.sync import fetch_reviews_incrementally
+from utils.replay_store_server import serve
+
+GOOGLE_PLAY_START = datetime(2024, 5, 1, 12)
+
+
+def app_store_recordings(num_reviews: int = 30) -> list[dict]:
+    landing_page = '<meta name="web-experience-app/config/environment" content="%7B%22token%22%3A%22abc%22%7D">'
+    entries = [{"method": "GET", "path": "/us/app/my-app/id123", "status": 200, "text": landing_page}]
+    for offset in range(0, num_reviews, app_store.PAGE_SIZE):
+        data = [
+            {
+                "id": f"a{i}",
+                "attributes": {"userName": "u", "rating": 4, "review": f"r{i}", "date": "2024-05-01T10:00:00Z"},
+            }
+            for i in range(offset, min(offset + app_store.PAGE_SIZE, num_reviews))
+        ]
+        next_offset = offset + app_store.PAGE_SIZE
+        next_url = f"/v1/catalog/us/apps/123/reviews?offset={next_offset}" if next_offset < num_reviews else None
+        query = urlencode({
+            "l": "en-GB",
+            "offset": offset,
+            "limit": app_store.PAGE_SIZE,
+            "platform": "web",
+            "additionalPlatforms": "appletv,ipad,iphone,mac",
+        })
+        entries.append({
+            "method": "GET",
+            "path": "/v1/catalog/us/apps/123/reviews",
+            "query": query,
+            "status": 200,
+            "text": json.dumps({"data": data, "next": next_url}),
+        })
+    return entries
+
+
+def google_play_page(start: int, stop: int, token: str | None) -> str:
+    # Same layout as the batchexecute responses of Google Play
+    items = [
+        [f"g{i}", ["user"], 5, None, f"text {i}", [int((GOOGLE_PLAY_START - timedelta(minutes=i)).timestamp())]]
+        for i in range(start, stop)
+    ]
+    results = json.dumps([items, None, [None, token], None])
+    return ")]}'\n\n" + json.dumps([["wrb.fr", "oCPfdb", results, None, None, None, "generic"]])
+
+
+def google_play_recordings() -> list[dict]:
+    # Recorded without bodies, so pages are replayed in order whatever the request
+    path = "/_/PlayStoreUi/data/batchexecute"
+    return [
+        {"method": "POST", "path": path, "status": 200, "text": google_play_page(0, 100, "TOK")},
+        {"method": "POST", "path": path, "status": 200, "text": google_play_page(100, 150, None)},
+    ]
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """Start the replay server on recordings and point the scrapers at it."""
+    monkeypatch.setenv("SCRAPER_BACKOFF_BASE_SECONDS", "0")
+    monkeypatch.setenv("SCRAPER_RATE_LIMIT", "1000")
+    monkeypatch.setenv("SCRAPER_BURST", "1000")
+    monkeypatch.setenv("REVIEW_STORE_PATH", "")
+    get_rate_limiter.cache_clear()
+    servers = []
+
+    def replay(entries: list[dict], throttle_every: int = 0) -> None:
+        path = tmp_path / f"recordings{len(servers)}.jsonl"
+        with open(path, "w", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps({"query": "", "body": None, "content_type": None, **entry}) + "\n")
+        server = serve(path, port=0, throttle_every=throttle_every)
+        servers.append(server)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        for name in ("APP_STORE_BASE_URL", "APP_STORE_API_BASE_URL", "GOOGLE_PLAY_BASE_URL"):
+            monkeypatch.setenv(name, base_url)
+
+    yield replay
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    get_rate_limiter.cache_clear()
+
+
+def collect(pages) -> list:
+    async def run():
+        try:
+            return [page async for page in pages]
+        finally:
+            await aclose_http_client()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("throttle_every", [0, 2])
+def test_app_store_pages_are_parsed(replay, throttle_every):
+    replay(app_store_recordings(30), throttle_every=throttle_every)
+
+    pages = collect(app_store.iter_review_pages("My App", 123, "US", num_reviews=30))
+
+    assert [len(page) for page in pages] == [20, 10]
+    first = pages[0][0]
+    assert (first.review_id, first.source, first.country, first.rating, first.review_text) == (
+        "a0", "app_store", "us", 4, "r0"
+    )
+    assert first.date == datetime(2024, 5, 1, 10)
+    assert [review.review_id for page in pages for review in page] == [f"a{i}" for i in range(30)]
+
+
+@pytest.mark.parametrize("throttle_every", [0, 2])
+def test_google_play_pages_are_parsed(replay, throttle_every):
+    replay(google_play_recordings(), throttle_every=throttle_every)
+
+    pages = collect(google_play_market.iter_review_pages("com.x", "us", num_reviews=150))
+
+    assert [len(page) for page in pages] == [100, 50]
+    first = pages[0][0]
+    assert (first.review_id, first.source, first.user_name, first.rating, first.review_text) == (
+        "g0", "google_play_market", "user", 5, "text 0"
+    )
+    assert first.date == GOOGLE_PLAY_START
+
+
+def test_google_play_stops_at_the_since_date(replay):
+    replay(google_play_recordings())
+    since = GOOGLE_PLAY_START - timedelta(minutes=40)
+
+    pages = collect(google_play_market.iter_review_pages("com.x", "us", num_reviews=150, since=since))
+
+    assert [review.review_id for page in pages for review in page] == [f"g{i}" for i in range(40)]
+
+
+def test_app_store_page_without_a_token_is_a_scraper_error(replay):
+    landing_page, reviews_page = app_store_recordings(10)
+    replay([{**landing_page, "text": "<html></html>"}, reviews_page])
+
+    with pytest.raises(ScraperError, match="No App Store API token found on .*/us/app/my-app/id123"):
+        collect(app_store.iter_review_pages("My App", 123, "us", num_reviews=10))
+
+
+def test_server_errors_are_retried(replay):
+    entries = app_store_recordings(10)
+    landing_page, reviews_page = entries
+    server_errors = [{**reviews_page, "status": 503, "text": ""}, {**reviews_page, "status": 500, "text": ""}]
+    replay([landing_page, *server_errors, reviews_page])
+
+    pages = collect(app_store.iter_review_pages("My App", 123, "us", num_reviews=10))
+
+    assert [len(page) for page in pages] == [10]
+
+
+def test_persistent_throttling_gives_up_after_the_retries(replay, monkeypatch):
+    monkeypatch.setenv("SCRAPER_MAX_RETRIES", "2")
+    replay(google_play_recordings(), throttle_every=1)
+
+    with pytest.raises(ScraperThrottledError):
+        collect(google_play_market.iter_review_pages("com.x", "us", num_reviews=100))
+
+
+def test_backoff_honours_retry_after_up_to_the_cap(monkeypatch):
+    monkeypatch.setenv("SCRAPER_BACKOFF_BASE_SECONDS", "1")
+    monkeypatch.setenv("SCRAPER_BACKOFF_MAX_SECONDS", "10")
+
+    assert _backoff_delay(0, httpx.Response(429, headers={"Retry-After": "3"})) == 3
+    assert _backoff_delay(0, httpx.Response(429, headers={"Retry-After": "60"})) == 10
+    assert 0 <= _backoff_delay(2, httpx.Response(503)) <= 4
+    assert 0 <= _backoff_delay(8, None) <= 10
+
+
+@pytest.mark.parametrize(
+    ("source", "entries", "throttle_every", "status_code"),
+    [
+        ("app_store", [], 0, 404),
+        ("app_store", app_store_recordings(10), 1, 503),
+        ("google_play_market", [{**google_play_recordings()[0], "text": "<html></html>"}], 0, 502),
+        ("app_store", [{**app_store_recordings(10)[0], "text": "<html></html>"}], 0, 502),
+    ],
+)
+def test_scraper_errors_map_to_http_statuses(replay, monkeypatch, source, entries, throttle_every, status_code):
+    monkeypatch.setenv("SCRAPER_MAX_RETRIES", "1")
+    replay(entries, throttle_every=throttle_every)
+    scraper, app_id = (app_store, 123) if source == "app_store" else (google_play_market, "com.x")
+
+    async def run():
+        try:
+            await fetch_reviews_incrementally(scraper, source, "My App", app_id, num_reviews=10)
+        finally:
+            await aclose_http_client()
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(run())
+    assert e.value.status_code == status_code
@@ -0,0 +1,66 @@
+import pytest
+
+from src.data_analysis.sentiment_cache import SentimentCache, get_sentiment_cache
+
+
+@pytest.fixture
+def configured_cache(monkeypatch):
+    """Build the cache of the configured model and backend."""
+    monkeypatch.setenv("SENTIMENT_CACHE_PATH", "")
+
+    def configured_cache(model: str, backend: str) -> SentimentCache:
+        monkeypatch.setenv("SENTIMENT_MODEL", model)
+        monkeypatch.setenv("SENTIMENT_BACKEND", backend)
+        get_sentiment_cache.cache_clear()
+        return get_sentiment_cache()
+
+    yield configured_cache
+    get_sentiment_cache.cache_clear()
+
+
+def test_key_depends_on_the_model_and_backend(configured_cache):
+    keys = {
+        configured_cache(model, backend).key("Great app")
+        for model, backend in [("model-a", "torch"), ("model-b", "torch"), ("model-a", "onnx")]
+    }
+
+    assert len(keys) == 3
+    assert configured_cache("model-a", "onnx").model_name == "model-a@onnx"
+
+
+def test_texts_are_normalized_before_hashing():
+    cache = SentimentCache("model")
+
+    # Composed and decomposed "é", and any run of whitespace
+    assert cache.key("Caf\u00e9  is\tgreat\n") == cache.key("Cafe\u0301 is great")
+    assert cache.key("great") != cache.key("Great")
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SentimentCache("model", maxsize=2)
+    cache.set_many(["a", "b"], ["Positive", "Negative"])
+
+    assert cache.get_many(["a"]) == ["Positive"]
+    cache.set_many(["c"], ["Neutral"])
+
+    assert cache.get_many(["a", "b", "c"]) == ["Positive", None, "Neutral"]
+    assert (cache.stats["hits"], cache.stats["misses"], cache.stats["memory_entries"]) == (3, 1, 2)
+
+
+def test_disk_tier_survives_restarts_and_refills_the_lru(tmp_path):
+    path = tmp_path / "sentiments.db"
+    SentimentCache("model", maxsize=1, path=path).set_many(["a", "b"], ["Positive", "Negative"])
+
+    cache = SentimentCache("model", maxsize=1, path=path)
+
+    assert cache.get_many(["a", "b", "c"]) == ["Positive", "Negative", None]
+    assert cache.stats["memory_entries"] == 1
+
+
+def test_disk_rows_of_other_models_are_dropped(tmp_path):
+    path = tmp_path / "sentiments.db"
+    SentimentCache("old-model", path=path).set_many(["a"], ["Positive"])
+
+    SentimentCache("new-model", path=path)
+
+    assert SentimentCache("old-model", path=path).get_many(["a"]) == [None]
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.llm.summary_updates import SummaryTarget, plan_summary_update, save_summary_update, sentiment_drift
+from src.models import ReviewBatch
+from src.storage.summary_store import get_summary_store
+
+START = datetime(2025, 1, 1)
+TARGET = SummaryTarget("app_store", 123, "us", num_reviews=100)
+
+
+def make_reviews(first: int, count: int, sentiment: str = "Positive") -> ReviewBatch:
+    """Reviews posted one hour apart, `first` hours after START, newest first."""
+    reviews = ReviewBatch()
+    for i in reversed(range(first, first + count)):
+        reviews.append(
+            review_id=f"a{i}",
+            source="app_store",
+            user_name="user",
+            country="us",
+            rating=4,
+            sentiment=sentiment,
+            review_text=f"r{i}",
+            date=START + timedelta(hours=i),
+        )
+    return reviews
+
+
+def analysis(*batches: ReviewBatch) -> ReviewBatch:
+    reviews = ReviewBatch()
+    for batch in batches:
+        reviews.extend(batch)
+    return reviews
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUMMARY_STORE_PATH", str(tmp_path / "summaries.db"))
+    get_summary_store.cache_clear()
+    yield get_summary_store()
+    get_summary_store.cache_clear()
+
+
+@pytest.fixture
+def summarized() -> ReviewBatch:
+    """100 summarized reviews, stored as the first version of the summary."""
+    reviews = make_reviews(0, 100)
+    update = plan_summary_update(TARGET, reviews)
+    assert (update.rebuild_reason, save_summary_update(update, "v1")) == ("no_summary", 1)
+    return reviews
+
+
+def test_summary_store_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("SUMMARY_STORE_PATH", "")
+    get_summary_store.cache_clear()
+
+    assert plan_summary_update(TARGET, make_reviews(0, 10)) is None
+
+
+def test_no_new_reviews_leave_the_summary_unchanged(store, summarized):
+    update = plan_summary_update(TARGET, summarized)
+
+    assert update.unchanged and len(update.reviews) == 0
+    assert save_summary_update(update, update.previous.summary) == 1
+    assert len(store.versions("app_store", 123, "us")) == 1
+
+
+def test_new_reviews_refine_the_summary(store, summarized):
+    new = make_reviews(100, 10)
+
+    update = plan_summary_update(TARGET, analysis(new, summarized[:90]))
+
+    assert update.incremental and update.reviews.review_id == new.review_id
+    assert save_summary_update(update, "v2") == 2
+    latest = store.latest("app_store", 123, "us")
+    assert (latest.summary, latest.review_count, latest.updates_since_rebuild) == ("v2", 110, 1)
+    assert latest.covered_until == new.date[0]
+    assert latest.rebuild_review_count == 100
+
+
+@pytest.mark.parametrize(
+    ("env", "new_reviews", "target", "reason"),
+    [
+        ({}, make_reviews(100, 10), TARGET._replace(rebuild=True), "requested"),
+        ({}, make_reviews(100, 10), TARGET._replace(num_reviews=200), "scope"),
+        ({"SUMMARY_MAX_AGE_DAYS": "0"}, make_reviews(100, 10), TARGET, "stale"),
+        ({"SUMMARY_MAX_UPDATES": "0"}, make_reviews(100, 10), TARGET, "updates"),
+        ({"SUMMARY_MAX_NEW_SHARE": "0.05"}, make_reviews(100, 10), TARGET, "new_share"),
+        ({}, make_reviews(100, 30, sentiment="Negative"), TARGET, "drift"),
+    ],
+)
+def test_rebuild_rules(monkeypatch, summarized, env, new_reviews, target, reason):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    reviews = analysis(new_reviews, summarized)
+
+    update = plan_summary_update(target, reviews)
+
+    assert update.rebuild_reason == reason
+    assert len(update.reviews) == len(reviews)
+
+
+def test_stale_summary_is_rebuilt_even_without_new_reviews(monkeypatch, summarized):
+    monkeypatch.setenv("SUMMARY_MAX_AGE_DAYS", "0")
+
+    assert plan_summary_update(TARGET, summarized).rebuild_reason == "stale"
+
+
+def test_summary_covering_none_of_the_reviews_is_rebuilt(summarized):
+    assert plan_summary_update(TARGET, make_reviews(100, 50)).rebuild_reason == "window"
+
+
+def test_drift_is_only_checked_from_enough_new_reviews(monkeypatch, summarized):
+    monkeypatch.setenv("SUMMARY_DRIFT_MIN_REVIEWS", "20")
+
+    few = plan_summary_update(TARGET, analysis(make_reviews(100, 19, sentiment="Negative"), summarized))
+    small_drift = plan_summary_update(
+        TARGET, analysis(make_reviews(100, 16), make_reviews(116, 4, sentiment="Negative"), summarized)
+    )
+
+    assert few.incremental and small_drift.incremental
+
+
+def test_updates_accumulate_until_the_new_share_is_exceeded(monkeypatch, summarized):
+    monkeypatch.setenv("SUMMARY_MAX_NEW_SHARE", "0.25")
+    reviews = summarized
+    for step, first in enumerate(range(100, 125, 10)):
+        reviews = analysis(make_reviews(first, 10), reviews[:90])
+        update = plan_summary_update(TARGET, reviews)
+        if step < 2:
+            assert update.incremental
+            save_summary_update(update, f"v{step + 2}")
+        else:
+            # 30 reviews added since the rebuild of 100
+            assert update.rebuild_reason == "new_share"
+
+
+def test_sentiment_drift_is_the_total_variation_distance():
+    assert sentiment_drift({"Positive": 5}, {"Positive": 1}) == 0
+    assert sentiment_drift({"Positive": 5}, {"Negative": 2}) == 1
+    assert sentiment_drift({"Positive": 3, "Negative": 1}, {"Positive": 1, "Negative": 1}) == pytest.approx(0.25)
+    assert sentiment_drift({}, {"Positive": 1}) == 0
+
+
+def test_app_skips_the_llm_without_new_reviews(client, fake_llm, tmp_path, monkeypatch):
+    monkeypatch.setenv("SUMMARY_STORE_PATH", str(tmp_path / "app-summaries.db"))
+    get_summary_store.cache_clear()
+    params = {"app_name": "App", "app_id": 123, "num_reviews": 30, "include_plots": False, "include_raw_data": False}
+
+    first = client.get("/app-reviews/", params=params).json()
+    calls = len(fake_llm.prompts)
+    second = client.get("/app-reviews/", params=params).json()
+
+    assert first["summary_update"]["update"] == "full" and calls > 0
+    assert second["summary_update"] == {
+        "version": 1, "update": "unchanged", "rebuild_reason": None, "reviews_summarized": 0
+    }
+    assert second["llm_summary"] == first["llm_summary"]
+    assert len(fake_llm.prompts) == calls
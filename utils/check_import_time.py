@@ -0,0 +1,81 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded on first use by the stages that need them, never by importing the app
+DEFERRED_MODULES = (
+    "torch", "transformers", "matplotlib", "numpy", "pandas", "google_play_scraper",
+    "langchain_core", "langchain_anthropic", "anthropic",
+)
+
+
+def measure_import(module: str = "app") -> tuple[float, list[str], list[tuple[int, str]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: Wall time of the import in seconds, deferred modules it loaded anyway
+            and the slowest imports made directly by the module as (microseconds, name)
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": str(ROOT)},
+    )
+    lines = result.stdout.splitlines()
+    seconds, loaded = float(lines[-2]), [m for m in lines[-1].split(",") if m]
+
+    # -X importtime writes "import time: self [us] | cumulative | imported package" to stderr,
+    # indenting every package by two more spaces than the one that imported it
+    slowest = []
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit() and len(fields[2]) - len(fields[2].lstrip()) == 3:
+            slowest.append((int(fields[1]), fields[2].strip()))
+    return seconds, loaded, sorted(slowest, reverse=True)[:10]
+
+
+def check_import_time(module: str = "app", budget: float | None = None, runs: int = 3) -> float:
+    """
+    Check that a cold import of the app stays within the budget and loads none of the deferred dependencies.
+
+    Args:
+        module: Module to import (default: "app")
+        budget: Maximum import time in seconds (default: IMPORT_TIME_BUDGET_SECONDS or 1.0)
+        runs: Number of fresh interpreters, the fastest run counts (default: 3)
+
+    Returns:
+        float: Fastest import time in seconds
+
+    Raises:
+        ValueError: If the import is over the budget or loads a deferred dependency
+    """
+    budget = budget if budget is not None else float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", 1.0))
+    measurements = [measure_import(module) for _ in range(runs)]
+    seconds, loaded, slowest = min(measurements)
+
+    print(f"import {module}: {seconds:.3f}s (budget {budget:.3f}s, fastest of {runs})")
+    for microseconds, name in slowest:
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+    if loaded:
+        raise ValueError(f"import {module} loads deferred dependencies: {', '.join(loaded)}")
+    if seconds > budget:
+        raise ValueError(f"import {module} took {seconds:.3f}s, over the {budget:.3f}s budget")
+    return seconds
+
+
+if __name__ == "__main__":
+    try:
+        check_import_time()
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,23 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.data_analysis.sentiment_inference import check_backend_parity  # noqa: E402
+
+
+def load_review_texts(file_path: Path | str) -> list[str]:
+    """Load review texts from a saved /app-reviews/ response with raw data."""
+    with open(file_path, "r") as file:
+        data = json.load(file)
+    return [review["review_text"] for review in data["raw_data"]["reviews"]]
+
+
+if __name__ == "__main__":
+    input_path = "" # add path to a saved /app-reviews/ response here
+    backend = "onnx" # "torch_int8" or "onnx"
+
+    texts = load_review_texts(input_path)
+    agreement = check_backend_parity(texts, backend=backend)
+    print(f"{backend}: {agreement:.2%} of {len(texts)} labels match the reference pipeline")
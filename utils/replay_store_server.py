@@ -0,0 +1,85 @@
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Local stand-in for the App Store and Google Play that replays responses recorded with SCRAPER_RECORD_PATH.
+# Point the scrapers at it with APP_STORE_BASE_URL, APP_STORE_API_BASE_URL and GOOGLE_PLAY_BASE_URL,
+# e.g. http://127.0.0.1:8765 for all three.
+
+
+def load_recordings(file_path: Path | str) -> dict[tuple, list[dict]]:
+    """Load recorded responses, grouped by request. Repeated requests are answered in recorded order."""
+    recordings = defaultdict(list)
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            recordings[(entry["method"], entry["path"], entry["query"], entry["body"])].append(entry)
+            recordings[(entry["method"], entry["path"])].append(entry)
+    return recordings
+
+
+def make_handler(recordings: dict[tuple, list[dict]], throttle_every: int = 0) -> type[BaseHTTPRequestHandler]:
+    """Create a request handler that replays `recordings` and answers every `throttle_every`-th request with a 429."""
+    lock = threading.Lock()
+    served = defaultdict(int)
+    counter = {"requests": 0}
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def _replay(self, method: str) -> None:
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8") if length else None
+
+            with lock:
+                counter["requests"] += 1
+                if throttle_every and counter["requests"] % throttle_every == 0:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+
+                # Exact request first, then any recording of the same path
+                key = next(
+                    (k for k in ((method, parts.path, parts.query, body), (method, parts.path)) if k in recordings),
+                    None,
+                )
+                if key is None:
+                    self.send_error(404, "No recorded response")
+                    return
+                entries = recordings[key]
+                entry = entries[min(served[key], len(entries) - 1)]
+                served[key] += 1
+
+            payload = entry["text"].encode("utf-8")
+            self.send_response(entry["status"])
+            self.send_header("Content-Type", entry["content_type"] or "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._replay("GET")
+
+        def do_POST(self):
+            self._replay("POST")
+
+    return ReplayHandler
+
+
+def serve(recordings_path: Path | str, host: str = "127.0.0.1", port: int = 8765, throttle_every: int = 0) -> ThreadingHTTPServer:
+    """Start the stand-in server in a background thread and return it."""
+    server = ThreadingHTTPServer((host, port), make_handler(load_recordings(recordings_path), throttle_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    recordings_path = "" # add path to a file recorded with SCRAPER_RECORD_PATH here
+    throttle_every = 0 # answer every n-th request with 429 to exercise the retries, 0 disables it
+
+    server = serve(recordings_path, throttle_every=throttle_every)
+    print(f"Replaying {recordings_path} on http://{server.server_address[0]}:{server.server_address[1]}")
+    threading.Event().wait()